@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+from rule_engine import resolve_columns
+
+# Defaults for the rolling statistics
+WINDOW = 30  # values kept per key
+MIN_PERIODS = 5  # history needed before a key's rows are scored
+Z_THRESHOLD = 3.0
+QUANTILES = (0.25, 0.75)
+IQR_FENCE = 1.5  # Tukey fences: flag values beyond 1.5 IQR outside the rolling quartiles
+EWMA_ALPHA = 0.1
+EWMA_DROP = 0.5  # flag values below half of the key's moving average
+
+
+class RollingAnomalyDetector:
+    """Streaming per-key anomaly detection over rolling statistics.
+
+    Chunks are fed in arrival order with `update`. Every value is scored against
+    the values of the same key that came before it: rolling z-score, Tukey fences
+    on the rolling quartiles of the last `window` values, and a drop below the EWMA. State
+    between chunks is one fixed-size window buffer and one EWMA per key, kept in
+    NumPy arrays, so memory grows with the number of keys and not with the rows.
+    """
+
+    def __init__(self, value, key=None, window=WINDOW, min_periods=MIN_PERIODS, z_threshold=Z_THRESHOLD,
+                 quantiles=QUANTILES, iqr_fence=IQR_FENCE, alpha=EWMA_ALPHA, ewma_drop=EWMA_DROP):
+        self.value = value
+        self.key = key
+        self.window = window
+        self.min_periods = min_periods
+        self.z_threshold = z_threshold
+        self.quantiles = quantiles
+        self.iqr_fence = iqr_fence
+        self.alpha = alpha
+        self.ewma_drop = ewma_drop
+        self.keys = pd.Index([])
+        self.buffers = np.full((0, window), np.nan)  # last values per key, oldest first
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.ewma = np.full(0, np.nan)
+        self.rows_seen = 0
+
+    def _slots(self, keys):
+        unseen = pd.Index(pd.unique(keys)).difference(self.keys)
+        if len(unseen):
+            self.keys = self.keys.append(unseen)
+            grow = len(self.keys) - len(self.counts)
+            self.buffers = np.vstack([self.buffers, np.full((grow, self.window), np.nan)])
+            self.counts = np.concatenate([self.counts, np.zeros(grow, dtype=np.int64)])
+            self.ewma = np.concatenate([self.ewma, np.full(grow, np.nan)])
+        return self.keys.get_indexer(keys)
+
+    def _history(self, slots):
+        # Buffered values of the keys present in the chunk, in order, before the new values
+        slots = np.unique(slots)
+        counts = self.counts[slots]
+        rows = np.repeat(slots, counts)
+        cols = np.concatenate([np.arange(self.window - c, self.window) for c in counts]) if len(rows) else []
+        return pd.DataFrame({
+            'slot': rows,
+            'seq': np.concatenate([np.arange(-c, 0) for c in counts]) if len(rows) else [],
+            'value': self.buffers[rows, cols] if len(rows) else [],
+            'row': -1,
+        })
+
+    def update(self, chunk):
+        """Score a chunk against the history, add it to the state and return the flagged rows."""
+        values = pd.to_numeric(chunk[self.value], errors='coerce')
+        keys = chunk[self.key].astype(str) if self.key else pd.Series('all', index=chunk.index)
+        valid = values.notna().to_numpy()
+        positions = np.flatnonzero(valid)
+        self.rows_seen += len(chunk)
+        if not len(positions):
+            return chunk.iloc[0:0]
+
+        slots = self._slots(keys.to_numpy()[valid])
+        new = pd.DataFrame({'slot': slots, 'value': values.to_numpy()[valid], 'row': positions})
+        new['seq'] = new.groupby('slot').cumcount()
+        combined = pd.concat([self._history(slots), new], ignore_index=True)
+        combined = combined.sort_values(['slot', 'seq'], kind='mergesort').reset_index(drop=True)
+
+        # Statistics of the values strictly before each row, per key
+        grouped = combined.groupby('slot', sort=False)
+        previous = grouped['value'].shift()
+        rolling = previous.groupby(combined['slot'], sort=False).rolling(self.window, min_periods=self.min_periods)
+        mean = rolling.mean().reset_index(level=0, drop=True)
+        std = rolling.std().reset_index(level=0, drop=True)
+        q_low = rolling.quantile(self.quantiles[0]).reset_index(level=0, drop=True)
+        q_high = rolling.quantile(self.quantiles[1]).reset_index(level=0, drop=True)
+        spread = self.iqr_fence * (q_high - q_low)
+        low_fence, high_fence = q_low - spread, q_high + spread
+
+        # EWMA continued from each key's value after the previous chunks, carried on its last buffered row
+        is_new = combined['row'] >= 0
+        last_old = combined.index[~is_new & is_new.shift(-1, fill_value=True)]
+        ewma_input = combined['value'].where(is_new)
+        ewma_input.loc[last_old] = self.ewma[combined.loc[last_old, 'slot']]
+        ewma = (ewma_input.groupby(combined['slot'], sort=False)
+                .ewm(alpha=self.alpha, adjust=False, ignore_na=True).mean()
+                .reset_index(level=0, drop=True))
+        ewma_before = ewma.groupby(combined['slot'], sort=False).shift()
+
+        z = (combined['value'] - mean) / std.where(std > 0)
+        reasons = pd.Series('', index=combined.index)
+        reasons = reasons.mask(z.abs() > self.z_threshold, reasons + 'z_score;')
+        reasons = reasons.mask(combined['value'] < low_fence, reasons + 'below_quantile;')
+        reasons = reasons.mask(combined['value'] > high_fence, reasons + 'above_quantile;')
+        reasons = reasons.mask(combined['value'] < (1 - self.ewma_drop) * ewma_before, reasons + 'ewma_drop;')
+
+        self._store(combined, ewma)
+
+        flagged = is_new & (reasons != '')
+        scores = pd.DataFrame({
+            'row': combined['row'], 'rolling_mean': mean, 'rolling_std': std, 'z_score': z,
+            'low_fence': low_fence, 'high_fence': high_fence, 'ewma': ewma_before,
+            'reasons': reasons.str.rstrip(';'),
+        })[flagged].sort_values('row')
+        result = chunk.iloc[scores.pop('row').to_numpy()].copy()
+        for col in scores.columns:
+            result[col] = scores[col].to_numpy()
+        return result
+
+    def _store(self, combined, ewma):
+        # Keep the last `window` values of every key that received new values
+        tail = combined.groupby('slot', sort=False).tail(self.window)
+        counts = tail.groupby('slot', sort=False).size()
+        slots = counts.index.to_numpy()
+        self.buffers[slots] = np.nan
+        offsets = tail.groupby('slot', sort=False).cumcount().to_numpy()
+        start = self.window - counts.reindex(tail['slot']).to_numpy()
+        self.buffers[tail['slot'].to_numpy(), start + offsets] = tail['value'].to_numpy()
+        self.counts[slots] = counts.to_numpy()
+        last = ewma.groupby(combined['slot'], sort=False).last()
+        self.ewma[last.index.to_numpy()] = last.to_numpy()
+
+
+def detect_anomalies(chunks, value, key=None, **params):
+    """Run a detector over an iterator of chunks and return all flagged rows.
+
+    `value` and `key` are canonical names (see rule_engine.COLUMN_ALIASES) or
+    actual column names; they are resolved on the first chunk.
+    """
+    detector, flagged = None, []
+    for chunk in chunks:
+        if detector is None:
+            cols = resolve_columns(chunk.columns)
+            value_col = cols.get(value, value)
+            key_col = cols.get(key, key) if key else None
+            if value_col not in chunk.columns:
+                raise KeyError(f"Missing value column: {value}")
+            if key_col is not None and key_col not in chunk.columns:
+                key_col = None
+            detector = RollingAnomalyDetector(value_col, key_col, **params)
+        flagged.append(detector.update(chunk))
+    return pd.concat(flagged, ignore_index=True) if flagged else pd.DataFrame()
@@ -1,165 +1,371 @@
+import time
+
+# Start of the import, for the cold-start measurement in /healthz
+IMPORT_STARTED = time.perf_counter()
+
 import os
-from flask import Flask, render_template, request, send_file
+import shutil
 import tempfile
-import pandas as pd
-import google.generativeai as genai
+import itertools
+import threading
+from functools import cache, lru_cache
+from flask import Flask, Response, current_app, jsonify, render_template, request, url_for
+from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
+from llm_client import MODEL_NAME, generate_many
+from insight_cache import InsightCache, cache_key
+from job_queue import JOB_QUEUE_PATH, JobQueue, new_job_id, start_workers
+from results_store import FORMATS, ResultStore
+
+# pandas, the rule engine, the model and the Gemini client are imported by the
+# first route that needs them (see the get_* functions), so cold starts that only
+# serve the upload form stay fast.
 
 # Load environment variables from the .env file
 load_dotenv()
 
-# Retrieve the API key from the environment variable
-api_key = os.getenv("GEMINI_KEY")
-
-# Configure the generative AI API with the API key
-genai.configure(api_key=api_key)
-
-app = Flask(__name__)
-
-# Create an 'uploads' folder
 UPLOAD_FOLDER = 'uploads'
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
-
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
 ALLOWED_EXTENSIONS = {'csv'}
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-# Function to evaluate insights from the first 20 rows
-def evaluate_insights(df,category):
-    insights = []
-    
-    # Prepare the data for LLM
-    sample_data = df.head(20).to_csv(index=False)
-    prompt = f"Here are the first 20 rows of the dataset:\n{sample_data}\n"
-    prompt += f"Identify any issues based on the following criteria, the column names might be slightly differnet but understand the underlying meaning of the columns and then match them to the insight given below. the columns which I have given above, you only have those. You dont need to write everything, just write which insights match. Match only the insights which match dont write anything unnecessary. Dont write the insights which do not match. This is the category \n{category}\n. Do not write for any other category. Whichever problem you select write a solution for it too in 1 line below it. For each one write 1 solution :\n"
-    prompt += """
-    1. Red Aggregators: 
-       a. Aggregators_Discount: > 15% Discount
-       b. Delivery_Delay: Delivery time > 30 mins
-       c. Cancelled Order: Order status == Cancelled
-       d. Order Delay: Delivery time > 30 mins
-       e. Prep Delay: Prep time > 30 mins
-
-    2. Green Departments:
-       a. Item Turn Around Time: Preparation_Time_Taken < 10 mins
-
-    3. Red Departments:
-       a. Department_wise_cost: (HOLD) [over costly]
-       b. Long Preparation_Time - For Dine In: Preparation time > 60 mins
-
-    4. Yellow Departments:
-       a. Missing Recipes and item - (On Hold)
-
-    5. Green Inventory:
-       (Nhi samj raha hai/ Nothing)
-
-    6. Orange Inventory:
-       a. Department in Consumption: (Hold)
-       b. Purchase in consumption: If [consumed_quantity/purchased_quantity] < 85% then Orange
-       c. Quantity Change - On Hold
-
-    7. Red Inventory:
-       a. Double Order: More than 1 entry in entry_count column
-       b. New_Vendor: Getting items from new vendor instead of old supplier
-       c. Vendor_change: Higher price
-
-    8. Sales:
-       a. Bill Modifications: The bill amount is reduced
-       b. Bill Settlement less than 30 seconds: bill is settled in less than 30 seconds
-       c. Bill Settlement more than 15 minutes: bill is settled in more than 15 minutes
-       d. Discount: Same staff is giving too much discount
-       e. KOT Modification: Either too early or either too late
-       f. Long Preparation Time: Preparation is long
-       g. Cancelled Order: Order is cancelled
-       h. Complimentary Bills: Status column is complimentary
-       i. Due Payments: Multiple orders at the same time with duplicate invoice number and same staff
-       j. No Name, No number, No Covers, No Feedback: name justify itself
-    """
-    
-    # Use Gemini API to check for insights
-    model = genai.GenerativeModel("gemini-1.5-flash")
-    response = model.generate_content(prompt)
-    
-    # Extract the insights from the response
-    candidates = response.candidates
-    if candidates:
-        insights = candidates[0].content.parts[0].text.splitlines()
-    else:
-        insights.append("No insights were generated.")
-    
-    return insights
-
-# Generate the next suggestion ID based on the feedback file
-def get_next_suggestion_id(feedback_file='feedback.csv'):
-    if os.path.isfile(feedback_file):
-        feedback_df = pd.read_csv(feedback_file)
-        if 'Suggestion_ID' in feedback_df.columns and not feedback_df.empty:
-            last_id = feedback_df['Suggestion_ID'].max()
-            return last_id + 1
-    return 1
-
-# Save feedback to a CSV file
-def save_feedback(suggestion_id, rating, comment, feedback_file='feedback.csv'):
-    file_exists = os.path.isfile(feedback_file)
-
-    feedback_df = pd.DataFrame([[suggestion_id, rating, comment]], columns=['Suggestion_ID', 'Rating', 'Comment'])
-
-    feedback_df.to_csv(feedback_file, mode='a', header=not file_exists, index=False)
-
-
-# Submit route to handle uploaded CSV files
-@app.route('/submit', methods=['POST'])
+# Set INSIGHTS_USE_LLM=1 to let Gemini word the insights for the rules that fired
+USE_LLM = os.getenv("INSIGHTS_USE_LLM", "0").lower() in ("1", "true", "yes")
+
+# Bump when the prompt changes so cached responses of the old prompt are not reused
+PROMPT_VERSION = 1
+
+# Set APP_PREWARM=1 to load the heavy parts in a background thread as soon as the app is created
+PREWARM = os.getenv("APP_PREWARM", "0").lower() in ("1", "true", "yes")
+
+# Uploads are analysed by worker processes; /submit only queues them.
+# With JOB_WORKERS=0 no workers are started here and `python job_queue.py` runs them instead.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+_workers = []
+_workers_lock = threading.Lock()
+
+# Configure the generative AI API with the API key, once, when the first LLM call is made
+@cache
+def configure_llm():
+    import google.generativeai as genai
+    genai.configure(api_key=os.getenv("GEMINI_KEY"))
+    return genai
+
+# Cache of LLM responses, so re-uploads of the same export cost nothing
+@cache
+def get_insight_cache():
+    return InsightCache(os.getenv("INSIGHT_CACHE_PATH", os.path.join(tempfile.gettempdir(), 'insight_cache.sqlite')))
+
+# Insight results served by /download_insights, shared with the job workers
+@cache
+def get_result_store():
+    return ResultStore()
+
+@cache
+def get_job_queue():
+    return JobQueue(JOB_QUEUE_PATH)
+
+# Feedback storage shared with feedback_loop.py
+@cache
+def get_feedback_store():
+    from feedback_store import FeedbackStore
+    return FeedbackStore()
+
+# Order status model of the registry's CURRENT version; the pointer is read on every call, so a
+# newly registered or promoted model is picked up without a restart, and a missing one is not cached
+def get_predictor():
+    from predict import MODEL_NAME
+    from model_registry import current_version
+    version = current_version(MODEL_NAME)
+    return _load_predictor(version) if version else None
+
+@lru_cache(maxsize=1)
+def _load_predictor(version):
+    from predict import load_predictor
+    return load_predictor(version=version)
+
+# Load everything the routes need up front; returns the seconds each part took
+def prewarm():
+    timings = {}
+    for name, load in (('pandas', lambda: __import__('pandas')),
+                       ('rule_engine', lambda: __import__('rule_engine')),
+                       ('predictor', get_predictor),
+                       ('llm', configure_llm if USE_LLM else None)):
+        if load is None:
+            continue
+        start = time.perf_counter()
+        load()
+        timings[name] = round(time.perf_counter() - start, 4)
+    return timings
+
+# Start the worker processes on the first submission
+def ensure_workers():
+    with _workers_lock:
+        _workers[:] = [process for process in _workers if process.is_alive()]
+        if len(_workers) < JOB_WORKERS:
+            _workers.extend(start_workers(JOB_WORKERS - len(_workers)))
+
+# Turn the rule results of each file into insight lines, in upload order
+def insights_for_files(results_per_file, category):
+    from rule_engine import format_insights
+    if USE_LLM:
+        return describe_many(results_per_file, category)
+    return [format_insights(results) if results else ["No insights were generated."]
+            for results in results_per_file]
+
+# Optional LLM step: only the rules that actually fired are sent, never the data
+def build_insight_prompt(results, category):
+    fired = "\n".join(
+        f"- {r['label']} - {r['rule']}: {r['description']} ({r['count']} of {r['rows']} rows)"
+        for r in results
+    )
+    prompt = f"These issues were detected in the {category} data of a restaurant:\n{fired}\n"
+    prompt += "For each issue write one line describing it and one line below it with a 1 line solution. Do not write anything else.\n"
+    return prompt
+
+# Word the insights of several files with concurrent LLM calls, kept in upload order
+def describe_many(results_per_file, category):
+    from rule_engine import format_insights
+    insight_cache = get_insight_cache()
+    described = [["No insights were generated."] for _ in results_per_file]
+    pending = {}  # cache key -> (prompt, indices of the files sharing it)
+    for i, results in enumerate(results_per_file):
+        if not results:
+            continue
+        prompt = build_insight_prompt(results, category)
+        key = cache_key(prompt, category, PROMPT_VERSION, MODEL_NAME)
+        cached = insight_cache.get(key)
+        if cached is not None:
+            described[i] = cached.splitlines()
+        else:
+            pending.setdefault(key, (prompt, []))[1].append(i)
+
+    if pending:
+        configure_llm()
+    texts = generate_many([prompt for prompt, _ in pending.values()])
+    for (key, (_, indices)), text in zip(pending.items(), texts):
+        if text:
+            insight_cache.set(key, text)
+        for i in indices:
+            described[i] = text.splitlines() if text else format_insights(results_per_file[i])
+    return described
+
+# Job run by the workers: analyse the saved uploads of one submission and store the insights
+def run_insights_job(payload, report):
+    from rule_engine import evaluate_rules_chunked
+    from upload_ingestion import probe, iter_chunks
+    category, paths = payload['category'], payload['files']
+    try:
+        results_per_file = []
+        for i, path in enumerate(paths):
+            report(i / (len(paths) + 1), f"Analysing {os.path.basename(path)}")
+            with open(path, 'rb') as stream:
+                _, schema = probe(stream)
+                chunks = with_heartbeat(iter_chunks(stream, schema=schema), report)
+                results_per_file.append(evaluate_rules_chunked(chunks, category))
+
+        report(len(paths) / (len(paths) + 1), "Writing insights")
+        all_insights = []
+        for insights in insights_for_files(results_per_file, category):
+            all_insights.extend(insights)
+    finally:
+        shutil.rmtree(payload['dir'], ignore_errors=True)
+    return {'insights': all_insights, 'result_id': get_result_store().put(all_insights)}
+
+# Report after every chunk, so a long file does not look like a dead worker and get queued again
+def with_heartbeat(chunks, report):
+    for chunk in chunks:
+        report()
+        yield chunk
+
+# Submit route: save the uploads and queue them for analysis, answering at once with the job id
 def submit():
     if 'csv_files' not in request.files:
         return 'No file part in the form.'
     category = request.form.get('category')
     csv_files = request.files.getlist('csv_files')
 
-    # Initialize insights in a temporary file
-    temp_file_path = tempfile.NamedTemporaryFile(delete=False, suffix='.csv').name
-    all_insights = []
-
-    for file in csv_files:
+    job_id = new_job_id()
+    job_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], job_id)
+    os.makedirs(job_dir)
+    paths = []
+    for i, file in enumerate(csv_files):
         if file and allowed_file(file.filename):
-            filename = file.filename
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(file_path)
+            path = os.path.abspath(os.path.join(job_dir, f"{i}_{secure_filename(file.filename)}"))
+            file.save(path)
+            paths.append(path)
+    if not paths:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        return render_template('insights.html', insights=[], result_id=None)
 
-            # Read the CSV file and evaluate insights
-            df = pd.read_csv(file_path)
-            insights = evaluate_insights(df, category)
-            all_insights.extend(insights)
+    get_job_queue().submit('insights', {'category': category, 'files': paths, 'dir': os.path.abspath(job_dir)}, job_id)
+    if JOB_WORKERS:
+        ensure_workers()
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify(job_id=job_id, status_url=url_for('job_status', job_id=job_id)), 202
+    return render_template('job.html', job_id=job_id)
 
-    # Save insights to the temporary CSV file
-    insights_df = pd.DataFrame(all_insights, columns=['Insight'])
-    insights_df.to_csv(temp_file_path, index=False)
+# Progress and result of a queued analysis
+def job_status(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify(error='Unknown job id.'), 404
+    return jsonify(job)
 
-    return render_template('insights.html', insights=all_insights, temp_file_path=temp_file_path)
+# Insights page of a finished analysis
+def job_insights(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return 'Unknown job id.', 404
+    if job['status'] != 'done':
+        return render_template('job.html', job_id=job_id)
+    return render_template('insights.html', insights=job['result']['insights'],
+                           result_id=job['result']['result_id'], formats=FORMATS)
 
-@app.route('/download_insights', methods=['GET'])
+# Stream the insights of a result as CSV (default) or Parquet, straight from the results store
 def download_insights():
-    # Use the path stored in the template to serve the insights
-    temp_file_path = request.args.get('temp_file_path')
-    return send_file(temp_file_path, as_attachment=True)
+    fmt = request.args.get('format', 'csv')
+    if fmt not in FORMATS:
+        return 'Unknown format.', 400
+    chunks = get_result_store().stream(request.args.get('result_id'), fmt)
+    if chunks is None:
+        return 'Unknown or expired result.', 404
+    headers = {'Content-Disposition': f'attachment; filename=insights.{fmt}'}
+    return Response(chunks, mimetype=FORMATS[fmt], headers=headers)
+
+# Batch order status prediction from an uploaded CSV or a JSON list of records
+def predict():
+    order_status_predictor = get_predictor()
+    if order_status_predictor is None:
+        return 'No trained model with its category encoder is registered.', 503
+    if 'csv_file' in request.files:
+        return predict_upload(request.files['csv_file'].stream, order_status_predictor)
+
+    import pandas as pd
+    from predict import predict_frame, iter_csv
+    records = request.get_json(silent=True)
+    if isinstance(records, dict):
+        records = records.get('rows')
+    if not isinstance(records, list):
+        return 'Send a csv_file upload or a JSON list of records.', 400
+    start = time.perf_counter()
+    try:
+        result = predict_frame(pd.DataFrame.from_records(records), order_status_predictor)
+    except KeyError as e:
+        return e.args[0], 400
+    elapsed = time.perf_counter() - start
+
+    headers = {'X-Model-Version': str(order_status_predictor[1]['version'])}
+    headers.update(prediction_stats(len(result), elapsed))
+    return Response(iter_csv(result), mimetype='text/csv', headers=headers)
+
+# Rows scored, latency and throughput of a prediction request
+def prediction_stats(rows, elapsed):
+    return {
+        'X-Prediction-Rows': str(rows),
+        'X-Prediction-Latency-Ms': f"{elapsed * 1000:.1f}",
+        'X-Prediction-Rows-Per-Sec': f"{rows / max(elapsed, 1e-9):.0f}",
+    }
+
+# Pass result frames through, adding their rows and the seconds spent producing them to `totals`
+def timed_results(results, totals):
+    while True:
+        start = time.perf_counter()
+        result = next(results, None)
+        totals['seconds'] += time.perf_counter() - start
+        if result is None:
+            return
+        totals['rows'] += len(result)
+        yield result
+
+# Predict an uploaded CSV chunk by chunk, streaming each chunk's rows as soon as they are scored.
+# The headers leave before the rows are scored, so the X-Prediction-* figures close the stream
+# as a '#' comment line (read it with e.g. pd.read_csv(..., comment='#')).
+def predict_upload(stream, order_status_predictor):
+    from predict import predict_chunks, iter_csv_chunks
+    from upload_ingestion import probe, iter_chunks
+    # Flask closes the upload when the view returns, so the response reads from its own copy
+    upload = tempfile.TemporaryFile()
+    shutil.copyfileobj(stream, upload)
+    upload.seek(0)
+    _, schema = probe(upload)
+    chunks = iter_chunks(upload, schema=schema)
+    totals = {'rows': 0, 'seconds': 0.0}
+    results = timed_results(predict_chunks(chunks, order_status_predictor), totals)
+    # Score the first chunk before answering, so missing feature columns still give a 400
+    try:
+        first = next(results, None)
+    except KeyError as e:
+        chunks.close()
+        upload.close()
+        return e.args[0], 400
+
+    def generate():
+        try:
+            yield from iter_csv_chunks(itertools.chain([] if first is None else [first], results))
+            stats = prediction_stats(totals['rows'], totals['seconds'])
+            yield '# ' + ', '.join(f'{name}: {value}' for name, value in stats.items()) + '\n'
+        finally:
+            chunks.close()
+            upload.close()
+    return Response(generate(), mimetype='text/csv',
+                    headers={'X-Model-Version': str(order_status_predictor[1]['version'])})
 
 # Route to collect feedback
-@app.route('/feedback', methods=['POST'])
 def feedback():
     rating = request.form.get('rating')
     comment = request.form.get('comment')
-    suggestion_id = get_next_suggestion_id()
-    save_feedback(suggestion_id, rating, comment)
+    get_feedback_store().add(rating, comment)
     return render_template('thank_you.html')
 
+# Load the heavy parts now instead of on the first real request (e.g. from a deploy hook)
+def prewarm_route():
+    return jsonify(prewarmed=prewarm())
+
+# Startup timings of this instance, the size of the results store and the LLM response cache hit rate
+def healthz():
+    return jsonify(import_seconds=current_app.config['IMPORT_SECONDS'],
+                   startup_seconds=current_app.config['STARTUP_SECONDS'],
+                   uptime_seconds=round(time.perf_counter() - IMPORT_STARTED, 3),
+                   results=get_result_store().stats(),
+                   insight_cache=get_insight_cache().stats())
+
 # Home route to display the upload form
-@app.route('/')
 def index():
     return render_template('index.html')
 
+ROUTES = [
+    ('/', index, ['GET']),
+    ('/submit', submit, ['POST']),
+    ('/jobs/<job_id>', job_status, ['GET']),
+    ('/jobs/<job_id>/insights', job_insights, ['GET']),
+    ('/download_insights', download_insights, ['GET']),
+    ('/predict', predict, ['POST']),
+    ('/feedback', feedback, ['POST']),
+    ('/prewarm', prewarm_route, ['POST']),
+    ('/healthz', healthz, ['GET']),
+]
+
+# Application factory: registers the routes only; nothing heavy is loaded here
+def create_app(config=None):
+    started = time.perf_counter()
+    flask_app = Flask(__name__)
+    flask_app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    flask_app.config.update(config or {})
+    for rule, view, methods in ROUTES:
+        endpoint = 'prewarm' if view is prewarm_route else view.__name__
+        flask_app.add_url_rule(rule, endpoint, view, methods=methods)
+    if PREWARM:
+        threading.Thread(target=prewarm, daemon=True).start()
+    flask_app.config['STARTUP_SECONDS'] = round(time.perf_counter() - started, 4)
+    flask_app.config['IMPORT_SECONDS'] = round(time.perf_counter() - IMPORT_STARTED, 4)
+    return flask_app
+
+# Module-level app for Vercel and `flask run`
+app = create_app()
+
 # Run the Flask app
 if __name__ == '__main__':
     app.run(debug=True)
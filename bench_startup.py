@@ -0,0 +1,65 @@
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# Modules that must stay out of `import app`; the routes import them when first used
+HEAVY_MODULES = ['pandas', 'numpy', 'sklearn', 'google.generativeai']
+
+# Runs in a fresh interpreter: time `import app` and the first request to the upload form
+PROBE = """
+import sys, json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+response = app.app.test_client().get('/')
+first_request = time.perf_counter()
+print(json.dumps({
+    'import_seconds': imported - start,
+    'first_request_seconds': first_request - imported,
+    'status': response.status_code,
+    'heavy_loaded': [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def measure(runs=5):
+    """Cold-start timings of `runs` fresh processes."""
+    results = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', PROBE], capture_output=True, text=True, check=True)
+        results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure the cold start of the Flask app.')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-seconds', type=float, default=None,
+                        help='fail when the median import + first request time is above this')
+    args = parser.parse_args(argv)
+
+    results = measure(args.runs)
+    import_median = statistics.median(r['import_seconds'] for r in results)
+    request_median = statistics.median(r['first_request_seconds'] for r in results)
+    heavy = sorted({name for r in results for name in r['heavy_loaded']})
+    print(f"import app:     {import_median * 1000:8.1f} ms (median of {args.runs})")
+    print(f"first request:  {request_median * 1000:8.1f} ms")
+    print(f"cold start:     {(import_median + request_median) * 1000:8.1f} ms")
+
+    failed = False
+    if heavy:
+        print(f"Heavy modules loaded at import: {', '.join(heavy)}")
+        failed = True
+    if any(r['status'] != 200 for r in results):
+        print("The upload form did not answer with 200.")
+        failed = True
+    if args.max_seconds is not None and import_median + request_median > args.max_seconds:
+        print(f"Cold start is above the {args.max_seconds:.2f} s budget.")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
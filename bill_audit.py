@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+from rule_engine import resolve_columns, _as_text, _is_blank, FAST_SETTLEMENT_SECS, SLOW_SETTLEMENT_SECS
+
+# Violation names, as reported in the 'violation' column
+DUE_PAYMENT = 'due_payment'  # invoice number repeated by the same staff
+DUPLICATE_BILL = 'duplicate_bill'  # same invoice, staff and creation time
+DOUBLE_ORDER = 'double_order'  # entry_count > 1
+FAST_SETTLEMENT = 'fast_settlement'
+SLOW_SETTLEMENT = 'slow_settlement'
+
+VIOLATION_COLUMNS = ['row_id', 'violation', 'invoice', 'staff', 'settlement_secs']
+
+
+def _key_text(col):
+    # As written in the CSV: invoice 101 is '101' in an int chunk and in a float chunk (one with a NaN)
+    text = _as_text(col) if pd.api.types.is_numeric_dtype(col) else col
+    return text.astype(str).str.strip()
+
+
+def key_hashes(frame):
+    """64-bit hash per row of the key columns, on normalized text so '101', ' 101' and 101.0 match."""
+    keys = frame.apply(_key_text)
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+class KeyIndex:
+    """Hash index of the keys seen so far.
+
+    Keys seen once map to their first row (and the values given with it); keys seen
+    more than once are only kept in a set. `add` reports which new rows have a key
+    that occurs more than once so far, plus the stored first rows of keys that only
+    now became duplicated, so every duplicated row is reported exactly once. Each
+    call costs O(rows added), however long the history is.
+    """
+
+    def __init__(self):
+        self.once = {}  # hash -> (first row, *values) of keys seen exactly once
+        self.repeated = set()  # hashes of keys seen more than once
+
+    def __len__(self):
+        return len(self.once) + len(self.repeated)
+
+    def add(self, hashes, row_ids, values=()):
+        per_key = pd.Series(np.arange(len(hashes))).groupby(hashes, sort=False).agg(['first', 'size'])
+        duplicated, revived = [], []
+        for key, pos, size in zip(per_key.index.tolist(), per_key['first'].tolist(), per_key['size'].tolist()):
+            if key in self.repeated:
+                duplicated.append(key)
+            elif key in self.once:
+                # Reported now, so the stored first row is no longer needed
+                revived.append(self.once.pop(key))
+                self.repeated.add(key)
+                duplicated.append(key)
+            elif size > 1:
+                self.repeated.add(key)
+                duplicated.append(key)
+            else:
+                self.once[key] = (row_ids[pos], *(column[pos] for column in values))
+
+        # Rows of the chunk whose key now occurs more than once
+        repeated = pd.Index(hashes).isin(duplicated)
+        return repeated, revived
+
+
+class BillAudit:
+    """Incremental audit of bills for duplicate invoices, double orders and settlement times.
+
+    Feed bills in arrival order with `update`; each call is one O(rows) pass over
+    the new bills against hash indexes on (invoice, staff) and (invoice, staff,
+    created_at), and returns the violations it found. Rows are numbered across
+    calls, so `row_id` identifies a bill in the full stream.
+    """
+
+    def __init__(self):
+        self.cols = None
+        self.rows_seen = 0
+        self.invoices = KeyIndex()
+        self.bills = KeyIndex()
+
+    def _frame(self, chunk, row_ids, mask, violation, secs=None):
+        if not mask.any():
+            return None
+        cols = self.cols
+        return pd.DataFrame({
+            'row_id': row_ids[mask],
+            'violation': violation,
+            'invoice': chunk[cols['invoice']].to_numpy()[mask] if 'invoice' in cols else None,
+            'staff': chunk[cols['staff']].to_numpy()[mask] if 'staff' in cols else None,
+            'settlement_secs': secs[mask] if secs is not None else np.nan,
+        })
+
+    def _duplicates(self, index, chunk, keys, row_ids, violation):
+        # Invoice and staff are stored with first occurrences, to report them if a repeat arrives later
+        cols = self.cols
+        values = (chunk[cols['invoice']].to_numpy(), chunk[cols['staff']].to_numpy())
+        repeated, revived = index.add(key_hashes(keys), row_ids, values)
+        frames = [self._frame(chunk, row_ids, repeated, violation)]
+        if revived:
+            frames.append(pd.DataFrame(revived, columns=['row_id', 'invoice', 'staff'])
+                          .assign(violation=violation, settlement_secs=np.nan))
+        return frames
+
+    def update(self, chunk):
+        """Audit a chunk of new bills and return its violations (VIOLATION_COLUMNS)."""
+        if self.cols is None:
+            self.cols = resolve_columns(chunk.columns)
+        cols = self.cols
+        row_ids = np.arange(self.rows_seen, self.rows_seen + len(chunk))
+        self.rows_seen += len(chunk)
+        frames = []
+
+        if 'invoice' in cols and 'staff' in cols:
+            key_cols = [cols['invoice'], cols['staff']]
+            # Bills without an invoice number or staff member cannot repeat one another
+            keyed = ~(_is_blank(chunk[cols['invoice']]) | _is_blank(chunk[cols['staff']])).to_numpy()
+            frames += self._duplicates(self.invoices, chunk[keyed], chunk[key_cols][keyed], row_ids[keyed],
+                                       DUE_PAYMENT)
+            if 'created_at' in cols:
+                created = pd.to_datetime(chunk[cols['created_at']], errors='coerce')
+                timed = keyed & created.notna().to_numpy()
+                keys = chunk[key_cols].assign(_created=created)[timed]
+                frames += self._duplicates(self.bills, chunk[timed], keys, row_ids[timed], DUPLICATE_BILL)
+
+        if 'entry_count' in cols:
+            entries = pd.to_numeric(chunk[cols['entry_count']], errors='coerce')
+            frames.append(self._frame(chunk, row_ids, (entries > 1).to_numpy(), DOUBLE_ORDER))
+
+        if 'created_at' in cols and 'settled_at' in cols:
+            secs = (pd.to_datetime(chunk[cols['settled_at']], errors='coerce')
+                    - pd.to_datetime(chunk[cols['created_at']], errors='coerce')).dt.total_seconds().to_numpy()
+            frames.append(self._frame(chunk, row_ids, secs < FAST_SETTLEMENT_SECS, FAST_SETTLEMENT, secs))
+            frames.append(self._frame(chunk, row_ids, secs > SLOW_SETTLEMENT_SECS, SLOW_SETTLEMENT, secs))
+
+        frames = [frame for frame in frames if frame is not None]
+        if not frames:
+            return pd.DataFrame(columns=VIOLATION_COLUMNS)
+        return pd.concat(frames, ignore_index=True)[VIOLATION_COLUMNS]
+
+
+def audit_bills(chunks):
+    """Audit a whole dataset given as an iterator of chunks; returns all violations."""
+    audit = BillAudit()
+    frames = [audit.update(chunk) for chunk in chunks]
+    frames = [frame for frame in frames if not frame.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=VIOLATION_COLUMNS)
+
+
+def summarize(violations):
+    """Number of violations per type."""
+    return violations['violation'].value_counts()
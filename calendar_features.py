@@ -0,0 +1,117 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Lookup table of calendar features per day, extended on demand and kept on disk
+CALENDAR_TABLE_PATH = os.getenv('CALENDAR_TABLE_PATH', './PS_DATA/.cache/calendar_features.pkl')
+
+CALENDAR_COLUMNS = ['islamic_year', 'islamic_month', 'islamic_day',
+                    'hindu_year', 'hindu_month', 'hindu_day', 'is_holiday']
+
+
+# Reduced Julian day number of 1970-01-01, the day numbering of the Umm al-Qura tables
+RJD_EPOCH = 40588
+
+_hijri_table = None
+
+
+def _hijri_lookup():
+    """Hijri year, month and day for every day of the supported range, indexed by day number."""
+    global _hijri_table
+    if _hijri_table is None:
+        from hijri_converter import ummalqura
+        starts = np.asarray(ummalqura.MONTH_STARTS, dtype=np.int64)
+        lengths = np.diff(starts)
+        months = np.repeat(np.arange(len(lengths)) + ummalqura.HIJRI_OFFSET, lengths)
+        days = np.arange(starts[0], starts[-1]) - np.repeat(starts[:-1], lengths) + 1
+        _hijri_table = (starts[0], months // 12 + 1, months % 12 + 1, days)
+    return _hijri_table
+
+
+def gregorian_to_hijri(dates):
+    """Vectorized Gregorian to Umm al-Qura Hijri conversion.
+
+    Returns year, month and day as float arrays, NaN for missing dates and dates
+    outside the supported range (1924-08-01 to 2077-11-16).
+    """
+    first, years, months, days = _hijri_lookup()
+    day_numbers = np.asarray(pd.to_datetime(pd.Series(dates)).values.astype('datetime64[D]'))
+    valid = ~np.isnat(day_numbers)
+    offsets = np.where(valid, day_numbers.astype(np.int64) + RJD_EPOCH - first, -1)
+    valid &= (offsets >= 0) & (offsets < len(days))
+    offsets = np.where(valid, offsets, 0)
+    return tuple(np.where(valid, table[offsets], np.nan) for table in (years, months, days))
+
+
+def islamic_regressors(dates):
+    """0/1 columns for Ramadan, Eid al-Fitr (1-3 Shawwal) and Eid al-Adha (10-13 Dhu al-Hijjah)."""
+    _, month, day = gregorian_to_hijri(dates)
+    return pd.DataFrame({
+        'ramadan': (month == 9).astype(int),
+        'eid_al_fitr': ((month == 10) & (day <= 3)).astype(int),
+        'eid_al_adha': ((month == 12) & (day >= 10) & (day <= 13)).astype(int),
+    })
+
+
+def build_calendar_table(start, end):
+    """Hijri, Indian civil and Indian holiday features for every day from start to end."""
+    import holidays
+    from convertdate import indian_civil
+
+    days = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq='D')
+    india_holidays = holidays.India(years=range(days[0].year, days[-1].year + 1))
+    rows = []
+    for day in days:
+        hindu = indian_civil.from_gregorian(day.year, day.month, day.day)
+        rows.append((hindu[0], hindu[1], hindu[2], 1 if day in india_holidays else 0))
+    table = pd.DataFrame(rows, index=days, columns=['hindu_year', 'hindu_month', 'hindu_day', 'is_holiday'])
+    table['islamic_year'], table['islamic_month'], table['islamic_day'] = gregorian_to_hijri(days)
+    return table[CALENDAR_COLUMNS]
+
+
+def load_calendar_table(start, end, path=CALENDAR_TABLE_PATH):
+    """Return a lookup table covering start..end, computing and saving only the missing days."""
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+    table = pd.read_pickle(path) if path and os.path.exists(path) else None
+    if table is not None and table.index[0] <= start and table.index[-1] >= end:
+        return table
+
+    if table is None:
+        table = build_calendar_table(start, end)
+    else:
+        parts = [table]
+        if start < table.index[0]:
+            parts.insert(0, build_calendar_table(start, table.index[0] - pd.Timedelta(days=1)))
+        if end > table.index[-1]:
+            parts.append(build_calendar_table(table.index[-1] + pd.Timedelta(days=1), end))
+        table = pd.concat(parts)
+
+    if path:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        table.to_pickle(path)
+    return table
+
+
+def add_calendar_features(data, date_col='Date_s'):
+    """Add Gregorian, Islamic, Hindu calendar features and holiday information.
+
+    The non-Gregorian features are looked up once per day in the calendar table
+    and joined back to the rows, so the cost grows with the number of distinct
+    days and not the number of rows.
+    """
+    dates = data[date_col]
+    data['gregorian_year'] = dates.dt.year
+    data['gregorian_month'] = dates.dt.month
+    data['gregorian_day'] = dates.dt.day
+    data['day_of_week'] = dates.dt.dayofweek
+
+    days = dates.dt.normalize()
+    if days.notna().any():
+        table = load_calendar_table(days.min(), days.max())
+        features = table.reindex(days.values)
+        for col in CALENDAR_COLUMNS:
+            data[col] = features[col].values
+    else:
+        for col in CALENDAR_COLUMNS:
+            data[col] = pd.NA
+    return data
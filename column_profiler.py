@@ -0,0 +1,329 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from data_loader import list_csv_files
+
+# Rows per chunk while streaming a file
+CHUNK_ROWS = 100_000
+
+# Distinct values tracked exactly (in first-seen order) before a column relies on HyperLogLog only
+EXACT_DISTINCT = 1000
+
+# HyperLogLog precision: 2**14 registers, about 0.8% standard error
+HLL_PRECISION = 14
+
+# Heavy hitters kept per column (Misra-Gries counters)
+TOP_K = 64
+
+# t-digest compression: about COMPRESSION / 2 centroids per column
+COMPRESSION = 200
+
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch over 64-bit hashes."""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes):
+        if not len(hashes):
+            return
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        bits = 64 - self.precision
+        index = (hashes >> np.uint64(bits)).astype(np.int64)
+        rest = (hashes & np.uint64((1 << bits) - 1)).astype(np.float64)  # < 2**53, exact as float
+        rank = (bits - np.frexp(rest)[1] + 1).astype(np.uint8)  # leading zeros + 1
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)  # linear counting for small cardinalities
+        return int(round(estimate))
+
+
+class TopK:
+    """Mergeable heavy hitters (Misra-Gries): counts are exact for values above n / k."""
+
+    def __init__(self, k=TOP_K):
+        self.k = k
+        self.counts = pd.Series(dtype='int64')
+
+    def add_counts(self, counts):
+        combined = pd.concat([self.counts, counts]).groupby(level=0, sort=False).sum()
+        if len(combined) > self.k:
+            # Subtract the (k+1)-th largest count and drop the counters that reach zero
+            cut = combined.nlargest(self.k + 1).iloc[-1]
+            combined = combined[combined > cut] - cut
+        self.counts = combined
+
+    def merge(self, other):
+        self.add_counts(other.counts)
+        return self
+
+    def top(self):
+        if self.counts.empty:
+            return None, 0
+        return self.counts.idxmax(), int(self.counts.max())
+
+
+class TDigest:
+    """Mergeable quantile sketch: weighted centroids, small near the tails.
+
+    Points are merged into centroids whose size is bounded by the arcsine scale
+    function, so the digest stays at about `compression` / 2 centroids.
+    """
+
+    def __init__(self, compression=COMPRESSION):
+        self.compression = compression
+        self.means = np.zeros(0)
+        self.weights = np.zeros(0)
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind='mergesort')
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        q = (np.cumsum(weights) - weights / 2) / total
+        bucket = np.floor(self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        merged_weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / merged_weights
+        self.weights = merged_weights
+
+    def add_values(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if len(values):
+            self._compress(np.r_[self.means, values], np.r_[self.weights, np.ones(len(values))])
+
+    def merge(self, other):
+        if len(other.means):
+            self._compress(np.r_[self.means, other.means], np.r_[self.weights, other.weights])
+        return self
+
+    def quantile(self, q, low=None, high=None):
+        if not len(self.means):
+            return np.nan
+        positions = (np.cumsum(self.weights) - self.weights / 2) / self.weights.sum()
+        xs, ys = positions, self.means
+        if low is not None:
+            xs, ys = np.r_[0.0, xs, 1.0], np.r_[low, ys, high]
+        return float(np.interp(q, xs, ys))
+
+
+class ColumnProfile:
+    """Mergeable statistics of one column: counts, min/max, sums, distinct values, top values, quantiles."""
+
+    def __init__(self, dtype):
+        self.dtype = dtype
+        self.rows = 0
+        self.nulls = 0
+        self.numeric = pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+        self.min = None
+        self.max = None
+        self.sum = 0.0
+        self.sumsq = 0.0
+        self.distinct = {}  # first-seen order; None stands for missing values
+        self.exact = True
+        self.hll = HyperLogLog()
+        self.top = TopK()
+        self.digest = TDigest()
+
+    def _track(self, values):
+        if not self.exact:
+            return
+        for value in values:
+            self.distinct.setdefault(None if pd.isna(value) else value, None)
+            if len(self.distinct) > EXACT_DISTINCT:
+                self.distinct, self.exact = {}, False
+                return
+
+    def update(self, series):
+        self.rows += len(series)
+        present = series.dropna()
+        self.nulls += len(series) - len(present)
+        self._track(pd.unique(series))
+        self.hll.add_hashes(pd.util.hash_pandas_object(present, index=False).to_numpy())
+        self.top.add_counts(present.value_counts(sort=False))
+        if self.numeric and len(present):
+            values = present.to_numpy(dtype=np.float64)
+            self.min = values.min() if self.min is None else min(self.min, values.min())
+            self.max = values.max() if self.max is None else max(self.max, values.max())
+            self.sum += values.sum()
+            self.sumsq += np.square(values).sum()
+            self.digest.add_values(values)
+        elif len(present):
+            try:
+                low, high = present.min(), present.max()
+                self.min = low if self.min is None else min(self.min, low)
+                self.max = high if self.max is None else max(self.max, high)
+            except TypeError:  # mixed types cannot be ordered
+                pass
+
+    def merge(self, other):
+        if self.numeric != other.numeric:
+            self.numeric = False
+            self.dtype = np.dtype(object)
+        self.rows += other.rows
+        self.nulls += other.nulls
+        for bound, pick in (('min', min), ('max', max)):
+            mine, theirs = getattr(self, bound), getattr(other, bound)
+            try:
+                setattr(self, bound, theirs if mine is None else mine if theirs is None else pick(mine, theirs))
+            except TypeError:
+                setattr(self, bound, None)
+        self.sum += other.sum
+        self.sumsq += other.sumsq
+        if self.exact and other.exact:
+            self._track(list(other.distinct))
+        else:
+            self.distinct, self.exact = {}, False
+        self.hll.merge(other.hll)
+        self.top.merge(other.top)
+        self.digest.merge(other.digest)
+        return self
+
+    @property
+    def count(self):
+        return self.rows - self.nulls
+
+    def nunique(self):
+        """Distinct non-missing values: exact while few, HyperLogLog estimate otherwise."""
+        if self.exact:
+            return sum(1 for value in self.distinct if value is not None)
+        return self.hll.estimate()
+
+    def unique(self):
+        """Distinct values in first-seen order (like Series.unique), or None when too many to track."""
+        if not self.exact:
+            return None
+        return pd.Series([np.nan if value is None else value for value in self.distinct]).to_numpy()
+
+
+class Profile:
+    """Profiles of all columns of a dataset, plus a few sample rows; mergeable."""
+
+    def __init__(self):
+        self.rows = 0
+        self.columns = {}
+        self.head = None
+
+    def update(self, chunk):
+        if self.head is None:
+            self.head = chunk.head()
+        elif len(self.head) < 5:
+            self.head = pd.concat([self.head, chunk.head(5 - len(self.head))])
+        self.rows += len(chunk)
+        for col in chunk.columns:
+            if col not in self.columns:
+                self.columns[col] = ColumnProfile(chunk[col].dtype)
+                self.columns[col].rows = self.rows - len(chunk)  # missing in the earlier chunks
+                self.columns[col].nulls = self.columns[col].rows
+            self.columns[col].update(chunk[col])
+        for col, profile in self.columns.items():
+            if col not in chunk.columns:
+                profile.rows += len(chunk)
+                profile.nulls += len(chunk)
+        return self
+
+    def merge(self, other):
+        if self.head is None:
+            self.head = other.head
+        elif other.head is not None and len(self.head) < 5:
+            self.head = pd.concat([self.head, other.head.head(5 - len(self.head))])
+        for col, profile in self.columns.items():
+            if col not in other.columns:
+                profile.rows += other.rows
+                profile.nulls += other.rows
+        for col, profile in other.columns.items():
+            if col not in self.columns:
+                profile.rows += self.rows
+                profile.nulls += self.rows
+                self.columns[col] = profile
+            else:
+                self.columns[col].merge(profile)
+        self.rows += other.rows
+        return self
+
+    @property
+    def dtypes(self):
+        return pd.Series({col: profile.dtype for col, profile in self.columns.items()}, dtype=object)
+
+    def describe(self):
+        """Summary table in the layout of DataFrame.describe(include='all'), from the sketches."""
+        stats = {}
+        for col, p in self.columns.items():
+            top, freq = p.top.top()
+            row = {'count': float(p.count), 'unique': np.nan, 'top': np.nan, 'freq': np.nan}
+            if p.numeric and p.count:
+                mean = p.sum / p.count
+                var = (p.sumsq - p.count * mean ** 2) / (p.count - 1) if p.count > 1 else np.nan
+                row.update({'mean': mean, 'std': np.sqrt(max(var, 0)) if p.count > 1 else np.nan, 'min': p.min,
+                            '25%': p.digest.quantile(0.25, p.min, p.max), '50%': p.digest.quantile(0.5, p.min, p.max),
+                            '75%': p.digest.quantile(0.75, p.min, p.max), 'max': p.max})
+            elif not p.numeric:
+                row.update({'unique': p.nunique(), 'top': top, 'freq': freq})
+            stats[col] = row
+        index = ['count', 'unique', 'top', 'freq', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+        table = pd.DataFrame(stats, index=index)
+        return table.dropna(how='all')
+
+
+def profile_chunks(chunks):
+    profile = Profile()
+    for chunk in chunks:
+        profile.update(chunk)
+    return profile
+
+
+def profile_file(path, chunksize=CHUNK_ROWS, **read_kwargs):
+    """Profile one CSV file in a single streaming pass; memory is bounded by the chunk size."""
+    return profile_chunks(pd.read_csv(path, chunksize=chunksize, **read_kwargs))
+
+
+def _profile_task(task):
+    path, chunksize, read_kwargs = task
+    return profile_file(path, chunksize, **read_kwargs)
+
+
+def profile_dir(data_dir, recursive=True, max_workers=None, chunksize=CHUNK_ROWS, **read_kwargs):
+    """Profile every CSV file of a directory in parallel processes and merge the results in file order."""
+    files = list_csv_files(data_dir, recursive=recursive)
+    profile = Profile()
+    if not files:
+        return profile
+    tasks = [(file, chunksize, read_kwargs) for file in files]
+    with ProcessPoolExecutor(max_workers=max_workers or min(len(files), os.cpu_count() or 1)) as executor:
+        for part in executor.map(_profile_task, tasks):
+            profile.merge(part)
+    return profile
+
+
+def print_column_report(profile, sample_below=20, sample_size=10):
+    """Unique count per column, with sample values for low-cardinality columns (analyze.py)."""
+    for col, p in profile.columns.items():
+        unique_values = p.nunique()
+        print(f"Column: {col}, Unique Values: {unique_values}")
+        if unique_values < sample_below:  # If fewer than 20 unique values, display them
+            print(f"Sample values for {col}: {p.unique()[:sample_size]}")
+        print("-" * 50)
+
+
+def print_inspection(profile):
+    """Columns, sample rows, dtypes and summary statistics of a profile (inspect_data.py)."""
+    print("Columns in the dataset:")
+    print(pd.Index(list(profile.columns)))
+    print("\nSample data:")
+    print(profile.head)
+    print("\nData types of columns:")
+    print(profile.dtypes)
+    print("\nSummary statistics:")
+    print(profile.describe())
@@ -1,26 +1,49 @@
 import streamlit as st
 import plotly.graph_objects as go
 import plotly.express as px
+import metrics_store
 
+# Roll up any new sales files, then read the rollups once per data version
+@st.cache_data(ttl=60)
+def refresh_metrics():
+    metrics_store.ingest_dir()
+    return metrics_store.version()
+
+@st.cache_data
+def load_totals(version, by=None):
+    return metrics_store.totals(metrics_store.load_rollups(), by=by)
+
+@st.cache_data
+def load_daily(version):
+    return metrics_store.query(metrics_store.load_rollups(), freq='D')
+
+version = refresh_metrics()
+per_aggregator = load_totals(version, by='aggregator')
+overall = load_totals(version)
+daily = load_daily(version)
 
 # Title of the dashboard
 st.title('Streamlit Dashboard')
 
+if per_aggregator.empty:
+    st.info('No sales data has been rolled up yet.')
+    st.stop()
+
 # Bar Chart
-st.header('Bar Graph Example')
+st.header('Sales per Aggregator')
 
 # Data for the bar chart
-categories = ['A', 'B', 'C', 'D']
-values = [10, 24, 36, 20]
+categories = per_aggregator['aggregator'].tolist()
+values = per_aggregator['sales'].round(2).tolist()
 
 # Create a dynamic bar chart using plotly
 bar_chart = go.Figure([go.Bar(x=categories, y=values, marker_color='lightblue')])
 
 # Customize layout to make it more appealing with animation and layout tweaks
 bar_chart.update_layout(
-    title="Bar Chart Example",
-    xaxis_title="Categories",
-    yaxis_title="Values",
+    title="Sales per Aggregator",
+    xaxis_title="Aggregator",
+    yaxis_title="Sales",
     template="plotly_dark",  
     height=500,
     width=700,
@@ -30,19 +53,23 @@ bar_chart.update_layout(
 # Display the bar chart using Streamlit
 st.plotly_chart(bar_chart)
 
+# Daily sales trend
+st.header('Daily Sales')
+st.line_chart(daily.set_index('period')['sales'])
+
 # Pie Chart
-st.header('Pie Chart Example')
+st.header('Orders per Aggregator')
 
 # Data for pie chart
-labels = ['Category A', 'Category B', 'Category C', 'Category D']
-sizes = [10, 24, 36, 20]
-colors = ['#ff9999', '#66b3ff', '#99ff99', '#ffcc99']
+labels = per_aggregator['aggregator'].tolist()
+sizes = per_aggregator['orders'].tolist()
+colors = (['#ff9999', '#66b3ff', '#99ff99', '#ffcc99'] * len(labels))[:len(labels)]
 
 # Create pie chart with a small animation
 pie_chart = go.Figure(go.Pie(labels=labels, values=sizes, marker_colors=colors, hole=0.3))
 
 # Add animation for pie chart
-pie_chart.update_traces(pull=[0.1, 0, 0, 0], rotation=90, textinfo="percent+label")
+pie_chart.update_traces(pull=[0.1] + [0] * (len(labels) - 1), rotation=90, textinfo="percent+label")
 pie_chart.update_layout(transition={'duration': 500})
 
 # Display the pie chart using Streamlit
@@ -72,18 +99,23 @@ def circular_progress_chart(percentage, label):
 
 
 # Create a column layout to align progress circles horizontally
-st.header('Progress Circles (Circular)')
+st.header('Order Health')
+rates = overall.iloc[0].fillna(0)
 
 # Create three columns to place the charts side by side
 col1, col2, col3, col4 = st.columns(4)
 
 # Display progress charts in each column
 with col1:
-    st.plotly_chart(circular_progress_chart(25, "Percentage 1"), use_container_width=True)
+    st.caption('Cancelled orders')
+    st.plotly_chart(circular_progress_chart(round(rates['cancellation_rate'], 1), "Cancelled"), use_container_width=True)
 with col2:
-    st.plotly_chart(circular_progress_chart(50, "Percentage 2"), use_container_width=True)
+    st.caption('Discount rate')
+    st.plotly_chart(circular_progress_chart(round(rates['discount_rate'], 1), "Discount"), use_container_width=True)
 with col3:
-    st.plotly_chart(circular_progress_chart(75, "Percentage 3"), use_container_width=True)
+    st.caption('Prepared in < 10 mins')
+    st.plotly_chart(circular_progress_chart(round(rates['prep_0_10_share'], 1), "Prep < 10"), use_container_width=True)
 with col4:
-    st.plotly_chart(circular_progress_chart(100, "Percentage 4"), use_container_width=True)
+    st.caption('Prepared in > 60 mins')
+    st.plotly_chart(circular_progress_chart(round(rates['prep_60_plus_share'], 1), "Prep > 60"), use_container_width=True)
 
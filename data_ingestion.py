@@ -1,28 +1,34 @@
 import os
-import pandas as pd
+from data_loader import load_csv_dir
 
 # Define the path to the dataset
 DATA_DIR = './PS_DATA/'
 
 # Function to read CSV files from different folders
 def load_data(file_path):
-    df = pd.DataFrame()
-    for root, dirs, files in os.walk(file_path):
-        for file in files:
-            if file.endswith('.csv'):
-                file_path = os.path.join(root, file)
-                temp_df = pd.read_csv(file_path)
-                df = pd.concat([df, temp_df], ignore_index=True)
-    return df
+    return load_csv_dir(file_path)
+
+# Output Ref folder of each category
+CATEGORIES = {
+    'Aggregators': 'Output Ref/Aggregators',
+    'Inventory': 'Output Ref/Inventory',
+    'Department': 'Output Ref/Departments',
+    'Sales': 'Output Ref/Sales',
+}
 
 # Load data from each category
-aggregators_data = load_data(os.path.join(DATA_DIR, 'Output Ref/Aggregators'))
-inventory_data = load_data(os.path.join(DATA_DIR, 'Output Ref/Inventory'))
-department_data = load_data(os.path.join(DATA_DIR, 'Output Ref/Departments'))
-sales_data = load_data(os.path.join(DATA_DIR, 'Output Ref/Sales'))
+def load_all(data_dir=DATA_DIR):
+    return {name: load_data(os.path.join(data_dir, folder)) for name, folder in CATEGORIES.items()}
+
+# Rows, columns and first rows of each dataset
+def summarize_datasets(data_dir=DATA_DIR):
+    return {name: {'rows': len(df), 'columns': list(df.columns), 'head': df.head()}
+            for name, df in load_all(data_dir).items()}
+
+def main():
+    # View the data structure for each dataset
+    for name, summary in summarize_datasets().items():
+        print(f"{name} Data:", summary['head'])
 
-# View the data structure for each dataset
-print("Aggregators Data:", aggregators_data.head())
-print("Inventory Data:", inventory_data.head())
-print("Department Data:", department_data.head())
-print("Sales Data:", sales_data.head())
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+import os
+import glob
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from schema_inference import infer_schema, read_dtypes, apply_schema
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # the columnar cache is optional
+    feather = None
+
+# Columnar copies of already parsed CSV directories live here
+CACHE_DIR = os.getenv('DATA_CACHE_DIR', './PS_DATA/.cache')
+
+
+def list_csv_files(data_dir, recursive=True):
+    """Sorted list of the CSV files under a directory."""
+    if recursive:
+        files = [os.path.join(root, file) for root, _, names in os.walk(data_dir)
+                 for file in names if file.endswith('.csv')]
+    else:
+        files = [os.path.join(data_dir, file) for file in os.listdir(data_dir) if file.endswith('.csv')]
+    return sorted(files)
+
+
+def _digest(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+
+def _cache_paths(data_dir, files, read_kwargs):
+    # One cache file per directory and read options, named after the sources' mtime+size
+    prefix = _digest([os.path.abspath(data_dir), read_kwargs])
+    signature = _digest([(f, os.stat(f).st_mtime_ns, os.stat(f).st_size) for f in files])
+    return prefix, os.path.join(CACHE_DIR, f'{prefix}-{signature}.feather')
+
+
+def load_schema(data_dir, files, **read_kwargs):
+    """Dtype map of a dataset, inferred once from samples and stored next to the cache."""
+    prefix, cache_path = _cache_paths(data_dir, files, read_kwargs)
+    schema_path = cache_path[:-len('.feather')] + '.schema.json'
+    if os.path.exists(schema_path):
+        with open(schema_path) as f:
+            return json.load(f)
+    schema = infer_schema(files, **read_kwargs)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    for stale in glob.glob(os.path.join(CACHE_DIR, f'{prefix}-*.schema.json')):
+        os.remove(stale)
+    with open(schema_path, 'w') as f:
+        json.dump(schema, f, indent=2)
+    return schema
+
+
+def _read_csv(file, read_kwargs, schema=None):
+    if not schema:
+        return pd.read_csv(file, **read_kwargs)
+    df = pd.read_csv(file, dtype=read_dtypes(schema), **read_kwargs)
+    return apply_schema(df, schema)
+
+
+def _concat(frames):
+    # Give categorical columns the same categories in every frame so concat keeps them categorical
+    for col in frames[0].columns:
+        if all(col in frame.columns and isinstance(frame[col].dtype, pd.CategoricalDtype) for frame in frames):
+            categories = pd.api.types.union_categoricals([frame[col] for frame in frames]).categories
+            for frame in frames:
+                frame[col] = frame[col].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _write_cache(df, prefix, cache_path):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    for stale in glob.glob(os.path.join(CACHE_DIR, f'{prefix}-*.feather')):
+        os.remove(stale)
+    try:
+        feather.write_feather(df, cache_path, compression='uncompressed')
+    except Exception as e:  # e.g. columns mixing numbers and text
+        print(f"Could not cache {cache_path}: {e}")
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+
+
+def load_csv_dir(data_dir, recursive=True, use_cache=True, infer_types=True, max_workers=None, **read_kwargs):
+    """Load every CSV file under `data_dir` into one DataFrame.
+
+    Files are parsed in parallel and concatenated once. With `infer_types` the
+    columns get the compact dtypes of the dataset's dtype map (categoricals,
+    downcast numbers, datetimes) while reading. The result is cached as an
+    uncompressed Feather file keyed on the sources' mtime and size, so later runs
+    memory-map it instead of parsing the CSVs again.
+    """
+    files = list_csv_files(data_dir, recursive=recursive)
+    if not files:
+        return pd.DataFrame()
+
+    use_cache = use_cache and feather is not None
+    if use_cache:
+        prefix, cache_path = _cache_paths(data_dir, files, dict(read_kwargs, infer_types=infer_types))
+        if os.path.exists(cache_path):
+            return feather.read_table(cache_path, memory_map=True).to_pandas()
+
+    schema = load_schema(data_dir, files, **read_kwargs) if infer_types else None
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        frames = list(executor.map(lambda file: _read_csv(file, read_kwargs, schema), files))
+    frames = [frame for frame in frames if not frame.empty]
+    df = _concat(frames) if frames else pd.DataFrame()
+
+    if use_cache and not df.empty:
+        _write_cache(df, prefix, cache_path)
+    return df
+
+
+def iter_csv_dir(data_dir, chunksize=100_000, recursive=True, **read_kwargs):
+    """Yield the CSV files under `data_dir` as DataFrame chunks, file by file, in sorted order.
+
+    Peak memory is one chunk, so directories larger than RAM can be scanned.
+    """
+    for file in list_csv_files(data_dir, recursive=recursive):
+        for chunk in pd.read_csv(file, chunksize=chunksize, **read_kwargs):
+            yield chunk
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+from rule_engine import resolve_columns, STAFF_DISCOUNT_PCT, AGGREGATOR_DISCOUNT_PCT
+
+# Discount percentage histogram used as a mergeable quantile sketch: 0.5% bins from 0 to 100%
+BIN_WIDTH = 0.5
+N_BINS = int(100 / BIN_WIDTH) + 1  # the last bin also holds everything above 100%
+BIN_COLUMNS = [f'bin_{i}' for i in range(N_BINS)]
+
+# Running aggregates per group; all of them combine by addition
+SUM_COLUMNS = ['bills', 'discount', 'total', 'pct_sum', 'pct_sumsq']
+
+# Groups need this many bills before they can be flagged
+MIN_BILLS = 20
+
+# Robust z-score (median/MAD across groups) above which a group is an outlier
+OUTLIER_Z = 3.5
+
+# Fixed limits from the insight rules, per grouping level
+LEVEL_LIMITS = {'staff': STAFF_DISCOUNT_PCT, 'aggregator': AGGREGATOR_DISCOUNT_PCT}
+
+
+def _discounts(df, cols):
+    """Discount amount, bill total and discount percentage per bill."""
+    total = pd.to_numeric(df[cols['total']], errors='coerce') if 'total' in cols else pd.Series(np.nan, index=df.index)
+    if 'discount' in cols:
+        discount = pd.to_numeric(df[cols['discount']], errors='coerce')
+        pct = discount / total.where(total != 0) * 100
+    else:
+        pct = pd.to_numeric(df[cols['discount_pct']], errors='coerce')
+        discount = pct * total / 100
+    return discount, total, pct
+
+
+def partition_stats(df, level):
+    """Mergeable discount aggregates per value of `level` (e.g. 'staff') for one partition.
+
+    One sort-based groupby computes the sums and the histogram of discount
+    percentages, so the cost is a sort of the partition, with no loop over groups.
+    """
+    cols = resolve_columns(df.columns)
+    if level not in cols or not ({'discount', 'discount_pct'} & cols.keys()):
+        return empty_stats()
+    discount, total, pct = _discounts(df, cols)
+    valid = pct.notna()
+    frame = pd.DataFrame({
+        'group': df[cols[level]].astype(str).str.strip()[valid],
+        'bills': 1,
+        'discount': discount[valid].fillna(0),
+        'total': total[valid].fillna(0),
+        'pct_sum': pct[valid],
+        'pct_sumsq': pct[valid] ** 2,
+        'bin': np.clip(pct[valid] // BIN_WIDTH, 0, N_BINS - 1).astype(np.int64),
+    }).sort_values('group', kind='mergesort')
+
+    sums = frame.groupby('group', sort=False)[SUM_COLUMNS].sum()
+    bins = frame.groupby(['group', 'bin'], sort=False).size().unstack(fill_value=0)
+    bins = bins.reindex(columns=range(N_BINS), fill_value=0)
+    bins.columns = BIN_COLUMNS
+    return sums.join(bins).fillna(0)
+
+
+def empty_stats():
+    return pd.DataFrame(columns=SUM_COLUMNS + BIN_COLUMNS, dtype=float).rename_axis('group')
+
+
+def merge_stats(*parts):
+    """Combine partition aggregates (e.g. one per day) without rescanning their rows."""
+    parts = [part for part in parts if not part.empty]
+    if not parts:
+        return empty_stats()
+    return pd.concat(parts).groupby(level=0, sort=True).sum()
+
+
+def daily_stats(df, level, date_col=None):
+    """Aggregates per day, keyed by date, ready to be stored and merged later."""
+    cols = resolve_columns(df.columns)
+    date_col = date_col or cols.get('date')
+    days = pd.to_datetime(df[date_col], errors='coerce').dt.normalize()
+    return {day.date(): partition_stats(part, level) for day, part in df.groupby(days, sort=True)}
+
+
+def save_stats(stats, path):
+    stats.reset_index().to_parquet(path, index=False)
+
+
+def load_stats(path):
+    return pd.read_parquet(path).set_index('group')
+
+
+def quantiles(stats, q):
+    """Approximate discount percentage quantile per group from the histograms (bin midpoints)."""
+    counts = stats[BIN_COLUMNS].to_numpy()
+    cumulative = counts.cumsum(axis=1)
+    targets = np.ceil(q * cumulative[:, -1]).clip(min=1)
+    bins = (cumulative < targets[:, None]).sum(axis=1)
+    return pd.Series((bins + 0.5) * BIN_WIDTH, index=stats.index).where(cumulative[:, -1] > 0)
+
+
+def summarize(stats):
+    """Per-group discount share, mean/std of the per-bill percentage and p50/p90."""
+    bills = stats['bills'].where(stats['bills'] > 0)
+    mean = stats['pct_sum'] / bills
+    variance = (stats['pct_sumsq'] / bills - mean ** 2).clip(lower=0) * bills / (bills - 1).where(bills > 1)
+    return pd.DataFrame({
+        'bills': stats['bills'].astype(int),
+        'discount_pct': stats['discount'] / stats['total'].where(stats['total'] != 0) * 100,
+        'mean_pct': mean,
+        'std_pct': np.sqrt(variance),
+        'p50_pct': quantiles(stats, 0.5),
+        'p90_pct': quantiles(stats, 0.9),
+    })
+
+
+def flag_outliers(stats, limit=None, min_bills=MIN_BILLS, z_threshold=OUTLIER_Z):
+    """Groups whose discount share is a robust outlier among their peers, or above `limit` percent."""
+    summary = summarize(stats)
+    summary = summary[summary['bills'] >= min_bills]
+    share = summary['discount_pct']
+    median = share.median()
+    mad = (share - median).abs().median()
+    summary['robust_z'] = 0.6745 * (share - median) / mad if mad else np.nan
+    flagged = summary['robust_z'] > z_threshold
+    if limit is not None:
+        flagged |= share > limit
+    return summary[flagged].sort_values('discount_pct', ascending=False)
+
+
+def detect_discount_outliers(df, levels=('staff', 'aggregator'), **params):
+    """Discount outliers per staff and per aggregator for a full frame, keyed by level."""
+    return {level: flag_outliers(partition_stats(df, level), LEVEL_LIMITS.get(level), **params)
+            for level in levels}
@@ -0,0 +1,67 @@
+import joblib
+import pandas as pd
+
+
+class CategoryEncoder:
+    """Maps text/date columns to integer codes that stay the same across calls.
+
+    A value's code is its position in the column's category index. `partial_fit`
+    only appends values it has not seen before, so codes already handed out never
+    change and new data can be encoded without reprocessing the history.
+    """
+
+    def __init__(self, categories=None):
+        self.categories = dict(categories or {})
+
+    @staticmethod
+    def _columns(df):
+        return df.select_dtypes(include=['object', 'string', 'category', 'datetime']).columns
+
+    @staticmethod
+    def _values(values, cats):
+        if cats.dtype.kind == 'M':
+            return pd.to_datetime(values, errors='coerce')
+        return values
+
+    def fit(self, df, columns=None):
+        self.categories = {}
+        return self.partial_fit(df, columns)
+
+    def partial_fit(self, df, columns=None):
+        """Add the unseen values of a chunk to the end of each category index."""
+        for col in (columns if columns is not None else self._columns(df)):
+            new = df[col].astype('category').cat.categories
+            known = self.categories.get(col)
+            if known is None:
+                self.categories[col] = new
+            else:
+                new = self._values(pd.Series(new), known)
+                unseen = new[~pd.Index(new).isin(known) & pd.notna(new)]
+                if len(unseen):
+                    self.categories[col] = known.append(pd.Index(unseen))
+        return self
+
+    def transform(self, df):
+        """Replace values by their codes; unseen and missing values get -1."""
+        df = df.copy()
+        for col, cats in self.categories.items():
+            if col in df.columns:
+                df[col] = cats.get_indexer(pd.Index(self._values(df[col], cats)))
+        return df
+
+    def fit_transform(self, df, columns=None):
+        return self.fit(df, columns).transform(df)
+
+    def transform_chunks(self, chunks, update=False):
+        """Encode an iterator of chunks, optionally learning new values on the way."""
+        for chunk in chunks:
+            if update:
+                self.partial_fit(chunk)
+            yield self.transform(chunk)
+
+    def save(self, path):
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path):
+        return joblib.load(path)
@@ -0,0 +1,101 @@
+import os
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# SQLite database holding all feedback; the legacy feedback.csv is imported into it once
+FEEDBACK_DB = os.getenv('FEEDBACK_DB', 'feedback.sqlite')
+LEGACY_CSV = 'feedback.csv'
+
+FEEDBACK_COLUMNS = ['Suggestion_ID', 'Rating', 'Comment']
+
+# Buffered feedback is written in one transaction once this many entries are pending
+BATCH_SIZE = 50
+
+
+class FeedbackStore:
+    """Append-only feedback storage in SQLite (WAL mode).
+
+    Suggestion IDs come from the table's AUTOINCREMENT key, so allocating one is
+    part of the insert itself: O(1) and safe across processes. Use `add` for one
+    entry, `add_many` or `buffer` + `flush` to write many in one transaction.
+    """
+
+    def __init__(self, path=FEEDBACK_DB, legacy_csv=LEGACY_CSV):
+        self.path = path
+        self._pending = []
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS feedback ("
+                         "suggestion_id INTEGER PRIMARY KEY AUTOINCREMENT, rating INTEGER, comment TEXT, created REAL)")
+            empty = conn.execute("SELECT NOT EXISTS (SELECT 1 FROM feedback)").fetchone()[0]
+        if empty and legacy_csv and os.path.isfile(legacy_csv):
+            self._import_csv(legacy_csv)
+
+    @contextmanager
+    def _connect(self):
+        # Commits (or rolls back) the transaction and always closes the connection
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _import_csv(self, path):
+        # Keep the IDs already handed out; AUTOINCREMENT continues after the largest one
+        import pandas as pd
+        legacy = pd.read_csv(path)
+        if legacy.empty or 'Suggestion_ID' not in legacy.columns:
+            return
+        rows = [(int(row.Suggestion_ID), row.Rating, None if pd.isna(row.Comment) else row.Comment, None)
+                for row in legacy.itertuples(index=False)]
+        with self._connect() as conn:
+            conn.executemany("INSERT OR IGNORE INTO feedback VALUES (?, ?, ?, ?)", rows)
+
+    def add(self, rating, comment):
+        """Store one entry and return its suggestion ID."""
+        with self._connect() as conn:
+            cursor = conn.execute("INSERT INTO feedback (rating, comment, created) VALUES (?, ?, ?)",
+                                  (rating, comment, time.time()))
+            return cursor.lastrowid
+
+    def add_many(self, entries):
+        """Store (rating, comment) pairs in one transaction; returns how many were written."""
+        now = time.time()
+        rows = [(rating, comment, now) for rating, comment in entries]
+        with self._connect() as conn:
+            conn.executemany("INSERT INTO feedback (rating, comment, created) VALUES (?, ?, ?)", rows)
+        return len(rows)
+
+    def buffer(self, rating, comment, batch_size=BATCH_SIZE):
+        """Queue an entry, writing the queue once `batch_size` entries are pending."""
+        with self._lock:
+            self._pending.append((rating, comment))
+            if len(self._pending) < batch_size:
+                return 0
+            pending, self._pending = self._pending, []
+        return self.add_many(pending)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        return self.add_many(pending) if pending else 0
+
+    def to_frame(self):
+        import pandas as pd
+        with self._connect() as conn:
+            df = pd.read_sql_query("SELECT suggestion_id, rating, comment FROM feedback ORDER BY suggestion_id", conn)
+        df.columns = FEEDBACK_COLUMNS
+        return df
+
+    def export(self, path):
+        """Write all feedback to CSV, or Parquet when the path ends in .parquet."""
+        df = self.to_frame()
+        if path.endswith('.parquet'):
+            df.to_parquet(path, index=False)
+        else:
+            df.to_csv(path, index=False)
+        return len(df)
@@ -0,0 +1,222 @@
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from rule_engine import resolve_columns
+from calendar_features import islamic_regressors
+
+# Levels forecast separately, as canonical column names (see rule_engine.COLUMN_ALIASES)
+SERIES_LEVELS = ['outlet', 'aggregator', 'department']
+
+# Series with fewer days than this are not fitted (Prophet needs at least two)
+MIN_SERIES_DAYS = 2
+
+FORECAST_OUTPUT = os.getenv('FORECAST_OUTPUT', './PS_DATA/Output Ref/forecasts.parquet')
+
+# Fitted parameters, last-seen date and content hash per series, used by refresh_forecasts
+FORECAST_STATE = os.getenv('FORECAST_STATE', './PS_DATA/.cache/forecast_state.json')
+
+FORECAST_COLUMNS = ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
+
+
+def daily_series(df, date_col='Date', value_col='Total_Sales'):
+    """Aggregate a frame into a Prophet series with 'ds' and 'y' columns."""
+    series = df.groupby(date_col, sort=True)[value_col].sum().reset_index()
+    series.columns = ['ds', 'y']
+    return series
+
+
+def build_series(sales_df, levels=SERIES_LEVELS, date_col='Date', value_col='Total_Sales'):
+    """Split the sales data into one daily series per level value, plus the overall one.
+
+    Returns a dict mapping (level, value) to a 'ds'/'y' frame. Levels whose column
+    is not in the data are skipped.
+    """
+    cols = resolve_columns(sales_df.columns)
+    df = sales_df[[date_col, value_col] + [cols[level] for level in levels if level in cols]].copy()
+    df[date_col] = pd.to_datetime(df[date_col], errors='coerce').dt.normalize()
+    df = df.dropna(subset=[date_col])
+
+    series = {('total', 'all'): daily_series(df, date_col, value_col)}
+    for level in levels:
+        if level not in cols:
+            continue
+        # One sort-based groupby per level rather than a filter per value
+        grouped = df.groupby([cols[level], date_col], sort=True, observed=True)[value_col].sum()
+        for value, part in grouped.groupby(level=0, sort=False):
+            part = part.reset_index(level=0, drop=True).reset_index()
+            part.columns = ['ds', 'y']
+            series[(level, str(value))] = part
+    return series
+
+
+def series_hash(series):
+    """Content hash of a series (with its regressors), used to fit identical series only once."""
+    digest = hashlib.sha256(','.join(series.columns).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(series, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+def warm_start_params(model):
+    """Fitted Prophet parameters in the form accepted by Prophet.fit(init=...)."""
+    params = {name: float(model.params[name][0][0]) for name in ('k', 'm', 'sigma_obs')}
+    params.update({name: model.params[name][0].tolist() for name in ('delta', 'beta')})
+    return params
+
+
+def fit_prophet(series, periods=30, init=None):
+    """Fit Prophet on one series, optionally warm-started from previous parameters.
+
+    Columns besides 'ds' and 'y' must be calendar_features.islamic_regressors
+    columns; they are added as regressors and computed for the future dates too.
+    Returns the forecast for `periods` days past the end and the fitted parameters.
+    Falls back to a cold fit when the previous parameters no longer fit the model
+    (e.g. a seasonality was switched on by the longer history).
+    """
+    from prophet import Prophet
+    if init:
+        init = {name: np.asarray(value) if isinstance(value, list) else value for name, value in init.items()}
+    regressors = [col for col in series.columns if col not in ('ds', 'y')]
+
+    def new_model():
+        model = Prophet()
+        for name in regressors:
+            model.add_regressor(name)
+        return model
+
+    model = new_model()
+    try:
+        model.fit(series, init=init) if init else model.fit(series)
+    except Exception:
+        if not init:
+            raise
+        model = new_model()
+        model.fit(series)
+    future = model.make_future_dataframe(periods=periods)
+    if regressors:
+        future = future.join(islamic_regressors(future['ds'])[regressors])
+    return model.predict(future)[FORECAST_COLUMNS], warm_start_params(model)
+
+
+def fit_forecast(series, periods=30):
+    """Fit Prophet on one series and forecast `periods` days past its end."""
+    return fit_prophet(series, periods)[0]
+
+
+def _fit_task(task):
+    digest, series, periods, init = task
+    try:
+        return digest, fit_prophet(series, periods, init), None
+    except Exception as e:  # one bad series should not stop the others
+        return digest, None, str(e)
+
+
+def _fit_distinct(series, periods, max_workers, min_days, inits=None):
+    """Fit each distinct series once across a process pool.
+
+    Returns the keys sharing each content hash and the (forecast, params) per hash.
+    """
+    tasks, keys_by_hash = {}, {}
+    for key, part in series.items():
+        if part['y'].notna().sum() < min_days:
+            continue
+        digest = series_hash(part)
+        keys_by_hash.setdefault(digest, []).append(key)
+        tasks.setdefault(digest, (digest, part, periods, (inits or {}).get(key)))
+
+    fitted = {}
+    if tasks:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for digest, result, error in executor.map(_fit_task, tasks.values()):
+                if error is not None:
+                    print(f"Forecast failed for {keys_by_hash[digest]}: {error}")
+                else:
+                    fitted[digest] = result
+        print(f"Fitted {len(tasks)} distinct series for {sum(map(len, keys_by_hash.values()))} keys.")
+    return keys_by_hash, fitted
+
+
+def forecast_many(series, periods=30, max_workers=None, min_days=MIN_SERIES_DAYS):
+    """Fit many series in parallel processes, each distinct series only once.
+
+    Returns a dict mapping every key of `series` that could be fitted to its forecast.
+    """
+    keys_by_hash, fitted = _fit_distinct(series, periods, max_workers, min_days)
+    return {key: fitted[digest][0] for digest, keys in keys_by_hash.items() if digest in fitted for key in keys}
+
+
+def combine_forecasts(forecasts):
+    """All forecasts in one long frame with 'level' and 'series' columns."""
+    frames = [forecast.assign(level=level, series=value) for (level, value), forecast in forecasts.items()]
+    if not frames:
+        return pd.DataFrame(columns=['level', 'series'] + FORECAST_COLUMNS)
+    combined = pd.concat(frames, ignore_index=True)
+    combined['level'] = combined['level'].astype('category')
+    combined['series'] = combined['series'].astype('category')
+    return combined[['level', 'series'] + FORECAST_COLUMNS]
+
+
+def run_forecasts(sales_df, periods=30, output_path=FORECAST_OUTPUT, max_workers=None, **kwargs):
+    """Forecast every outlet/aggregator/department series and write them to one Parquet file."""
+    forecasts = forecast_many(build_series(sales_df, **kwargs), periods=periods, max_workers=max_workers)
+    combined = combine_forecasts(forecasts)
+    if output_path:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        combined.to_parquet(output_path, index=False)
+    return combined
+
+
+def _state_key(key):
+    return f"{key[0]}:{key[1]}"
+
+
+def refresh_forecasts(sales_df, periods=30, output_path=FORECAST_OUTPUT, state_path=FORECAST_STATE,
+                      max_workers=None, **kwargs):
+    """Refresh the forecasts, refitting only the series whose data changed.
+
+    Unchanged series keep their forecast from the previous output. Changed series
+    are warm-started from their previously fitted parameters, which converges in
+    far fewer iterations than a cold fit.
+    """
+    series = build_series(sales_df, **kwargs)
+    state = {}
+    if state_path and os.path.exists(state_path):
+        with open(state_path) as f:
+            state = json.load(f)
+    previous = pd.read_parquet(output_path) if output_path and os.path.exists(output_path) else None
+
+    forecasts, changed, inits = {}, {}, {}
+    for key, part in series.items():
+        entry = state.get(_state_key(key))
+        if (entry and previous is not None and entry['hash'] == series_hash(part)
+                and entry['periods'] == periods):
+            old = previous[(previous['level'] == key[0]) & (previous['series'] == key[1])]
+            if not old.empty:
+                forecasts[key] = old[FORECAST_COLUMNS].reset_index(drop=True)
+                continue
+        changed[key] = part
+        if entry:
+            inits[key] = entry['params']
+
+    keys_by_hash, fitted = _fit_distinct(changed, periods, max_workers, MIN_SERIES_DAYS, inits)
+    for digest, keys in keys_by_hash.items():
+        if digest not in fitted:
+            continue
+        forecast, params = fitted[digest]
+        for key in keys:
+            forecasts[key] = forecast
+            state[_state_key(key)] = {'hash': digest, 'periods': periods, 'params': params,
+                                      'last_date': str(series[key]['ds'].max().date())}
+    print(f"Refreshed {len(changed)} changed series, reused {len(forecasts) - len(changed)}.")
+
+    combined = combine_forecasts(forecasts)
+    if output_path:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        combined.to_parquet(output_path, index=False)
+    if state_path:
+        os.makedirs(os.path.dirname(state_path) or '.', exist_ok=True)
+        with open(state_path, 'w') as f:
+            json.dump(state, f)
+    return combined
@@ -0,0 +1,93 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+def cache_key(*parts):
+    """Content hash of the parts that determine an LLM response."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class InsightCache:
+    """Two-level cache for LLM responses: an in-memory LRU over a SQLite store.
+
+    Entries older than `ttl` seconds are treated as missing. The memory layer keeps
+    at most `memory_size` entries and the disk store at most `max_entries`, the
+    least recently used ones being evicted first.
+    """
+
+    def __init__(self, path, memory_size=256, max_entries=10000, ttl=7 * 24 * 3600):
+        self.path = path
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.memory_evictions = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS responses "
+                         "(key TEXT PRIMARY KEY, value TEXT, created REAL, used REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_used ON responses (used)")
+
+    @contextmanager
+    def _connect(self):
+        # Commits (or rolls back) the transaction and always closes the connection
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _remember(self, key, value, created):
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+            self.memory_evictions += 1
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[1] <= self.ttl:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self._memory.pop(key, None)
+            with self._connect() as conn:
+                row = conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None and now - row[1] <= self.ttl:
+                    conn.execute("UPDATE responses SET used = ? WHERE key = ?", (now, key))
+                    self._remember(key, row[0], row[1])
+                    self.hits += 1
+                    return row[0]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            with self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, value, now, now))
+                conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+                conn.execute("DELETE FROM responses WHERE key IN (SELECT key FROM responses "
+                             "ORDER BY used DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    def stats(self):
+        with self._lock:
+            with self._connect() as conn:
+                disk_entries = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {'hits': self.hits, 'misses': self.misses,
+                    'memory_entries': len(self._memory), 'memory_evictions': self.memory_evictions,
+                    'disk_entries': disk_entries}
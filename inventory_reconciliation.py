@@ -0,0 +1,196 @@
+import os
+import bisect
+import numpy as np
+import pandas as pd
+from rule_engine import resolve_columns, CONSUMPTION_RATIO
+from data_loader import load_csv_dir
+
+INVENTORY_DIR = os.getenv('INVENTORY_DIR', './PS_DATA/Output Ref/Inventory')
+
+# Reconciliation period: pandas offset alias ('D', 'W', 'M', ...)
+PERIOD = 'M'
+
+
+def _keys(cols, by_outlet=True):
+    return ['item'] + (['outlet'] if by_outlet and 'outlet' in cols else [])
+
+
+def _records(df, cols, quantity, by_outlet=True, freq=PERIOD):
+    """Quantity per item (and outlet) and period, sorted on the join keys."""
+    keys = _keys(cols, by_outlet)
+    frame = pd.DataFrame({key: df[cols[key]].astype(str).str.strip() for key in keys})
+    frame['period'] = pd.to_datetime(df[cols['date']], errors='coerce').dt.to_period(freq) \
+        if 'date' in cols else pd.Period('NaT', freq)
+    frame[quantity] = pd.to_numeric(df[cols[quantity]], errors='coerce')
+    frame = frame.dropna(subset=[quantity])
+    return frame.groupby(keys + ['period'], sort=True, dropna=False)[quantity].sum()
+
+
+def reconcile(purchases, consumption=None, freq=PERIOD, by_outlet=True, ratio=CONSUMPTION_RATIO):
+    """Purchased vs consumed quantity per item, outlet and period.
+
+    Purchases and consumption may come from separate frames or from the same one
+    (rows with both quantity columns). Both sides are aggregated into indexes
+    sorted on (item, outlet, period) and joined with a single merge join over the
+    sorted keys. Rows below `ratio` get low_consumption set.
+    """
+    consumption = purchases if consumption is None else consumption
+    purchase_cols, consumption_cols = resolve_columns(purchases.columns), resolve_columns(consumption.columns)
+    by_outlet = by_outlet and 'outlet' in purchase_cols and 'outlet' in consumption_cols
+    bought = _records(purchases, purchase_cols, 'purchased_quantity', by_outlet, freq)
+    used = _records(consumption, consumption_cols, 'consumed_quantity', by_outlet, freq)
+
+    # Both indexes are sorted and unique, so pandas joins them by merging, not hashing
+    joined = bought.to_frame().join(used.to_frame(), how='outer', sort=True).fillna(0)
+    joined['consumption_ratio'] = joined['consumed_quantity'] / joined['purchased_quantity'].where(
+        joined['purchased_quantity'] != 0)
+    joined['low_consumption'] = joined['consumption_ratio'] < ratio
+    return joined.reset_index()
+
+
+def _ns(dates):
+    return pd.to_datetime(pd.Series(dates)).to_numpy(dtype='datetime64[ns]').view('int64').tolist()
+
+
+class VendorHistory:
+    """Purchase history per item (date, vendor, price), sorted for binary-search lookups.
+
+    Each item has its own block of purchases sorted by date, kept as parallel
+    lists, so the purchase before a given date is found with bisect in O(log n)
+    and new rows are inserted into their item's block without touching the rest
+    of the history. The first purchase date of every (item, vendor) pair answers
+    "is this a new vendor" in O(1).
+    """
+
+    def __init__(self):
+        self.blocks = {}  # item -> ([dates in ns], [vendors], [prices]) sorted by date
+        self.first_seen = {}  # (item, vendor) -> first purchase date in ns
+        self.rows = 0
+
+    def __len__(self):
+        return self.rows
+
+    @staticmethod
+    def _purchases(df):
+        cols = resolve_columns(df.columns)
+        frame = pd.DataFrame({
+            'item': df[cols['item']].astype(str).str.strip(),
+            'date': pd.to_datetime(df[cols['date']], errors='coerce') if 'date' in cols else pd.NaT,
+            'vendor': df[cols['vendor']].astype(str).str.strip(),
+            'price': pd.to_numeric(df[cols['price']], errors='coerce') if 'price' in cols else np.nan,
+        })
+        return frame.dropna(subset=['date'])
+
+    def _insert(self, item, date, vendor, price):
+        # Returns the purchase just before this one (vendor, price) or None, and whether the vendor is new
+        dates, vendors, prices = self.blocks.setdefault(item, ([], [], []))
+        position = bisect.bisect_right(dates, date)
+        before = (vendors[position - 1], prices[position - 1]) if position else None
+        first = self.first_seen.get((item, vendor))
+        new_vendor = bool(dates) and dates[0] < date and (first is None or first > date)
+        dates.insert(position, date)
+        vendors.insert(position, vendor)
+        prices.insert(position, price)
+        if first is None or date < first:
+            self.first_seen[(item, vendor)] = date
+        return before, new_vendor
+
+    def _each(self, purchases):
+        return zip(purchases['item'].tolist(), _ns(purchases['date']),
+                   purchases['vendor'].tolist(), purchases['price'].tolist())
+
+    def add(self, df):
+        """Add purchase rows, inserting them into their item's sorted block."""
+        new = self._purchases(df).sort_values(['item', 'date'], kind='mergesort')
+        if new.empty:
+            return self
+        rows = list(self._each(new))
+        items = new['item'].to_numpy(dtype=object)
+        starts = np.flatnonzero(np.r_[True, items[1:] != items[:-1]]).tolist()
+        for start, end in zip(starts, starts[1:] + [len(rows)]):
+            item, date = rows[start][:2]
+            block = self.blocks.get(item)
+            if block is not None and block[0] and block[0][-1] > date:
+                for row in rows[start:end]:
+                    self._insert(*row)
+                continue
+            # No purchase of the item after these rows (the usual case): append them as one sorted run
+            dates, vendors, prices = self.blocks.setdefault(item, ([], [], []))
+            for _, date, vendor, price in rows[start:end]:
+                dates.append(date)
+                vendors.append(vendor)
+                prices.append(price)
+                if (item, vendor) not in self.first_seen:
+                    self.first_seen[(item, vendor)] = date
+        self.rows += len(rows)
+        return self
+
+    def previous(self, item, date):
+        """(vendor, price) of the item's last purchase strictly before `date`, or None."""
+        block = self.blocks.get(item)
+        if block is None:
+            return None
+        dates, vendors, prices = block
+        position = bisect.bisect_left(dates, pd.Timestamp(date).value) - 1
+        if position < 0:
+            return None
+        return vendors[position], prices[position]
+
+    def check(self, df):
+        """Flag new vendors and vendor changes at a higher price for incoming purchases.
+
+        Rows are taken in (item, date) order and each one is compared with the
+        history before it, earlier rows of the same batch included, then added.
+        Gives the rows vendor_changes would flag on the history plus the batch.
+        """
+        new = self._purchases(df).sort_values(['item', 'date'], kind='mergesort')
+        previous_vendor, previous_price, new_vendor, vendor_change = [], [], [], []
+        for item, date, vendor, price in self._each(new):
+            before, is_new = self._insert(item, date, vendor, price)
+            previous_vendor.append(before[0] if before else None)
+            previous_price.append(before[1] if before else np.nan)
+            new_vendor.append(is_new)
+            vendor_change.append(before is not None and before[0] != vendor and price > before[1])
+        flagged = new.assign(previous_vendor=previous_vendor, previous_price=previous_price,
+                             new_vendor=new_vendor, vendor_change=vendor_change)
+        self.rows += len(new)
+        return flagged[flagged['new_vendor'] | flagged['vendor_change']]
+
+
+def vendor_changes(df):
+    """New vendors and higher-priced vendor changes over a full purchase history.
+
+    Vectorized counterpart of VendorHistory.check for data that is all available
+    at once: one sort by (item, date) and grouped shifts, no per-row lookups.
+    A new vendor is the first purchase of an item from a vendor after the item was
+    already bought on an earlier date, as in rule_engine.new_vendor.
+    """
+    purchases = VendorHistory._purchases(df).sort_values(['item', 'date'], kind='mergesort')
+    by_item = purchases.groupby('item', sort=False)
+    purchases['previous_vendor'] = by_item['vendor'].shift()
+    purchases['previous_price'] = by_item['price'].shift()
+    purchases['new_vendor'] = (~purchases.duplicated(['item', 'vendor'])
+                               & (purchases['date'] > by_item['date'].transform('min')))
+    purchases['vendor_change'] = (purchases['previous_vendor'].notna()
+                                  & (purchases['vendor'] != purchases['previous_vendor'])
+                                  & (purchases['price'] > purchases['previous_price']))
+    return purchases[purchases['new_vendor'] | purchases['vendor_change']]
+
+
+def main(data_dir=INVENTORY_DIR):
+    inventory = load_csv_dir(data_dir)
+    if inventory.empty:
+        print(f"No inventory data in {data_dir}")
+        return
+    cols = resolve_columns(inventory.columns)
+    if {'item', 'purchased_quantity', 'consumed_quantity'} <= cols.keys():
+        report = reconcile(inventory)
+        print(f"Low consumption (< {CONSUMPTION_RATIO:.0%} of purchases):")
+        print(report[report['low_consumption']])
+    if {'item', 'vendor'} <= cols.keys():
+        print("Vendor changes:")
+        print(vendor_changes(inventory))
+
+
+if __name__ == '__main__':
+    main()
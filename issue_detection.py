@@ -1,34 +1,76 @@
 import os
-import pandas as pd
+from data_loader import load_csv_dir, iter_csv_dir
+from anomaly_detection import detect_anomalies
+from bill_audit import audit_bills, summarize
+from discount_outliers import detect_discount_outliers
 
 # Define the path to the dataset
 DATA_DIR = './PS_DATA/'
 
 # Function to read CSV files from the sales folder
 def load_sales_data(file_path):
-    df = pd.DataFrame()
-    for root, dirs, files in os.walk(file_path):
-        for file in files:
-            if file.endswith('.csv'):
-                file_path = os.path.join(root, file)
-                temp_df = pd.read_csv(file_path)
-                df = pd.concat([df, temp_df], ignore_index=True)
-    return df
-
-# Load sales data
-sales_data = load_sales_data(os.path.join(DATA_DIR, 'Output Ref/Sales'))
+    return load_csv_dir(file_path)
 
 # Define thresholds for suspicious activities
 LOW_SALES_THRESHOLD = 5000  # Example threshold
 
-# Function to detect low sales
+# Function to detect low sales (fixed threshold, kept for reference; see detect_streaming_anomalies)
 def detect_low_sales(sales_df):
     low_sales = sales_df[sales_df['Total_Sales'] < LOW_SALES_THRESHOLD]
     return low_sales
 
-# Detect low sales
-low_sales = detect_low_sales(sales_data)
+# Datasets scanned for anomalies: folder, value column and the key each value is compared within
+ANOMALY_SOURCES = [
+    ('Output Ref/Sales', 'total', 'outlet'),
+    ('Output Ref/Aggregators', 'total', 'aggregator'),
+    ('Output Ref/Inventory', 'consumed_quantity', 'item'),
+]
 
-# Print the detected low sales transactions
-print("Low Sales Detected:")
-print(low_sales)
+# Function to detect anomalies per outlet/aggregator/item, streaming each folder chunk by chunk
+def detect_streaming_anomalies(data_dir=DATA_DIR, sources=ANOMALY_SOURCES, **params):
+    results = {}
+    for folder, value, key in sources:
+        path = os.path.join(data_dir, folder)
+        if not os.path.isdir(path):
+            continue
+        try:
+            results[folder] = detect_anomalies(iter_csv_dir(path), value, key, **params)
+        except KeyError as e:
+            print(f"Skipping {folder}: {e.args[0]}")
+    return results
+
+# Run every check and return the findings
+def run_checks(data_dir=DATA_DIR):
+    sales_dir = os.path.join(data_dir, 'Output Ref/Sales')
+    sales_data = load_sales_data(sales_dir)
+    return {
+        'low_sales': detect_low_sales(sales_data),
+        'anomalies': detect_streaming_anomalies(data_dir),
+        'bill_violations': audit_bills(iter_csv_dir(sales_dir)),
+        'discount_outliers': detect_discount_outliers(sales_data),
+    }
+
+def main():
+    results = run_checks()
+
+    # Print the detected low sales transactions
+    print("Low Sales Detected:")
+    print(results['low_sales'])
+
+    # Print anomalies against each key's own recent history
+    for folder, anomalies in results['anomalies'].items():
+        print(f"Anomalies Detected in {folder}: {len(anomalies)}")
+        print(anomalies)
+
+    # Duplicate invoices, double orders and settlement times
+    print("Bill Violations Detected:")
+    print(summarize(results['bill_violations']))
+
+    # Staff and aggregators whose discounts stand out from their peers
+    for level, outliers in results['discount_outliers'].items():
+        print(f"Discount Outliers per {level}:")
+        print(outliers)
+    return results
+
+if __name__ == '__main__':
+    main()
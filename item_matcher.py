@@ -0,0 +1,215 @@
+import os
+import re
+import argparse
+import unicodedata
+import numpy as np
+import pandas as pd
+from rule_engine import resolve_columns
+from data_loader import list_csv_files
+
+MISSING_ITEMS_CSV = 'uploads/Missing_Recipies_And_Items.csv'
+
+# Catalogue each kind of missing entry is looked up in: menu items for recipes, raw materials for inventory
+CATALOGUE_DIRS = {
+    'Food Item': './PS_DATA/Output Ref/Sales',
+    'Raw Material': './PS_DATA/Output Ref/Inventory',
+}
+
+# Candidates returned per name, and the lowest trigram similarity (Dice coefficient) that counts as a match
+TOP_K = 3
+MIN_SCORE = 0.5
+
+# Names resolved per vectorized batch; bounds the memory of the candidate pairs
+BATCH_SIZE = 1000
+
+# Pack sizes and units, e.g. 750ml, 30 ml, 1kg, 2 ltr
+_UNITS = re.compile(r'\b\d+(\.\d+)?\s*(ml|ltr|lt|l|cl|kg|gm|gms|g|pcs|pc|nos)\b')
+
+
+def normalize(name):
+    """Lowercase ASCII words of an item name, without punctuation and pack sizes."""
+    name = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode('ascii').lower()
+    name = _UNITS.sub(' ', name.replace('&', ' and '))
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', name).split())
+
+
+def trigrams(key):
+    """Character trigrams of each word of a normalized name, padded so short words count too."""
+    grams = set()
+    for word in key.split():
+        padded = f' {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """Inverted index from character trigrams to catalogue names.
+
+    Candidates of a name come from its rarest trigrams only (prefix filtering):
+    a catalogue name with a Dice similarity of at least `min_score` must share
+    one of them, so the long posting lists of common trigrams are never
+    expanded. The candidates are then scored exactly on their full trigram sets.
+    """
+
+    def __init__(self, names):
+        names = pd.Series(names, dtype=object).dropna().astype(str).str.strip()
+        self.names = pd.unique(names[names != ''].to_numpy())
+        self.keys = [normalize(name) for name in self.names]
+        gram_sets = [trigrams(key) for key in self.keys]
+        self.sizes = np.array([len(grams) for grams in gram_sets], dtype=np.int64)
+        codes, vocab = pd.factorize(np.array([gram for grams in gram_sets for gram in grams], dtype=object))
+        self.vocab = pd.Index(vocab)
+        codes = codes.astype(np.int64)
+        self.df = np.bincount(codes, minlength=len(self.vocab))
+        # Forward index (trigram codes of each name) for scoring, inverted index for candidates
+        self.grams = codes
+        self.gram_offsets = np.r_[0, np.cumsum(self.sizes)]
+        owners = np.repeat(np.arange(len(self.names)), self.sizes)
+        self.postings = owners[np.argsort(codes, kind='stable')]
+        self.offsets = np.r_[0, np.cumsum(self.df)]
+
+    def __len__(self):
+        return len(self.names)
+
+    def _query_grams(self, keys):
+        # (query, trigram code) pairs, -1 for trigrams not in the catalogue, and each query's trigram count
+        gram_lists = [list(trigrams(key)) for key in keys]
+        sizes = np.array([len(grams) for grams in gram_lists], dtype=np.int64)
+        rows = np.repeat(np.arange(len(keys)), sizes)
+        flat = [gram for grams in gram_lists for gram in grams]
+        codes = self.vocab.get_indexer(flat).astype(np.int64) if flat else np.zeros(0, dtype=np.int64)
+        return rows, codes, sizes
+
+    @staticmethod
+    def _expand(starts, lengths):
+        # Positions of the ranges [start, start + length) laid end to end
+        return np.repeat(starts - np.r_[0, np.cumsum(lengths)[:-1]], lengths) + np.arange(lengths.sum())
+
+    def _match_batch(self, keys, k, min_score):
+        rows, codes, sizes = self._query_grams(keys)
+
+        # Prefix filtering: a match shares at least min_score * |q| / (2 - min_score) trigrams,
+        # so it shares one of the |q| - that + 1 rarest (unknown trigrams count as rarest)
+        needed = np.ceil(min_score * sizes / (2 - min_score) - 1e-9).astype(np.int64)
+        prefix_len = np.maximum(sizes - np.maximum(needed, 1) + 1, 0)
+        df = np.where(codes >= 0, self.df[np.maximum(codes, 0)], 0)
+        order = np.lexsort((df, rows))
+        rank = np.arange(len(order)) - np.repeat(np.r_[0, np.cumsum(sizes)[:-1]], sizes)
+        in_prefix = np.zeros(len(order), dtype=bool)
+        in_prefix[order] = rank < prefix_len[rows[order]]
+        probe = in_prefix & (codes >= 0)
+
+        # Candidate pairs from the posting lists of the prefix trigrams
+        starts, lengths = self.offsets[codes[probe]], self.df[codes[probe]]
+        pairs = np.repeat(rows[probe], lengths) * len(self.names) + self.postings[self._expand(starts, lengths)]
+        pairs.sort()  # sorting beats np.unique's hashing on these large int64 arrays
+        starts = np.flatnonzero(np.r_[True, pairs[1:] != pairs[:-1]]) if len(pairs) else np.zeros(0, dtype=np.int64)
+        prefix_hits = np.diff(np.r_[starts, len(pairs)])
+        query, candidate = np.divmod(pairs[starts], len(self.names))
+        # Drop candidates that cannot reach min_score even if they share every trigram after the prefix
+        best_shared = np.minimum(prefix_hits + sizes[query] - prefix_len[query], self.sizes[candidate])
+        keep = 2 * best_shared >= min_score * (sizes[query] + self.sizes[candidate]) - 1e-9
+        query, candidate = query[keep], candidate[keep]
+
+        # Exact Dice similarity: count the candidate's trigrams found among the query's
+        lengths = self.sizes[candidate]
+        pair = np.repeat(np.arange(len(candidate)), lengths)
+        candidate_grams = self.grams[self._expand(self.gram_offsets[candidate], lengths)]
+        member = np.zeros((len(keys), len(self.vocab)), dtype=bool)
+        member[rows[codes >= 0], codes[codes >= 0]] = True
+        hits = member[query[pair], candidate_grams]
+        shared = np.bincount(pair, weights=hits, minlength=len(candidate))
+        score = 2 * shared / np.maximum(sizes[query] + self.sizes[candidate], 1)
+
+        keep = score >= min_score
+        query, candidate, score = query[keep], candidate[keep], score[keep]
+        order = np.lexsort((candidate, -score, query))
+        query, candidate, score = query[order], candidate[order], score[order]
+        first = np.r_[True, query[1:] != query[:-1]] if len(query) else np.zeros(0, dtype=bool)
+        rank = np.arange(len(query)) - np.maximum.accumulate(np.where(first, np.arange(len(query)), 0))
+        keep = rank < k
+        return query[keep], candidate[keep], score[keep], rank[keep]
+
+    def match(self, names, k=TOP_K, min_score=MIN_SCORE, batch_size=BATCH_SIZE):
+        """Best catalogue candidates of each name: one row per (name, candidate), best first.
+
+        Columns: position (index into `names`), name, match, score (0-1) and rank.
+        """
+        names = [str(name) for name in names]
+        keys = [normalize(name) for name in names]
+        parts = []
+        if len(self.vocab):
+            for start in range(0, len(keys), batch_size):
+                query, candidate, score, rank = self._match_batch(keys[start:start + batch_size], k, min_score)
+                parts.append(pd.DataFrame({'position': query + start, 'match': self.names[candidate],
+                                           'score': score.round(3), 'rank': rank + 1}))
+        result = pd.concat(parts, ignore_index=True) if parts else \
+            pd.DataFrame({'position': [], 'match': [], 'score': [], 'rank': []})
+        result.insert(1, 'name', np.asarray(names, dtype=object)[result['position'].astype(np.int64)])
+        return result
+
+
+def catalogue_names(data_dir, chunksize=100_000):
+    """Distinct item names of the CSV files in a directory, reading only the item column."""
+    names = []
+    for file in list_csv_files(data_dir) if os.path.isdir(data_dir) else []:
+        header = pd.read_csv(file, nrows=0).columns
+        item = resolve_columns(header).get('item')
+        if item is None:
+            continue
+        for chunk in pd.read_csv(file, usecols=[item], chunksize=chunksize):
+            names.append(pd.Series(chunk[item].dropna().unique()))
+    return pd.unique(pd.concat(names, ignore_index=True).to_numpy()) if names else np.array([], dtype=object)
+
+
+def build_indexes(catalogue_dirs=CATALOGUE_DIRS):
+    return {kind: TrigramIndex(catalogue_names(path)) for kind, path in catalogue_dirs.items()}
+
+
+def resolve_missing(missing, indexes, k=TOP_K, min_score=MIN_SCORE):
+    """Best match of every missing entry in the catalogue of its Type (all catalogues when the Type is unknown).
+
+    Adds Match, Score and Candidates (the k best, 'name (score)' separated by '; ');
+    Match is empty when nothing reaches `min_score`.
+    """
+    result = missing.copy()
+    result['Match'], result['Score'], result['Candidates'] = None, 0.0, ''
+    types = missing['Type'] if 'Type' in missing.columns else pd.Series(None, index=missing.index)
+    for kind, group in missing.groupby(types.where(types.isin(list(indexes)), ''), sort=False):
+        kinds = [kind] if kind else list(indexes)
+        names = group['Missing_Item'].fillna('').tolist()
+        matches = pd.concat([indexes[name].match(names, k, min_score) for name in kinds], ignore_index=True)
+        matches = matches.sort_values(['position', 'score'], ascending=[True, False], kind='mergesort') \
+            .groupby('position', sort=False).head(k)
+        rows = group.index[matches['position'].astype(np.int64)]
+        best = matches.groupby('position', sort=False).first()
+        best_rows = group.index[best.index.astype(np.int64)]
+        result.loc[best_rows, 'Match'] = best['match'].to_numpy()
+        result.loc[best_rows, 'Score'] = best['score'].to_numpy()
+        labels = pd.Series([f'{match} ({score:.2f})' for match, score in zip(matches['match'], matches['score'])],
+                           index=matches.index)
+        result.loc[best_rows, 'Candidates'] = labels.groupby(rows).agg('; '.join).loc[best_rows].to_numpy()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Match missing recipes and items to the menu and inventory catalogues.')
+    parser.add_argument('missing', nargs='?', default=MISSING_ITEMS_CSV)
+    parser.add_argument('--out', help='write the resolved entries to this CSV file')
+    parser.add_argument('--min-score', type=float, default=MIN_SCORE)
+    args = parser.parse_args(argv)
+
+    indexes = build_indexes()
+    for kind, index in indexes.items():
+        print(f"{kind} catalogue: {len(index)} names")
+    resolved = resolve_missing(pd.read_csv(args.missing), indexes, min_score=args.min_score)
+    matched = resolved['Match'].notna()
+    print(f"Matched {matched.sum()} of {len(resolved)} missing entries")
+    print(resolved[matched].sort_values('Score', ascending=False).head(20).to_string(index=False))
+    if args.out:
+        resolved.to_csv(args.out, index=False)
+    return resolved
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+import os
+import sys
+import json
+import time
+import uuid
+import sqlite3
+import argparse
+import importlib
+import tempfile
+import traceback
+import multiprocessing
+from contextlib import contextmanager
+
+# SQLite file shared by the web app and the workers
+JOB_QUEUE_PATH = os.getenv('JOB_QUEUE_PATH', os.path.join(tempfile.gettempdir(), 'jobs.sqlite'))
+
+# Seconds an idle worker waits before looking for new jobs again
+POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '0.5'))
+
+# A running job without a progress update for this long is assumed dead and queued again
+STALE_SECS = float(os.getenv('JOB_STALE_SECS', '900'))
+
+# Attempts per job before it is marked failed
+MAX_ATTEMPTS = 3
+
+# Job kind -> 'module:function' run by the workers as function(payload, report)
+HANDLERS = {
+    'insights': 'app:run_insights_job',
+}
+
+
+def new_job_id():
+    return uuid.uuid4().hex
+
+
+class JobQueue:
+    """Job queue in a local SQLite file, safe to share between processes.
+
+    Jobs go from queued to running to done or failed. Workers claim the oldest
+    queued job inside an immediate transaction, so a job is never run twice at
+    the same time; jobs whose worker stopped reporting are queued again.
+    """
+
+    def __init__(self, path=JOB_QUEUE_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS jobs ("
+                         "id TEXT PRIMARY KEY, kind TEXT, status TEXT, payload TEXT, result TEXT, error TEXT, "
+                         "progress REAL, message TEXT, attempts INTEGER, worker TEXT, "
+                         "created REAL, started REAL, updated REAL, finished REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_queued ON jobs (status, created)")
+
+    @contextmanager
+    def _connect(self):
+        # Autocommit connection that is always closed; claim runs its own transaction
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def submit(self, kind, payload, job_id=None):
+        """Queue a job and return its id."""
+        job_id = job_id or new_job_id()
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT INTO jobs (id, kind, status, payload, progress, message, attempts, created, updated) "
+                         "VALUES (?, ?, 'queued', ?, 0, 'Queued', 0, ?, ?)",
+                         (job_id, kind, json.dumps(payload), now, now))
+        return job_id
+
+    def claim(self, worker):
+        """Mark the oldest queued job as running for `worker` and return it, or None."""
+        now = time.time()
+        with self._connect() as conn:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("UPDATE jobs SET status = 'queued', message = 'Requeued' "
+                             "WHERE status = 'running' AND updated < ? AND attempts < ?",
+                             (now - STALE_SECS, MAX_ATTEMPTS))
+                conn.execute("UPDATE jobs SET status = 'failed', error = 'Worker stopped responding', finished = ? "
+                             "WHERE status = 'running' AND updated < ?", (now, now - STALE_SECS))
+                row = conn.execute("SELECT id, kind, payload FROM jobs WHERE status = 'queued' "
+                                   "ORDER BY created LIMIT 1").fetchone()
+                if row is not None:
+                    conn.execute("UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, "
+                                 "message = 'Started', started = ?, updated = ? WHERE id = ?",
+                                 (worker, now, now, row[0]))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return {'id': row[0], 'kind': row[1], 'payload': json.loads(row[2])}
+
+    def report(self, job_id, progress=None, message=None):
+        """Record progress; called without it, only refreshes the heartbeat that keeps the job from being requeued."""
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET progress = COALESCE(?, progress), message = COALESCE(?, message), "
+                         "updated = ? WHERE id = ?",
+                         (progress, message, time.time(), job_id))
+
+    def finish(self, job_id, result):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET status = 'done', result = ?, progress = 1, message = 'Done', "
+                         "updated = ?, finished = ? WHERE id = ?", (json.dumps(result), now, now, job_id))
+
+    def fail(self, job_id, error):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET status = 'failed', error = ?, message = 'Failed', "
+                         "updated = ?, finished = ? WHERE id = ?", (error, now, now, job_id))
+
+    def get(self, job_id):
+        """Status, progress and (when done) result of a job, or None for an unknown id."""
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT id, kind, status, progress, message, result, error, attempts, "
+                               "created, started, finished FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def counts(self):
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+def _handler(kind, handlers):
+    module_name, func_name = handlers[kind].split(':')
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def run_worker(path=JOB_QUEUE_PATH, handlers=None, poll_interval=POLL_INTERVAL, max_jobs=None):
+    """Run jobs from the queue until `max_jobs` were run (forever by default)."""
+    queue = JobQueue(path)
+    handlers = handlers or HANDLERS
+    worker = f"{os.uname().nodename if hasattr(os, 'uname') else 'local'}:{os.getpid()}"
+    done = 0
+    while max_jobs is None or done < max_jobs:
+        job = queue.claim(worker)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        try:
+            report = lambda progress=None, message=None: queue.report(job['id'], progress, message)
+            queue.finish(job['id'], _handler(job['kind'], handlers)(job['payload'], report))
+        except Exception:
+            queue.fail(job['id'], traceback.format_exc(limit=5))
+        done += 1
+
+
+def start_workers(count, path=JOB_QUEUE_PATH, handlers=None):
+    """Start `count` daemon worker processes and return them."""
+    processes = []
+    for _ in range(count):
+        process = multiprocessing.Process(target=run_worker, args=(path, handlers), daemon=True)
+        process.start()
+        processes.append(process)
+    return processes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run job queue workers.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--path', default=JOB_QUEUE_PATH)
+    args = parser.parse_args(argv)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    processes = start_workers(args.workers, args.path)
+    print(f"Started {len(processes)} workers on {args.path}")
+    for process in processes:
+        process.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import os
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "gemini-1.5-flash"
+
+# Limits for the Gemini calls, overridable from the environment
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))  # parallel calls, keep under the rate limit
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))  # seconds per call
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", "3"))  # retries after the first attempt
+LLM_BACKOFF = float(os.getenv("LLM_BACKOFF", "1"))  # base delay in seconds, doubled on every retry
+
+# Shared by every request of the process, so concurrent uploads together stay within LLM_CONCURRENCY
+_call_slots = threading.BoundedSemaphore(LLM_CONCURRENCY)
+
+
+def default_model_factory(model_name):
+    import google.generativeai as genai
+    return genai.GenerativeModel(model_name)
+
+
+def generate_text(prompt, model_name=MODEL_NAME, model_factory=None, timeout=LLM_TIMEOUT,
+                  retries=LLM_RETRIES, backoff=LLM_BACKOFF):
+    """Send one prompt to the model and return the text of the first candidate.
+
+    Failed calls are retried with exponential backoff and jitter. At most
+    LLM_CONCURRENCY calls are in flight per process. Returns None when every
+    attempt failed or the model returned no candidates.
+    """
+    model = (model_factory or default_model_factory)(model_name)
+    for attempt in range(retries + 1):
+        try:
+            with _call_slots:
+                response = model.generate_content(prompt, request_options={"timeout": timeout})
+            candidates = response.candidates
+            if candidates:
+                return candidates[0].content.parts[0].text
+            return None
+        except Exception as e:
+            if attempt == retries:
+                logger.warning("LLM call failed after %d attempts: %s", attempt + 1, e)
+                return None
+            logger.info("LLM call failed (attempt %d), retrying: %s", attempt + 1, e)
+            time.sleep(backoff * (2 ** attempt) * (1 + random.random()))
+
+
+def generate_many(prompts, max_workers=LLM_CONCURRENCY, **kwargs):
+    """Send several prompts concurrently and return the texts in the same order.
+
+    `max_workers` bounds the threads of this call; the calls of all requests
+    together are bounded by LLM_CONCURRENCY, which keeps a burst of uploads
+    under the API rate limit.
+    """
+    if not prompts:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(prompts)))) as executor:
+        futures = [executor.submit(generate_text, prompt, **kwargs) for prompt in prompts]
+        return [future.result() for future in futures]
@@ -0,0 +1,149 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from rule_engine import resolve_columns
+from data_loader import list_csv_files
+
+# Hourly rollups, one Parquet file per source CSV, plus a manifest of what was ingested
+METRICS_DIR = os.getenv('METRICS_DIR', './PS_DATA/.cache/metrics')
+SALES_DIR = './PS_DATA/Output Ref/Sales'
+
+# Preparation time buckets in minutes: (column, lower bound, upper bound)
+PREP_BUCKETS = [('prep_0_10', 0, 10), ('prep_10_30', 10, 30), ('prep_30_60', 30, 60), ('prep_60_plus', 60, np.inf)]
+
+# Additive measures of every rollup row; daily and coarser rollups are sums of the hourly ones
+MEASURES = ['orders', 'sales', 'cancelled', 'discount', 'discount_base'] + [name for name, _, _ in PREP_BUCKETS]
+
+ROLLUP_COLUMNS = ['hour', 'aggregator'] + MEASURES
+
+
+def hourly_rollup(df):
+    """Hourly measures per aggregator for one frame of orders."""
+    cols = resolve_columns(df.columns)
+    time_col = cols.get('created_at') or cols.get('date')
+    if time_col is None:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+
+    def numeric(key):
+        if key not in cols:
+            return pd.Series(0.0, index=df.index)
+        return pd.to_numeric(df[cols[key]], errors='coerce').fillna(0)
+
+    frame = pd.DataFrame({
+        'hour': pd.to_datetime(df[time_col], errors='coerce').dt.floor('h'),
+        'aggregator': df[cols['aggregator']].astype(str).str.strip() if 'aggregator' in cols else 'all',
+        'orders': 1,
+        'sales': numeric('total'),
+        'cancelled': df[cols['order_status']].astype(str).str.lower().str.contains('cancel', regex=False)
+        if 'order_status' in cols else False,
+        'discount': numeric('discount'),
+    })
+    frame['discount_base'] = frame['sales'] if 'discount' in cols else 0.0
+    prep = pd.to_numeric(df[cols['prep_time']], errors='coerce') if 'prep_time' in cols else pd.Series(np.nan, index=df.index)
+    for name, low, high in PREP_BUCKETS:
+        frame[name] = (prep >= low) & (prep < high)
+    frame = frame.dropna(subset=['hour'])
+    return frame.groupby(['hour', 'aggregator'], sort=True, as_index=False)[MEASURES].sum()
+
+
+def _manifest_path(metrics_dir):
+    return os.path.join(metrics_dir, 'manifest.json')
+
+
+def read_manifest(metrics_dir=METRICS_DIR):
+    path = _manifest_path(metrics_dir)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def version(metrics_dir=METRICS_DIR):
+    """Changes whenever new data is ingested; pass it to cached queries to invalidate them."""
+    manifest = read_manifest(metrics_dir)
+    return hashlib.sha1(json.dumps(manifest, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def ingest_dir(data_dir=SALES_DIR, metrics_dir=METRICS_DIR, chunksize=100_000):
+    """Roll up the CSV files that are new or changed since the last run.
+
+    Each source file gets its own rollup partition, so a changed file replaces
+    its partition and unchanged files are never read again. Returns the number
+    of files ingested.
+    """
+    os.makedirs(metrics_dir, exist_ok=True)
+    manifest = read_manifest(metrics_dir)
+    files = list_csv_files(data_dir) if os.path.isdir(data_dir) else []
+    ingested = 0
+    for file in files:
+        stat = os.stat(file)
+        signature = [stat.st_mtime_ns, stat.st_size]
+        key = os.path.abspath(file)
+        entry = manifest.get(key)
+        if entry and entry['signature'] == signature:
+            continue
+        parts = [hourly_rollup(chunk) for chunk in pd.read_csv(file, chunksize=chunksize)]
+        rollup = pd.concat(parts, ignore_index=True).groupby(['hour', 'aggregator'], as_index=False)[MEASURES].sum() \
+            if parts else pd.DataFrame(columns=ROLLUP_COLUMNS)
+        partition = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16] + '.parquet'
+        rollup.to_parquet(os.path.join(metrics_dir, partition), index=False)
+        manifest[key] = {'signature': signature, 'partition': partition, 'rows': int(rollup['orders'].sum())}
+        ingested += 1
+
+    # Drop partitions of source files that disappeared
+    for key in [key for key in manifest if key not in {os.path.abspath(file) for file in files}]:
+        path = os.path.join(metrics_dir, manifest.pop(key)['partition'])
+        if os.path.exists(path):
+            os.remove(path)
+        ingested += 1
+
+    if ingested:
+        with open(_manifest_path(metrics_dir), 'w') as f:
+            json.dump(manifest, f)
+    return ingested
+
+
+def load_rollups(metrics_dir=METRICS_DIR):
+    """All hourly rollups in one frame."""
+    manifest = read_manifest(metrics_dir)
+    frames = [pd.read_parquet(os.path.join(metrics_dir, entry['partition'])) for entry in manifest.values()]
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def query(rollups, freq='D', by=None, start=None, end=None):
+    """Measures per period (pandas offset alias, e.g. 'h', 'D', 'W') and optionally per aggregator.
+
+    Adds the cancellation rate, discount rate and prep-time bucket shares.
+    """
+    if start is not None:
+        rollups = rollups[rollups['hour'] >= pd.Timestamp(start)]
+    if end is not None:
+        rollups = rollups[rollups['hour'] < pd.Timestamp(end)]
+    keys = [rollups['hour'].dt.floor(freq) if freq in ('h', 'D') else rollups['hour'].dt.to_period(freq).dt.start_time]
+    if by:
+        keys.append(rollups[by])
+    result = rollups[MEASURES].groupby(keys, sort=True).sum()
+    result.index.names = ['period'] + ([by] if by else [])
+    return add_rates(result.reset_index())
+
+
+def totals(rollups, by=None):
+    """Measures summed over the whole history, overall or per aggregator."""
+    result = rollups.groupby(by, sort=True)[MEASURES].sum().reset_index() if by else \
+        rollups[MEASURES].sum().to_frame().T
+    return add_rates(result)
+
+
+def add_rates(frame):
+    orders = frame['orders'].where(frame['orders'] > 0)
+    frame['cancellation_rate'] = frame['cancelled'] / orders * 100
+    frame['discount_rate'] = frame['discount'] / frame['discount_base'].where(frame['discount_base'] > 0) * 100
+    timed = frame[[name for name, _, _ in PREP_BUCKETS]].sum(axis=1)
+    for name, _, _ in PREP_BUCKETS:
+        frame[name + '_share'] = frame[name] / timed.where(timed > 0) * 100
+    return frame
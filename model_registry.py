@@ -0,0 +1,111 @@
+import os
+import json
+import hashlib
+from datetime import datetime, timezone
+import joblib
+import pandas as pd
+
+# Versioned model artifacts: <REGISTRY_DIR>/<name>/<version>/{model.joblib,metadata.json}
+REGISTRY_DIR = os.getenv('MODEL_REGISTRY_DIR', './models')
+
+
+def data_hash(df):
+    """Content hash of a DataFrame, independent of its index."""
+    digest = hashlib.sha256()
+    digest.update(','.join(map(str, df.columns)).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+def _model_dir(name, version=None):
+    path = os.path.join(REGISTRY_DIR, name)
+    return os.path.join(path, version) if version else path
+
+
+def list_versions(name):
+    path = _model_dir(name)
+    if not os.path.isdir(path):
+        return []
+    return sorted(v for v in os.listdir(path) if os.path.isfile(os.path.join(path, v, 'metadata.json')))
+
+
+def current_version(name):
+    """Version the CURRENT pointer refers to, or None if nothing was registered."""
+    pointer = os.path.join(_model_dir(name), 'CURRENT')
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer) as f:
+        return f.read().strip() or None
+
+
+def read_metadata(name, version=None):
+    version = version or current_version(name)
+    if version is None:
+        return None
+    with open(os.path.join(_model_dir(name, version), 'metadata.json')) as f:
+        return json.load(f)
+
+
+def find_version(name, training_hash):
+    """Latest version trained on data with the given hash, so retraining can be skipped."""
+    for version in reversed(list_versions(name)):
+        if read_metadata(name, version).get('data_hash') == training_hash:
+            return version
+    return None
+
+
+def register_model(model, name, features, training_hash, metrics=None, extra=None, artifacts=None):
+    """Save a model as a new version with its metadata and make it the current one.
+
+    The model is dumped uncompressed so its NumPy arrays can be memory-mapped on load.
+    `artifacts` maps names to objects saved alongside it, e.g. the category maps.
+    """
+    versions = list_versions(name)
+    version = f"v{int(versions[-1][1:]) + 1 if versions else 1:04d}"
+    path = _model_dir(name, version)
+    os.makedirs(path, exist_ok=True)
+    joblib.dump(model, os.path.join(path, 'model.joblib'))
+    for key, artifact in (artifacts or {}).items():
+        joblib.dump(artifact, os.path.join(path, f'{key}.joblib'))
+    metadata = {
+        'name': name,
+        'version': version,
+        'created': datetime.now(timezone.utc).isoformat(),
+        'features': list(features),
+        'data_hash': training_hash,
+        'metrics': metrics or {},
+        'artifacts': sorted(artifacts or {}),
+    }
+    metadata.update(extra or {})
+    with open(os.path.join(path, 'metadata.json'), 'w') as f:
+        json.dump(metadata, f, indent=2, default=str)
+    set_current(name, version)
+    return version
+
+
+def set_current(name, version):
+    pointer = os.path.join(_model_dir(name), 'CURRENT')
+    with open(pointer + '.tmp', 'w') as f:
+        f.write(version)
+    os.replace(pointer + '.tmp', pointer)
+
+
+def load_model(name, version=None, mmap_mode='r'):
+    """Load a registered model (the current one by default) and its metadata.
+
+    Returns (None, None) when the model was never registered.
+    """
+    version = version or current_version(name)
+    if version is None:
+        return None, None
+    model = joblib.load(os.path.join(_model_dir(name, version), 'model.joblib'), mmap_mode=mmap_mode)
+    return model, read_metadata(name, version)
+
+
+def load_artifact(name, key, version=None):
+    """Load an artifact saved with a registered model, or None if it has none."""
+    version = version or current_version(name)
+    path = os.path.join(_model_dir(name, version), f'{key}.joblib') if version else None
+    if path is None or not os.path.exists(path):
+        return None
+    return joblib.load(path)
@@ -1,9 +1,11 @@
 import os
-import pandas as pd
+from data_loader import load_csv_dir
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
+from training import train_forest
 from sklearn.metrics import classification_report
 import joblib
+from model_registry import data_hash, find_version, register_model, load_artifact
+from encoders import CategoryEncoder
 
 # Define directories
 DATA_DIR = './PS_DATA'
@@ -11,25 +13,29 @@ RAW_DATA_DIR = os.path.join(DATA_DIR, 'Raw')
 PREPARED_DATA_DIR = os.path.join(DATA_DIR, 'Prepared from Raw')
 OUTPUT_DIR = os.path.join(DATA_DIR, 'Output Ref')
 
+# Name of the order status model in the model registry
+MODEL_NAME = 'order_status'
+
 def load_data(data_dir):
     """Load raw data from directory."""
-    data_files = [os.path.join(data_dir, file) for file in os.listdir(data_dir) if file.endswith('.csv')]
-    dataframes = [pd.read_csv(file, low_memory=False) for file in data_files]
-    return pd.concat(dataframes, ignore_index=True)
+    return load_csv_dir(data_dir, recursive=False, low_memory=False)
 
-def preprocess_data(df):
-    """Basic preprocessing to clean and prepare data."""
+def clean_data(df):
+    """Drop rows that cannot be used for training."""
     # Drop rows where the target is missing
     df = df.dropna(subset=['Order_Status_z'])
     
     # Drop other rows with missing values
-    df = df.dropna()
-    
-    # Convert categorical columns to numeric
-    for col in df.select_dtypes(include=['object']).columns:
-        df[col] = df[col].astype('category').cat.codes
+    return df.dropna()
+
+def preprocess_data(df, encoder=None):
+    """Basic preprocessing to clean and prepare data."""
+    df = clean_data(df)
     
-    return df
+    # Convert categorical columns to numeric with stable codes
+    if encoder is None:
+        encoder = CategoryEncoder().fit(df)
+    return encoder.transform(df)
 
 def train_model(df):
     """Train a simple model on the processed data."""
@@ -39,43 +45,70 @@ def train_model(df):
     # Make sure there is a minimum number of samples for the split
     if len(df) < 5:  # Arbitrary threshold, adjust as needed
         print("Not enough data to perform the split.")
-        return None
+        return None, None
     
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
     
-    model = RandomForestClassifier()
-    model.fit(X_train, y_train)
+    # All cores, with wall time and peak memory logged per run
+    model = train_forest(X_train, y_train, kind='classifier', name=MODEL_NAME)
     
     # Evaluate the model
     y_pred = model.predict(X_test)
     print(classification_report(y_test, y_pred))
+    metrics = classification_report(y_test, y_pred, output_dict=True)
     
-    return model
+    return model, metrics
 
 def save_output(model, output_dir):
     """Save model or predictions as needed."""
     joblib.dump(model, os.path.join(output_dir, 'model.pkl'))
     print("Model saved!")
 
+def prepare_stage(raw_data):
+    """Clean and encode the raw data; the registered encoder keeps its codes and only learns new values."""
+    encoder = load_artifact(MODEL_NAME, 'encoder') or CategoryEncoder()
+    encoder.partial_fit(clean_data(raw_data))
+    prepared_data = preprocess_data(raw_data, encoder)
+    print(f"Number of samples after preprocessing: {len(prepared_data)}")
+    return prepared_data, encoder
+
+def train_stage(prepared):
+    """Train and register a model unless the registry already has one for this data."""
+    prepared_data, encoder = prepared
+    
+    # Proceed if there are enough samples
+    if len(prepared_data) == 0:
+        print("No data available for training after preprocessing.")
+        return None
+
+    # Skip training when the registry already has a model for this exact data
+    training_hash = data_hash(prepared_data)
+    version = find_version(MODEL_NAME, training_hash)
+    if version is not None:
+        print(f"Data unchanged, reusing registered model {MODEL_NAME} {version}.")
+        return version
+
+    # Train model
+    model, metrics = train_model(prepared_data)
+    if model is None:
+        return None
+    
+    # Save output
+    save_output(model, OUTPUT_DIR)
+    features = prepared_data.columns.drop('Order_Status_z')
+    version = register_model(model, MODEL_NAME, features, training_hash, metrics,
+                             artifacts={'encoder': encoder})
+    print(f"Registered model {MODEL_NAME} {version}.")
+    print("Pipeline completed.")
+    return version
+
 def main():
     # Load raw data
     raw_data = load_data(RAW_DATA_DIR)
     print("Data loaded successfully.")
     
-    # Preprocess data
-    prepared_data = preprocess_data(raw_data)
-    print(f"Number of samples after preprocessing: {len(prepared_data)}")
-    
-    # Proceed if there are enough samples
-    if len(prepared_data) > 0:
-        # Train model
-        model = train_model(prepared_data)
-        
-        # Save output
-        save_output(model, OUTPUT_DIR)
-        print("Pipeline completed.")
-    else:
-        print("No data available for training after preprocessing.")
+    # Preprocess, then train and register
+    return train_stage(prepare_stage(raw_data))
 
 if __name__ == '__main__':
     main()
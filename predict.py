@@ -0,0 +1,106 @@
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from model_registry import load_model, load_artifact
+from pipeline import MODEL_NAME
+
+TARGET = 'Order_Status_z'
+
+# Rows scored per predict_proba call
+BATCH_ROWS = 50_000
+
+
+def load_predictor(name=MODEL_NAME, version=None):
+    """A model (the current one by default), its metadata and the category encoder it was trained with.
+
+    None when no model is registered, or when it was registered without an encoder
+    (models from before the encoder was stored cannot encode new rows).
+    """
+    model, metadata = load_model(name, version)
+    if model is None:
+        return None
+    encoder = load_artifact(name, 'encoder', metadata['version'])
+    if encoder is None:
+        return None
+    return model, metadata, encoder
+
+
+def prepare_features(df, features, encoder):
+    """Encode a batch exactly like the training data, using the stored category codes."""
+    missing = [col for col in features if col not in df.columns]
+    if missing:
+        raise KeyError(f"Missing feature columns: {', '.join(missing)}")
+    X = encoder.transform(df[features])
+    # Unseen categories are -1; missing numbers get the same sentinel
+    return X.apply(pd.to_numeric, errors='coerce').fillna(-1)
+
+
+def predict_frame(df, predictor, batch_rows=BATCH_ROWS):
+    """Predicted order status and class probabilities for every row of `df`."""
+    model, metadata, encoder = predictor
+    X = prepare_features(df, metadata['features'], encoder)
+    proba = np.empty((len(X), len(model.classes_)))
+    for start in range(0, len(X), batch_rows):
+        proba[start:start + batch_rows] = model.predict_proba(X.iloc[start:start + batch_rows])
+
+    # Map the target codes back to their labels when the category map has them
+    labels = np.asarray(model.classes_, dtype=object)
+    target_cats = encoder.categories.get(TARGET)
+    if target_cats is not None:
+        labels = np.asarray([target_cats[int(c)] if 0 <= int(c) < len(target_cats) else c
+                             for c in model.classes_], dtype=object)
+
+    result = pd.DataFrame(proba, columns=[f'proba_{label}' for label in labels], index=df.index)
+    result.insert(0, 'predicted_' + TARGET, labels[proba.argmax(axis=1)] if len(proba) else [])
+    return result
+
+
+def predict_chunks(chunks, predictor, batch_rows=BATCH_ROWS):
+    """Predictions for an iterator of DataFrame chunks, one result frame per chunk."""
+    for chunk in chunks:
+        yield predict_frame(chunk, predictor, batch_rows)
+
+
+def iter_csv_chunks(results):
+    """Yield result frames as one CSV text, the header with the first frame only."""
+    for i, result in enumerate(results):
+        yield result.to_csv(index=False, header=i == 0)
+
+
+def iter_csv(result, batch_rows=BATCH_ROWS):
+    """Yield a result frame as CSV text, one batch of rows at a time."""
+    for start in range(0, max(len(result), 1), batch_rows):
+        yield result.iloc[start:start + batch_rows].to_csv(index=False, header=start == 0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Predict order status for a CSV or JSON batch.')
+    parser.add_argument('input', help='CSV file, or JSON file with a list of records')
+    parser.add_argument('-o', '--output', help='output CSV file (default: stdout)')
+    parser.add_argument('--batch-rows', type=int, default=BATCH_ROWS)
+    args = parser.parse_args(argv)
+
+    predictor = load_predictor()
+    if predictor is None:
+        sys.exit(f"No registered model '{MODEL_NAME}' with its encoder. Run pipeline.py first.")
+
+    start = time.perf_counter()
+    df = pd.read_json(args.input) if args.input.endswith('.json') else pd.read_csv(args.input)
+    result = predict_frame(df, predictor, args.batch_rows)
+    elapsed = time.perf_counter() - start
+
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        for text in iter_csv(result, args.batch_rows):
+            out.write(text)
+    finally:
+        if args.output:
+            out.close()
+    print(f"Predicted {len(result)} rows in {elapsed * 1000:.1f} ms "
+          f"({len(result) / max(elapsed, 1e-9):.0f} rows/sec)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
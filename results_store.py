@@ -0,0 +1,173 @@
+import io
+import os
+import re
+import csv
+import json
+import time
+import uuid
+import tempfile
+import threading
+import importlib.util
+from collections import OrderedDict
+
+# Insight results of finished analyses, shared by the web process and the job workers
+RESULTS_DIR = os.getenv('RESULTS_DIR', os.path.join(tempfile.gettempdir(), 'insight_results'))
+
+# Results kept in memory per process, results kept on disk, and how long a result can be downloaded
+MEMORY_ENTRIES = int(os.getenv('RESULTS_MEMORY_ENTRIES', '128'))
+MAX_ENTRIES = int(os.getenv('RESULTS_MAX_ENTRIES', '1000'))
+RESULT_TTL = int(os.getenv('RESULT_TTL', str(24 * 3600)))
+
+# Download formats; Parquet is only offered when a parquet engine is installed (checked without importing it)
+FORMATS = {'csv': 'text/csv'}
+if any(importlib.util.find_spec(engine) for engine in ('pyarrow', 'fastparquet')):
+    FORMATS['parquet'] = 'application/octet-stream'
+
+_RESULT_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+class ResultStore:
+    """Insight results by opaque result id: an in-memory LRU over one JSON file per result.
+
+    Every result is written to `path` as well, so the worker process that
+    computed it and the web process that serves it share it. Results older than
+    `ttl` seconds are removed, and the disk keeps at most `max_entries` results,
+    the oldest being evicted first; disk use therefore stays bounded under any
+    upload traffic. Ids that are not ours are treated as missing, so a request
+    can never name a file outside the store.
+    """
+
+    def __init__(self, path=RESULTS_DIR, memory_size=MEMORY_ENTRIES, max_entries=MAX_ENTRIES, ttl=RESULT_TTL):
+        self.path = path
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+        self.expired = 0
+        self._memory = OrderedDict()  # result id -> (insights, created, size in bytes)
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, result_id):
+        return os.path.join(self.path, result_id + '.json')
+
+    def _remember(self, result_id, insights, created, size):
+        self._memory[result_id] = (insights, created, size)
+        self._memory.move_to_end(result_id)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+            self.memory_evictions += 1
+
+    def _entries(self):
+        # (created, result id, size) of the results on disk, oldest first
+        entries = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith('.json') and _RESULT_ID.match(entry.name[:-5]):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:  # removed by another process meanwhile
+                    continue
+                entries.append((stat.st_mtime, entry.name[:-5], stat.st_size))
+        return sorted(entries)
+
+    def _remove(self, result_id):
+        self._memory.pop(result_id, None)
+        try:
+            os.remove(self._file(result_id))
+        except FileNotFoundError:
+            pass
+
+    def put(self, insights):
+        """Store a list of insight lines and return its result id."""
+        result_id = uuid.uuid4().hex
+        data = json.dumps(list(insights)).encode('utf-8')
+        # Write then rename, so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, self._file(result_id))
+        with self._lock:
+            self._remember(result_id, list(insights), time.time(), len(data))
+            self.cleanup()
+        return result_id
+
+    def get(self, result_id):
+        """The insight lines of a result, or None when unknown or expired."""
+        if not result_id or not _RESULT_ID.match(result_id):
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(result_id)
+            if entry is not None and now - entry[1] <= self.ttl:
+                self._memory.move_to_end(result_id)
+                self.hits += 1
+                return entry[0]
+            try:
+                with open(self._file(result_id), 'rb') as f:
+                    created = os.fstat(f.fileno()).st_mtime
+                    data = f.read()
+            except FileNotFoundError:
+                self._memory.pop(result_id, None)
+                self.misses += 1
+                return None
+            if now - created > self.ttl:
+                self._remove(result_id)
+                self.expired += 1
+                self.misses += 1
+                return None
+            insights = json.loads(data)
+            self._remember(result_id, insights, created, len(data))
+            self.hits += 1
+            return insights
+
+    def cleanup(self):
+        """Remove expired results and evict the oldest ones above `max_entries`."""
+        now = time.time()
+        entries = self._entries()
+        for created, result_id, _ in entries:
+            if now - created > self.ttl:
+                self._remove(result_id)
+                self.expired += 1
+        entries = [entry for entry in entries if now - entry[0] <= self.ttl]
+        for _, result_id, _ in entries[:max(len(entries) - self.max_entries, 0)]:
+            self._remove(result_id)
+            self.disk_evictions += 1
+
+    def stream(self, result_id, fmt='csv'):
+        """The result as chunks of CSV or Parquet bytes, or None when unknown or expired."""
+        insights = self.get(result_id)
+        if insights is None:
+            return None
+        if fmt == 'parquet':
+            import pandas as pd
+            buffer = io.BytesIO()
+            pd.DataFrame(insights, columns=['Insight']).to_parquet(buffer, index=False)
+            return iter([buffer.getvalue()])
+        return _iter_csv(insights)
+
+    def stats(self):
+        with self._lock:
+            entries = self._entries()
+            return {'hits': self.hits, 'misses': self.misses,
+                    'memory_entries': len(self._memory),
+                    'memory_bytes': sum(size for _, _, size in self._memory.values()),
+                    'disk_entries': len(entries), 'disk_bytes': sum(size for _, _, size in entries),
+                    'memory_evictions': self.memory_evictions, 'disk_evictions': self.disk_evictions,
+                    'expired': self.expired}
+
+
+def _iter_csv(insights, rows_per_chunk=1000):
+    # Same layout as DataFrame(insights, columns=['Insight']).to_csv(index=False)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(['Insight'])
+    for i, insight in enumerate(insights, 1):
+        writer.writerow([insight])
+        if i % rows_per_chunk == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
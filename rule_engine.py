@@ -0,0 +1,519 @@
+import re
+import numpy as np
+import pandas as pd
+
+# Thresholds used by the insight rules (same values as the LLM prompt in app.py)
+AGGREGATOR_DISCOUNT_PCT = 15
+DELIVERY_DELAY_MINS = 30
+PREP_DELAY_MINS = 30
+FAST_TURNAROUND_MINS = 10
+DINE_IN_PREP_MINS = 60
+CONSUMPTION_RATIO = 0.85
+FAST_SETTLEMENT_SECS = 30
+SLOW_SETTLEMENT_SECS = 15 * 60
+STAFF_DISCOUNT_PCT = 15
+KOT_EARLY_SECS = 60
+KOT_LATE_MINS = 30
+
+# Canonical column name -> names it may appear under in the uploaded exports.
+# Matching ignores case, punctuation and the Zomato/Swiggy '_z'/'_s' suffixes.
+COLUMN_ALIASES = {
+    'total': ['Total', 'Total_Sales', 'Total_Amount', 'Bill_Amount', 'Net_Amount', 'Amount'],
+    'original_total': ['Original_Total', 'Original_Amount', 'Old_Amount', 'Amount_Before_Modification'],
+    'date': ['Date', 'Order_Date', 'Bill_Date'],
+    'discount': ['Discount', 'Discount_Amount', 'Total_Discount'],
+    'discount_pct': ['Discount_Percentage', 'Discount_Pct', 'Discount_Percent'],
+    'delivery_time': ['Delivery_Time', 'Delivery_Time_Taken', 'Delivery_Mins'],
+    'prep_time': ['Preparation_Time_Taken', 'Preparation_Time', 'Prep_Time', 'KPT'],
+    'order_status': ['Order_Status', 'Status', 'Bill_Status'],
+    'order_type': ['Order_Type', 'Type', 'Service_Type'],
+    'consumed_quantity': ['Consumed_Quantity', 'Consumption_Quantity', 'Qty_Consumed'],
+    'purchased_quantity': ['Purchased_Quantity', 'Purchase_Quantity', 'Qty_Purchased'],
+    'entry_count': ['Entry_Count', 'Entries'],
+    'item': ['Item', 'Item_Name', 'Raw_Material', 'Sku'],
+    'vendor': ['Vendor', 'Vendor_Name', 'Supplier', 'Supplier_Name'],
+    'price': ['Price', 'Unit_Price', 'Rate', 'Purchase_Price'],
+    'invoice': ['Invoice_No', 'Invoice_Number', 'Invoice', 'Bill_No', 'Bill_Number'],
+    'staff': ['Staff', 'Staff_Name', 'Biller', 'Cashier', 'Created_By'],
+    'created_at': ['Created_At', 'Bill_Created', 'Order_Time', 'Bill_Time'],
+    'settled_at': ['Settled_At', 'Bill_Settled', 'Settlement_Time'],
+    'kot_time': ['KOT_Time', 'KOT_Created'],
+    'kot_modified_at': ['KOT_Modified', 'KOT_Modified_At', 'KOT_Modification_Time'],
+    'customer_name': ['Customer_Name', 'Name'],
+    'customer_phone': ['Customer_Phone', 'Phone', 'Mobile', 'Phone_Number'],
+    'covers': ['Covers', 'Pax', 'No_Of_Covers'],
+    'feedback': ['Feedback', 'Customer_Feedback'],
+    'outlet': ['Outlet', 'Outlet_Name', 'Restaurant', 'Restaurant_Name', 'Branch'],
+    'aggregator': ['Aggregator', 'Aggregator_Name', 'Channel', 'Platform'],
+    'department': ['Department', 'Department_Name', 'Dept'],
+}
+
+
+def _normalize(name):
+    name = re.sub(r'_[zs]$', '', str(name).strip().lower())
+    return re.sub(r'[^a-z0-9]', '', name)
+
+
+def resolve_columns(columns):
+    """Map canonical column names to the actual columns of an upload."""
+    lookup = {}
+    for col in columns:
+        lookup.setdefault(_normalize(col), col)
+    resolved = {}
+    for canonical, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            col = lookup.get(_normalize(alias))
+            if col is not None:
+                resolved[canonical] = col
+                break
+    return resolved
+
+
+def _numeric(df, cols, key):
+    return pd.to_numeric(df[cols[key]], errors='coerce')
+
+
+def _datetime(df, cols, key):
+    return pd.to_datetime(df[cols[key]], errors='coerce')
+
+
+def _text(df, cols, key):
+    return df[cols[key]].astype(str).str.strip().str.lower()
+
+
+def _discount_pct(df, cols):
+    if 'discount_pct' in cols:
+        return _numeric(df, cols, 'discount_pct')
+    total = _numeric(df, cols, 'total')
+    return _numeric(df, cols, 'discount') / total.where(total != 0) * 100
+
+
+def _is_blank(series):
+    # Missing or whitespace only; zeros are real values
+    return series.isna() | series.astype(str).str.strip().eq('')
+
+
+# Rule functions: each takes the frame and the resolved columns and returns a boolean mask
+
+def aggregator_discount(df, cols):
+    return _discount_pct(df, cols) > AGGREGATOR_DISCOUNT_PCT
+
+
+def delivery_delay(df, cols):
+    return _numeric(df, cols, 'delivery_time') > DELIVERY_DELAY_MINS
+
+
+def cancelled_order(df, cols):
+    return _text(df, cols, 'order_status').str.contains('cancel', regex=False)
+
+
+def prep_delay(df, cols):
+    return _numeric(df, cols, 'prep_time') > PREP_DELAY_MINS
+
+
+def fast_turnaround(df, cols):
+    return _numeric(df, cols, 'prep_time') < FAST_TURNAROUND_MINS
+
+
+def long_dine_in_prep(df, cols):
+    mask = _numeric(df, cols, 'prep_time') > DINE_IN_PREP_MINS
+    if 'order_type' in cols:
+        mask &= _text(df, cols, 'order_type').str.contains('dine', regex=False)
+    return mask
+
+
+def low_consumption(df, cols):
+    purchased = _numeric(df, cols, 'purchased_quantity')
+    ratio = _numeric(df, cols, 'consumed_quantity') / purchased.where(purchased != 0)
+    return ratio < CONSUMPTION_RATIO
+
+
+def double_order(df, cols):
+    return _numeric(df, cols, 'entry_count') > 1
+
+
+def _vendor_history(df, cols):
+    """Rows sorted by item (and date when present), grouped by item."""
+    order_cols = [cols['item']] + ([cols['date']] if 'date' in cols else [])
+    ordered = df[order_cols + [cols['vendor']]].copy()
+    if 'date' in cols:
+        ordered[cols['date']] = pd.to_datetime(ordered[cols['date']], errors='coerce')
+    ordered = ordered.sort_values(order_cols, kind='mergesort')
+    grouped = ordered.groupby(cols['item'], sort=False)[cols['vendor']]
+    return ordered, grouped
+
+
+def new_vendor(df, cols):
+    # First purchase of an item from a vendor, after the item was already bought earlier
+    ordered, _ = _vendor_history(df, cols)
+    items = ordered[cols['item']]
+    mask = ~ordered.duplicated([cols['item'], cols['vendor']]) & items.duplicated() & items.notna()
+    if 'date' in cols:
+        dates = ordered[cols['date']]
+        mask &= dates > dates.groupby(ordered[cols['item']], sort=False).transform('min')
+    return mask.reindex(df.index, fill_value=False)
+
+
+def vendor_change(df, cols):
+    ordered, grouped = _vendor_history(df, cols)
+    price = pd.to_numeric(df[cols['price']], errors='coerce').reindex(ordered.index)
+    previous_vendor = grouped.shift()
+    previous_price = price.groupby(ordered[cols['item']], sort=False).shift()
+    mask = previous_vendor.notna() & (ordered[cols['vendor']] != previous_vendor) & (price > previous_price)
+    return mask.reindex(df.index, fill_value=False)
+
+
+def bill_modification(df, cols):
+    return _numeric(df, cols, 'total') < _numeric(df, cols, 'original_total')
+
+
+def _settlement_secs(df, cols):
+    return (_datetime(df, cols, 'settled_at') - _datetime(df, cols, 'created_at')).dt.total_seconds()
+
+
+def fast_settlement(df, cols):
+    return _settlement_secs(df, cols) < FAST_SETTLEMENT_SECS
+
+
+def slow_settlement(df, cols):
+    return _settlement_secs(df, cols) > SLOW_SETTLEMENT_SECS
+
+
+def staff_discount(df, cols):
+    staff = df[cols['staff']]
+    discount = _numeric(df, cols, 'discount').fillna(0)
+    total = _numeric(df, cols, 'total').fillna(0)
+    per_staff = pd.DataFrame({'discount': discount, 'total': total}).groupby(staff).sum()
+    pct = per_staff['discount'] / per_staff['total'].where(per_staff['total'] != 0) * 100
+    heavy = pct.index[pct > STAFF_DISCOUNT_PCT]
+    return staff.isin(heavy)
+
+
+def kot_modification(df, cols):
+    secs = (_datetime(df, cols, 'kot_modified_at') - _datetime(df, cols, 'kot_time')).dt.total_seconds()
+    return (secs < KOT_EARLY_SECS) | (secs > KOT_LATE_MINS * 60)
+
+
+def complimentary_bill(df, cols):
+    return _text(df, cols, 'order_status').str.contains('complimentary', regex=False)
+
+
+def due_payment(df, cols):
+    # Bills without an invoice number or staff member are not repeats of one another
+    present = ~(_is_blank(df[cols['invoice']]) | _is_blank(df[cols['staff']]))
+    return df.duplicated(subset=[cols['invoice'], cols['staff']], keep=False) & present
+
+
+def missing_customer_details(df, cols):
+    mask = pd.Series(False, index=df.index)
+    for key in ('customer_name', 'customer_phone', 'covers', 'feedback'):
+        if key in cols:
+            mask |= _is_blank(df[cols[key]])
+    return mask
+
+
+def _has_customer_columns(cols):
+    return any(key in cols for key in ('customer_name', 'customer_phone', 'covers', 'feedback'))
+
+
+# (category, label, rule name, description, one-line solution, required columns, mask function)
+RULES = [
+    ('Aggregators', 'Red Aggregators', 'Aggregators_Discount', '> 15% Discount',
+     'Review aggregator promotions and cap discounts at 15% of the bill.',
+     ['discount', 'total'], aggregator_discount),
+    # The old prompt's 'Order Delay' (Delivery time > 30 mins) had the same condition; this rule covers it
+    ('Aggregators', 'Red Aggregators', 'Delivery_Delay', 'Delivery time > 30 mins',
+     'Coordinate with delivery partners and batch dispatches to keep delivery under 30 mins.',
+     ['delivery_time'], delivery_delay),
+    ('Aggregators', 'Red Aggregators', 'Cancelled Order', 'Order status == Cancelled',
+     'Investigate cancellation reasons with the aggregator and fix stock-outs or delays.',
+     ['order_status'], cancelled_order),
+    ('Aggregators', 'Red Aggregators', 'Prep Delay', 'Prep time > 30 mins',
+     'Prioritise aggregator tickets in the kitchen display to bring prep time under 30 mins.',
+     ['prep_time'], prep_delay),
+    ('Departments', 'Green Departments', 'Item Turn Around Time', 'Preparation_Time_Taken < 10 mins',
+     'Keep the current kitchen workflow for these items and use it as a benchmark.',
+     ['prep_time'], fast_turnaround),
+    ('Departments', 'Red Departments', 'Long Preparation_Time - For Dine In', 'Preparation time > 60 mins',
+     'Add kitchen staff at peak hours or simplify the slowest dine-in dishes.',
+     ['prep_time'], long_dine_in_prep),
+    ('Inventory', 'Orange Inventory', 'Purchase in consumption', 'consumed/purchased quantity < 85%',
+     'Reduce purchase quantities to match actual consumption and check for wastage.',
+     ['consumed_quantity', 'purchased_quantity'], low_consumption),
+    ('Inventory', 'Red Inventory', 'Double Order', 'More than 1 entry in entry_count column',
+     'Verify duplicate purchase entries with the store manager before payment.',
+     ['entry_count'], double_order),
+    ('Inventory', 'Red Inventory', 'New_Vendor', 'Getting items from new vendor instead of old supplier',
+     'Confirm the vendor switch was approved and compare quality with the old supplier.',
+     ['item', 'vendor'], new_vendor),
+    ('Inventory', 'Red Inventory', 'Vendor_change', 'Vendor changed at a higher price',
+     'Negotiate with the previous supplier or justify the higher price with procurement.',
+     ['item', 'vendor', 'price'], vendor_change),
+    ('Sales', 'Sales', 'Bill Modifications', 'The bill amount is reduced',
+     'Require manager approval for every bill amount reduction.',
+     ['total', 'original_total'], bill_modification),
+    ('Sales', 'Sales', 'Bill Settlement less than 30 seconds', 'Bill is settled in less than 30 seconds',
+     'Audit very fast settlements for bills closed without payment.',
+     ['created_at', 'settled_at'], fast_settlement),
+    ('Sales', 'Sales', 'Bill Settlement more than 15 minutes', 'Bill is settled in more than 15 minutes',
+     'Speed up the payment step with table-side payment devices.',
+     ['created_at', 'settled_at'], slow_settlement),
+    ('Sales', 'Sales', 'Discount', 'Same staff is giving too much discount',
+     'Limit discount rights for the flagged staff and review their bills.',
+     ['staff', 'discount', 'total'], staff_discount),
+    ('Sales', 'Sales', 'KOT Modification', 'KOT modified either too early or too late',
+     'Train staff to confirm orders before punching the KOT.',
+     ['kot_time', 'kot_modified_at'], kot_modification),
+    ('Sales', 'Sales', 'Long Preparation Time', 'Preparation is long',
+     'Review kitchen capacity for the slow items during peak hours.',
+     ['prep_time'], prep_delay),
+    ('Sales', 'Sales', 'Cancelled Order', 'Order is cancelled',
+     'Track cancellation reasons per staff and fix the most common ones.',
+     ['order_status'], cancelled_order),
+    ('Sales', 'Sales', 'Complimentary Bills', 'Status column is complimentary',
+     'Require a reason and manager approval for complimentary bills.',
+     ['order_status'], complimentary_bill),
+    ('Sales', 'Sales', 'Due Payments', 'Duplicate invoice number with the same staff',
+     'Reconcile duplicate invoices with the cashier before closing the day.',
+     ['invoice', 'staff'], due_payment),
+    ('Sales', 'Sales', 'No Name, No number, No Covers, No Feedback', 'Customer details are missing',
+     'Make customer name, number and covers mandatory at billing.',
+     [], missing_customer_details),
+]
+
+
+def rules_for(category):
+    """Return the rules of a category, or all rules when no category is given."""
+    if not category:
+        return list(RULES)
+    return [rule for rule in RULES if rule[0].lower() == str(category).strip().lower()]
+
+
+def _applicable(rules, cols):
+    for rule in rules:
+        required, func = rule[5], rule[6]
+        if any(key not in cols for key in required):
+            continue
+        if func is missing_customer_details and not _has_customer_columns(cols):
+            continue
+        yield rule
+
+
+def _count(func, df, cols):
+    return int(np.asarray(func(df, cols).fillna(False), dtype=bool).sum())
+
+
+def _results(rules, counts, rows):
+    results = []
+    for rule_category, label, name, description, solution, _, _ in rules:
+        count = counts.get((rule_category, name), 0)
+        if count:
+            results.append({
+                'category': rule_category,
+                'label': label,
+                'rule': name,
+                'description': description,
+                'solution': solution,
+                'count': count,
+                'rows': rows,
+            })
+    return results
+
+
+def evaluate_rules(df, category):
+    """Evaluate every applicable rule as a vectorized mask over the whole frame.
+
+    Returns one dict per rule that fired, with the number of matching rows.
+    """
+    cols = resolve_columns(df.columns)
+    rules = list(_applicable(rules_for(category), cols))
+    counts = {(rule[0], rule[2]): _count(rule[6], df, cols) for rule in rules}
+    return _results(rules, counts, len(df))
+
+
+def _as_text(series):
+    # Numbers as they are written in the CSV (12, not 12.0); missing values stay missing
+    def text(value):
+        if pd.isna(value):
+            return value
+        if isinstance(value, (bool, np.bool_)) or not float(value).is_integer():
+            return str(value)
+        return str(int(value))
+    return series.map(text).astype(object)
+
+
+def _key_values(series):
+    # Values as written in the CSV, so 101 from an int chunk and 101.0 from a float chunk are the same key
+    return _as_text(series) if pd.api.types.is_numeric_dtype(series) else series.astype(object)
+
+
+def _is_vendor_change(previous, purchase):
+    # Same test as vendor_change on (vendor, price) pairs whose missing vendor is None
+    return previous[0] is not None and purchase[0] != previous[0] and purchase[1] > previous[1]
+
+
+class _DuplicateRows:
+    """due_payment over chunks: rows seen per (invoice, staff) key hash."""
+
+    def __init__(self):
+        self.counts = {}
+
+    def add(self, chunk, cols):
+        invoice, staff = chunk[cols['invoice']], chunk[cols['staff']]
+        present = ~(_is_blank(invoice) | _is_blank(staff))
+        keys = pd.DataFrame({'invoice': _key_values(invoice[present]), 'staff': _key_values(staff[present])})
+        for key, rows in pd.util.hash_pandas_object(keys, index=False).value_counts().items():
+            self.counts[key] = self.counts.get(key, 0) + rows
+
+    def count(self):
+        return sum(rows for rows in self.counts.values() if rows > 1)
+
+
+class _StaffTotals:
+    """staff_discount over chunks: running discount, total and row count per staff member."""
+
+    def __init__(self):
+        self.totals = None
+
+    def add(self, chunk, cols):
+        part = pd.DataFrame({'discount': _numeric(chunk, cols, 'discount').fillna(0),
+                             'total': _numeric(chunk, cols, 'total').fillna(0),
+                             'rows': 1}).groupby(_key_values(chunk[cols['staff']])).sum()
+        self.totals = part if self.totals is None else self.totals.add(part, fill_value=0)
+
+    def count(self):
+        totals = self.totals
+        pct = totals['discount'] / totals['total'].where(totals['total'] != 0) * 100
+        return int(totals.loc[pct > STAFF_DISCOUNT_PCT, 'rows'].sum())
+
+
+def _purchases(chunk, cols):
+    # Item, vendor, price and date (ns, missing dates last) of the rows with an item, sorted like _vendor_history
+    frame = pd.DataFrame({'item': _key_values(chunk[cols['item']]), 'vendor': _key_values(chunk[cols['vendor']])})
+    if 'price' in cols:
+        frame['price'] = _numeric(chunk, cols, 'price')
+    if 'date' in cols:
+        dates = _datetime(chunk, cols, 'date')
+        frame['date'] = np.where(dates.isna(), np.iinfo(np.int64).max,
+                                 dates.to_numpy(dtype='datetime64[ns]').view('int64'))
+    else:
+        frame['date'] = 0
+    frame = frame[frame['item'].notna()]
+    return frame.sort_values(['item', 'date'], kind='mergesort')
+
+
+class _FirstPurchases:
+    """new_vendor over chunks: first purchase date of every (item, vendor) pair."""
+
+    def __init__(self):
+        self.first = {}  # (item, vendor) -> first date in ns
+        self.dated = True
+
+    def add(self, chunk, cols):
+        self.dated = 'date' in cols
+        purchases = _purchases(chunk, cols)
+        firsts = purchases.groupby(['item', 'vendor'], sort=False, dropna=False)['date'].min()
+        for (item, vendor), date in firsts.items():
+            key = (item, None if pd.isna(vendor) else vendor)  # NaN is not equal to itself as a dict key
+            if key not in self.first or date < self.first[key]:
+                self.first[key] = date
+
+    def count(self):
+        by_item = {}
+        for (item, _), date in self.first.items():
+            by_item.setdefault(item, []).append(date)
+        if not self.dated:
+            # In upload order every vendor after the item's first one is new
+            return sum(len(dates) - 1 for dates in by_item.values())
+        missing = np.iinfo(np.int64).max
+        return sum(sum(date != missing and date > min(dates) for date in dates) for dates in by_item.values())
+
+
+class _VendorSequence:
+    """vendor_change over chunks, without keeping the rows.
+
+    Purchases are ordered by (item, date) and then upload order, so rows of the
+    same item and date only ever get appended to their group. Each group keeps
+    its first and last (vendor, price) and the vendor changes inside it; the
+    changes between neighbouring groups are counted at the end. State grows with
+    the distinct (item, date) pairs, not with the rows.
+    """
+
+    def __init__(self):
+        self.groups = {}  # item -> {date: [first (vendor, price), last (vendor, price), changes inside]}
+
+    def add(self, chunk, cols):
+        purchases = _purchases(chunk, cols)
+        purchases['position'] = np.arange(len(purchases))
+        grouped = purchases.groupby(['item', 'date'], sort=False)
+        previous_vendor, previous_price = grouped['vendor'].shift(), grouped['price'].shift()
+        purchases['change'] = (previous_vendor.notna() & (purchases['vendor'] != previous_vendor)
+                               & (purchases['price'] > previous_price))
+        summary = grouped.agg(first=('position', 'first'), last=('position', 'last'), changes=('change', 'sum'))
+        vendors = [None if pd.isna(vendor) else vendor for vendor in purchases['vendor'].tolist()]
+        prices = purchases['price'].tolist()
+        for (item, date), first, last, changes in zip(summary.index.tolist(), summary['first'].tolist(),
+                                                      summary['last'].tolist(), summary['changes'].tolist()):
+            first, last = (vendors[first], prices[first]), (vendors[last], prices[last])
+            group = self.groups.setdefault(item, {}).get(date)
+            if group is None:
+                self.groups[item][date] = [first, last, int(changes)]
+            else:
+                group[2] += int(changes) + _is_vendor_change(group[1], first)
+                group[1] = last
+
+    def count(self):
+        total = 0
+        for dates in self.groups.values():
+            previous = None
+            for date in sorted(dates):
+                first, last, changes = dates[date]
+                total += changes + (previous is not None and _is_vendor_change(previous, first))
+                previous = last
+        return total
+
+
+# Rules that compare rows with each other, with the mergeable state that evaluates them over chunks;
+# the other rules only look at one row at a time
+CROSS_ROW_RULES = {new_vendor: _FirstPurchases, vendor_change: _VendorSequence,
+                   staff_discount: _StaffTotals, due_payment: _DuplicateRows}
+
+
+def evaluate_rules_chunked(chunks, category):
+    """Evaluate the rules over an iterator of DataFrame chunks.
+
+    Row-local rules are counted chunk by chunk. Cross-row rules (duplicates, vendor
+    history, per-staff totals) keep a small mergeable state (key counts, running
+    sums, first purchases) that each chunk is folded into, so no rows are kept
+    and peak memory is bounded by the chunk size. Gives the same result as
+    evaluate_rules on the concatenated chunks.
+    """
+    cols, rules, states = None, [], {}
+    counts, rows = {}, 0
+    for chunk in chunks:
+        if cols is None:
+            cols = resolve_columns(chunk.columns)
+            rules = list(_applicable(rules_for(category), cols))
+            states = {rule[6]: CROSS_ROW_RULES[rule[6]]() for rule in rules if rule[6] in CROSS_ROW_RULES}
+        rows += len(chunk)
+        for rule in rules:
+            if rule[6] not in CROSS_ROW_RULES:
+                key = (rule[0], rule[2])
+                counts[key] = counts.get(key, 0) + _count(rule[6], chunk, cols)
+        for state in states.values():
+            state.add(chunk, cols)
+
+    for rule in rules:
+        if rule[6] in states:
+            counts[(rule[0], rule[2])] = states[rule[6]].count()
+    return _results(rules, counts, rows)
+
+
+def format_insights(results):
+    """Turn rule results into the insight lines shown on the insights page."""
+    insights = []
+    for result in results:
+        insights.append(f"{result['label']} - {result['rule']}: {result['description']} "
+                        f"({result['count']} of {result['rows']} rows)")
+        insights.append(f"Solution: {result['solution']}")
+    return insights
@@ -1,56 +1,30 @@
 import os
 import pandas as pd
-from prophet import Prophet
-from hijri_converter import convert as hijri_convert
 import numpy as np
+from data_loader import load_csv_dir
+from calendar_features import gregorian_to_hijri, islamic_regressors
+from forecast_engine import FORECAST_OUTPUT, fit_forecast, forecast_many, refresh_forecasts
 
 # Define the path to the dataset
 DATA_DIR = './PS_DATA/'
 
 # Function to read CSV files from the sales folder
 def load_sales_data(file_path):
-    df = pd.DataFrame()
-    for root, dirs, files in os.walk(file_path):
-        for file in files:
-            if file.endswith('.csv'):
-                file_path = os.path.join(root, file)
-                temp_df = pd.read_csv(file_path)
-                if not temp_df.empty:  # Check if DataFrame is not empty before concatenation
-                    df = pd.concat([df, temp_df], ignore_index=True)
-    return df
-
-# Load sales data
-sales_data = load_sales_data(os.path.join(DATA_DIR, 'Output Ref/Sales'))
-
-# Check the structure of the loaded data
-print("Loaded Sales Data:")
-print(sales_data.head())
-
-# Check if 'Date' and 'Total_Sales' columns are present
-required_columns = ['Date', 'Total_Sales']
-for column in required_columns:
-    if column not in sales_data.columns:
-        raise KeyError(f"Missing required column: {column}")
-
-# Convert 'Date' column to datetime
-sales_data['Date'] = pd.to_datetime(sales_data['Date'], errors='coerce')
-
-# Check for NaT values after conversion
-if sales_data['Date'].isnull().any():
-    print("Warning: Some dates could not be converted. These rows will be dropped.")
-    print(sales_data[sales_data['Date'].isnull()])
-
-# Function to convert Gregorian date to Islamic (Hijri) date
-def convert_to_hijri(date):
-    if pd.isnull(date):  # Check for invalid dates
-        return np.nan  # Return NaN for invalid dates
-    try:
-        # Ensure the date is in a reasonable range
-        hijri_date = hijri_convert.Gregorian(int(date.year), int(date.month), int(date.day)).to_hijri()
-        return f"{hijri_date.year}-{hijri_date.month}-{hijri_date.day}"
-    except Exception as e:
-        print(f"Error converting date {date}: {e}")
-        return np.nan  # Return NaN if there's an error in conversion
+    return load_csv_dir(file_path)
+
+# Function to convert Gregorian dates to Islamic (Hijri) dates, vectorized over the whole column
+def convert_to_hijri(dates):
+    year, month, day = gregorian_to_hijri(dates)
+    hijri = pd.Series(year, dtype='Int64').astype(str) + '-' + pd.Series(month, dtype='Int64').astype(str) \
+        + '-' + pd.Series(day, dtype='Int64').astype(str)
+    return hijri.where(~np.isnan(year), np.nan)
+
+# Total sales per Hijri month, e.g. to compare Ramadan across years
+def hijri_monthly_sales(sales_df):
+    year, month, _ = gregorian_to_hijri(sales_df['Date'])
+    monthly = sales_df[['Total_Sales']].assign(hijri_year=year, hijri_month=month).dropna(subset=['hijri_year'])
+    monthly = monthly.astype({'hijri_year': int, 'hijri_month': int})
+    return monthly.groupby(['hijri_year', 'hijri_month'])['Total_Sales'].sum().reset_index()
 
 # Prepare forecast data for different calendar systems
 # Function to prepare forecast data for different calendar systems
@@ -73,11 +47,11 @@ def prepare_forecast_data(sales_df, calendar='gregorian'):
     # Group the data by date and sum the sales
     forecast_data = sales_df[['Date', 'Total_Sales']].groupby('Date').sum().reset_index()
     forecast_data.columns = ['ds', 'y']  # Prophet requires 'ds' (date) and 'y' (sales) columns
-    return forecast_data
-
-print("Original Date Values:")
-print(sales_data['Date'].head(10))  # Print the first 10 values
 
+    # The Islamic calendar adds Ramadan and Eid regressors derived from the Hijri date
+    if calendar == 'islamic':
+        forecast_data = forecast_data.join(islamic_regressors(forecast_data['ds']))
+    return forecast_data
 
 # Function to train and predict using Prophet
 def forecast_sales(forecast_data, periods=30):
@@ -85,25 +59,58 @@ def forecast_sales(forecast_data, periods=30):
         print("No data available for forecasting.")
         return None
 
-    model = Prophet()
-    model.fit(forecast_data)
-    future = model.make_future_dataframe(periods=periods)
-    forecast = model.predict(future)
-    return forecast
-
-# Prepare Gregorian forecast data
-gregorian_forecast_data = prepare_forecast_data(sales_data, calendar='gregorian')
-gregorian_forecast = forecast_sales(gregorian_forecast_data)
-
-# Prepare Islamic (Hijri) forecast data
-islamic_forecast_data = prepare_forecast_data(sales_data, calendar='islamic')
-islamic_forecast = forecast_sales(islamic_forecast_data)
-
-# Print the last 5 predictions for each calendar system
-if gregorian_forecast is not None:
-    print("Gregorian Calendar Forecast:")
-    print(gregorian_forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail())
-
-if islamic_forecast is not None:
-    print("\nIslamic Calendar Forecast:")
-    print(islamic_forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail())
+    return fit_forecast(forecast_data, periods)
+
+def main():
+    # Load sales data
+    sales_data = load_sales_data(os.path.join(DATA_DIR, 'Output Ref/Sales'))
+
+    # Check the structure of the loaded data
+    print("Loaded Sales Data:")
+    print(sales_data.head())
+
+    # Check if 'Date' and 'Total_Sales' columns are present
+    required_columns = ['Date', 'Total_Sales']
+    for column in required_columns:
+        if column not in sales_data.columns:
+            raise KeyError(f"Missing required column: {column}")
+
+    # Convert 'Date' column to datetime
+    sales_data['Date'] = pd.to_datetime(sales_data['Date'], errors='coerce')
+
+    # Check for NaT values after conversion
+    if sales_data['Date'].isnull().any():
+        print("Warning: Some dates could not be converted. These rows will be dropped.")
+        print(sales_data[sales_data['Date'].isnull()])
+
+    print("Original Date Values:")
+    print(sales_data['Date'].head(10))  # Print the first 10 values
+
+    # Prepare forecast data for both calendar systems, fitted in parallel
+    forecast_data = {
+        ('calendar', 'gregorian'): prepare_forecast_data(sales_data, calendar='gregorian'),
+        ('calendar', 'islamic'): prepare_forecast_data(sales_data, calendar='islamic'),
+    }
+    forecasts = forecast_many(forecast_data)
+    gregorian_forecast = forecasts.get(('calendar', 'gregorian'))
+    islamic_forecast = forecasts.get(('calendar', 'islamic'))
+
+    # Print the last 5 predictions for each calendar system
+    if gregorian_forecast is not None:
+        print("Gregorian Calendar Forecast:")
+        print(gregorian_forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail())
+
+    if islamic_forecast is not None:
+        print("\nIslamic Calendar Forecast:")
+        print(islamic_forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail())
+
+    print("\nSales per Hijri month:")
+    print(hijri_monthly_sales(sales_data).tail(12))
+
+    # Forecasts per outlet, aggregator and department; only series with new data are refitted
+    series_forecasts = refresh_forecasts(sales_data)
+    print(f"Forecast {series_forecasts.groupby(['level', 'series'], observed=True).ngroups} series to {FORECAST_OUTPUT}")
+    return {'gregorian': gregorian_forecast, 'islamic': islamic_forecast, 'series': series_forecasts}
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+import re
+import sys
+import numpy as np
+import pandas as pd
+
+# Rows sampled from each source file when inferring the dtype map
+SAMPLE_ROWS = 10_000
+
+# Text columns with few distinct values are stored as categoricals
+CATEGORY_MAX_UNIQUE = 50
+CATEGORY_MAX_RATIO = 0.5
+
+# Text columns are parsed as datetimes when their name hints at it and most values parse
+DATETIME_HINTS = ('date', 'time', '_at')
+DATETIME_MIN_PARSED = 0.9
+
+# Times of day without a date (e.g. '19:45', '7:45 PM'); kept as text instead of becoming today's datetime
+TIME_OF_DAY = re.compile(r'^\s*\d{1,2}:\d{2}(:\d{2}(\.\d+)?)?\s*([AaPp][Mm])?\s*$')
+
+
+def infer_column_type(series):
+    """Infer the storage type of one column from a sample: int, float, datetime, category or object."""
+    values = series.dropna()
+    if pd.api.types.is_bool_dtype(series) or values.empty:
+        return 'object'
+    if pd.api.types.is_numeric_dtype(series):
+        return 'int' if np.all(np.mod(values, 1) == 0) and not series.isna().any() else 'float'
+    if any(hint in str(series.name).lower() for hint in DATETIME_HINTS) and \
+            values.astype(str).str.match(TIME_OF_DAY).mean() < DATETIME_MIN_PARSED:
+        parsed = pd.to_datetime(values.astype(str), errors='coerce')
+        if parsed.notna().mean() >= DATETIME_MIN_PARSED:
+            return 'datetime'
+    unique = values.nunique()
+    if unique <= CATEGORY_MAX_UNIQUE and unique <= CATEGORY_MAX_RATIO * len(values):
+        return 'category'
+    return 'object'
+
+
+def infer_schema(files, sample_rows=SAMPLE_ROWS, **read_kwargs):
+    """Build a dtype map for a dataset by sampling the head of each source file once."""
+    samples = [pd.read_csv(file, nrows=sample_rows, **read_kwargs) for file in files]
+    samples = [sample for sample in samples if not sample.empty]
+    if not samples:
+        return {}
+    sample = pd.concat(samples, ignore_index=True)
+    return {col: infer_column_type(sample[col]) for col in sample.columns}
+
+
+def read_dtypes(schema):
+    """dtype argument for pd.read_csv: categoricals are built while parsing."""
+    return {col: 'category' for col, kind in schema.items() if kind == 'category'}
+
+
+def _downcast_float(series):
+    # Only use float32 when every value survives the round trip exactly (99.99 does not)
+    downcast = series.astype('float32')
+    if ((downcast.astype('float64') == series) | series.isna()).all():
+        return downcast
+    return series
+
+
+def _adds_nulls(converted, original):
+    # A value that was present but did not convert would be silently lost
+    return bool((converted.isna() & original.notna()).any())
+
+
+def apply_schema(df, schema):
+    """Convert a frame read with read_dtypes to the remaining types of the dtype map.
+
+    The types come from a head sample, so a column is only converted when every
+    value converts; one with e.g. a late 'B-12' invoice is left as read.
+    """
+    for col, kind in schema.items():
+        if col not in df.columns:
+            continue
+        if kind == 'datetime':
+            parsed = pd.to_datetime(df[col], errors='coerce')
+            if not _adds_nulls(parsed, df[col]):
+                df[col] = parsed
+        elif kind in ('int', 'float'):
+            values = pd.to_numeric(df[col], errors='coerce')
+            if _adds_nulls(values, df[col]):
+                continue
+            if kind == 'int' and not values.isna().any():
+                df[col] = pd.to_numeric(values, downcast='integer')
+            else:
+                df[col] = _downcast_float(values.astype('float64'))
+    return df
+
+
+def memory_report(raw, typed):
+    """Bytes used per column before and after applying the dtype map."""
+    before = raw.memory_usage(index=False, deep=True)
+    after = typed.memory_usage(index=False, deep=True).reindex(before.index)
+    report = pd.DataFrame({
+        'raw_dtype': raw.dtypes.astype(str),
+        'typed_dtype': typed.dtypes.reindex(before.index).astype(str),
+        'raw_bytes': before,
+        'typed_bytes': after,
+    })
+    report['saved_bytes'] = report['raw_bytes'] - report['typed_bytes']
+    report.loc['TOTAL'] = ['', '', before.sum(), after.sum(), before.sum() - after.sum()]
+    return report
+
+
+def main(data_dir):
+    from data_loader import load_csv_dir
+    raw = load_csv_dir(data_dir, use_cache=False, infer_types=False, low_memory=False)
+    typed = load_csv_dir(data_dir, use_cache=False, low_memory=False)
+    print(memory_report(raw, typed).to_string())
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else './PS_DATA/Raw')
@@ -0,0 +1,272 @@
+import os
+import ast
+import glob
+import json
+import time
+import hashlib
+import argparse
+import importlib
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import joblib
+from data_loader import list_csv_files
+
+# Stage outputs and the file content hashes, reused between runs
+STAGE_CACHE_DIR = os.getenv('STAGE_CACHE_DIR', './PS_DATA/.cache/stages')
+
+DATA_DIR = './PS_DATA'
+OUTPUT_REF_DIR = os.path.join(DATA_DIR, 'Output Ref')
+PREPARED_DIR = os.path.join(DATA_DIR, 'Prepared from Raw')
+
+# Modules below this directory are project code and count as inputs of the stages importing them
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class Stage:
+    """One step of the pipeline.
+
+    `func` is a 'module:function' called as function(*dependency outputs, **params).
+    `inputs` are the files or directories it reads; their content, the source of
+    the module and of the project modules it imports, the params and the
+    dependencies' fingerprints make up the stage's fingerprint.
+    """
+
+    def __init__(self, name, func, inputs=(), deps=(), params=None):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.deps = list(deps)
+        self.params = params or {}
+
+
+# The project's scripts as stages; training, issue detection and forecasting are independent
+STAGES = [
+    Stage('datasets', 'data_ingestion:summarize_datasets', inputs=[OUTPUT_REF_DIR]),
+    Stage('raw_data', 'pipeline:load_data', inputs=[os.path.join(DATA_DIR, 'Raw')],
+          params={'data_dir': os.path.join(DATA_DIR, 'Raw')}),
+    Stage('prepared_data', 'pipeline:prepare_stage', deps=['raw_data']),
+    Stage('order_status_model', 'pipeline:train_stage', deps=['prepared_data']),
+    Stage('issues', 'issue_detection:run_checks', inputs=[OUTPUT_REF_DIR]),
+    Stage('sales_forecast', 'sales_forecast:main', inputs=[os.path.join(OUTPUT_REF_DIR, 'Sales')]),
+    Stage('sales_regressor', 'time-series:main',
+          inputs=[os.path.join(PREPARED_DIR, 'SWIGGY_MASTERDATA.csv'), os.path.join(PREPARED_DIR, 'ZOMATO_MASTERDATA.csv')],
+          params={'swiggy_file_path': os.path.join(PREPARED_DIR, 'SWIGGY_MASTERDATA.csv'),
+                  'zomato_file_path': os.path.join(PREPARED_DIR, 'ZOMATO_MASTERDATA.csv'),
+                  'future_days': 30, 'plot': False}),
+]
+
+
+def _files(path):
+    if os.path.isdir(path):
+        return list_csv_files(path)
+    return [path] if os.path.exists(path) else []
+
+
+def file_hash(path, index):
+    """Content hash of a file, recomputed only when its mtime or size changed."""
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    signature = [stat.st_mtime_ns, stat.st_size]
+    entry = index.get(key)
+    if entry and entry['signature'] == signature:
+        return entry['sha1']
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    index[key] = {'signature': signature, 'sha1': digest.hexdigest()}
+    return index[key]['sha1']
+
+
+def _imports(path):
+    # Top-level names of every module imported in a file, including imports inside functions
+    with open(path, 'rb') as f:
+        tree = ast.parse(f.read(), path)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            yield from (alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            yield node.module.split('.')[0]
+
+
+def module_files(module_name, root=None):
+    """Source files of a project module and of the project modules it imports, transitively."""
+    root = os.path.abspath(root or PROJECT_DIR)
+    files, todo = set(), [module_name]
+    while todo:
+        try:
+            spec = importlib.util.find_spec(todo.pop())
+        except (ImportError, ValueError):
+            continue
+        origin = os.path.abspath(spec.origin) if spec and spec.origin and spec.origin.endswith('.py') else None
+        if origin is None or origin in files or not origin.startswith(root + os.sep) or 'site-packages' in origin:
+            continue
+        files.add(origin)
+        todo.extend(_imports(origin))
+    return sorted(files)
+
+
+def fingerprint(stage, dep_fingerprints, index):
+    digest = hashlib.sha1(json.dumps([stage.name, stage.func, stage.params, dep_fingerprints],
+                                     sort_keys=True, default=str).encode('utf-8'))
+    # The stage's code and the project modules it uses count as inputs, so editing them reruns the stage
+    for path in stage.inputs + module_files(stage.func.split(':')[0]):
+        for file in _files(path):
+            digest.update(f"{file}:{file_hash(file, index)}".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def _output_path(cache_dir, stage, digest):
+    return os.path.join(cache_dir, f'{stage.name}-{digest}.joblib')
+
+
+def _prune(cache_dir, stage, keep):
+    # Outputs of earlier fingerprints of the stage can never be loaded again
+    pattern = os.path.join(glob.escape(cache_dir), glob.escape(stage.name) + '-' + '[0-9a-f]' * 16 + '.joblib')
+    for path in glob.glob(pattern):
+        if os.path.abspath(path) != os.path.abspath(keep):
+            os.remove(path)
+
+
+def _run_stage(task):
+    # Runs in a worker process: load the dependencies' outputs, run, store the output
+    func, params, dep_paths, output_path = task
+    start = time.perf_counter()
+    module_name, func_name = func.split(':')
+    function = getattr(importlib.import_module(module_name), func_name)
+    result = function(*[joblib.load(path) for path in dep_paths], **params)
+    joblib.dump(result, output_path)
+    return time.perf_counter() - start
+
+
+def _order(stages):
+    by_name = {stage.name: stage for stage in stages}
+    ordered, seen = [], set()
+
+    def visit(stage, path=()):
+        if stage.name in path:
+            raise ValueError(f"Stage dependency cycle: {' -> '.join(path + (stage.name,))}")
+        if stage.name in seen:
+            return
+        for dep in stage.deps:
+            visit(by_name[dep], path + (stage.name,))
+        seen.add(stage.name)
+        ordered.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return ordered
+
+
+def _closure(stages, targets):
+    """The target stages and everything they depend on."""
+    by_name = {stage.name: stage for stage in stages}
+    needed, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in needed:
+            needed.add(name)
+            todo.extend(by_name[name].deps)
+    return [stage for stage in stages if stage.name in needed]
+
+
+def _fingerprints(stages, cache_dir):
+    # Stages must be in dependency order; the file hash index is kept next to the outputs
+    os.makedirs(cache_dir, exist_ok=True)
+    index_path = os.path.join(cache_dir, 'file_hashes.json')
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            index = json.load(f)
+    fingerprints = {}
+    for stage in stages:
+        fingerprints[stage.name] = fingerprint(stage, [fingerprints[dep] for dep in stage.deps], index)
+    with open(index_path, 'w') as f:
+        json.dump(index, f)
+    return fingerprints
+
+
+def run(stages=STAGES, targets=None, cache_dir=STAGE_CACHE_DIR, max_workers=None, force=()):
+    """Run the stages whose fingerprint changed, independent ones in parallel processes.
+
+    `targets` limits the run to these stages and what they depend on; stages in
+    `force` run even when cached. Returns the report: one dict per stage with its
+    status ('cached', 'ran', 'failed' or 'skipped'), seconds and output path.
+    """
+    if targets:
+        stages = _closure(stages, targets)
+    stages = _order(stages)
+    fingerprints = _fingerprints(stages, cache_dir)
+    paths = {stage.name: _output_path(cache_dir, stage, fingerprints[stage.name]) for stage in stages}
+    by_name = {stage.name: stage for stage in stages}
+
+    report = {stage.name: {'stage': stage.name, 'status': 'pending', 'seconds': 0.0,
+                           'output': paths[stage.name]} for stage in stages}
+    for stage in stages:
+        if stage.name not in force and os.path.exists(paths[stage.name]):
+            report[stage.name]['status'] = 'cached'
+
+    running = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            for stage in stages:
+                entry = report[stage.name]
+                if entry['status'] != 'pending':
+                    continue
+                dep_status = [report[dep]['status'] for dep in stage.deps]
+                if any(status in ('failed', 'skipped') for status in dep_status):
+                    entry['status'] = 'skipped'
+                elif all(status in ('cached', 'ran') for status in dep_status):
+                    entry['status'] = 'running'
+                    task = (stage.func, stage.params, [paths[dep] for dep in stage.deps], paths[stage.name])
+                    running[executor.submit(_run_stage, task)] = stage.name
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                entry = report[name]
+                try:
+                    entry['seconds'] = round(future.result(), 3)
+                    entry['status'] = 'ran'
+                    _prune(cache_dir, by_name[name], paths[name])
+                except Exception as e:  # the other branches keep running
+                    entry['status'], entry['error'] = 'failed', repr(e)
+    return list(report.values())
+
+
+def load_output(name, stages=STAGES, cache_dir=STAGE_CACHE_DIR):
+    """Output of a stage for the current inputs, or None when it has not run for them."""
+    needed = _order(_closure(stages, [name]))
+    fingerprints = _fingerprints(needed, cache_dir)
+    stage = next(stage for stage in needed if stage.name == name)
+    path = _output_path(cache_dir, stage, fingerprints[name])
+    return joblib.load(path) if os.path.exists(path) else None
+
+
+def print_report(report):
+    print(f"{'Stage':<20} {'Status':<8} {'Seconds':>8}")
+    for entry in report:
+        print(f"{entry['stage']:<20} {entry['status']:<8} {entry['seconds']:>8.2f}"
+              + (f"  {entry['error']}" if entry.get('error') else ''))
+    print(f"{'Total':<29} {sum(entry['seconds'] for entry in report):>8.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the pipeline stages, skipping the unchanged ones.')
+    parser.add_argument('targets', nargs='*', help='stages to run with their dependencies (default: all)')
+    parser.add_argument('--force', nargs='*', default=[], help='stages to rerun even when cached')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--report', help='write the timing report to this JSON file')
+    args = parser.parse_args(argv)
+
+    report = run(targets=args.targets or None, max_workers=args.workers, force=set(args.force))
+    print_report(report)
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    main()
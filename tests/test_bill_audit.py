@@ -0,0 +1,48 @@
+import pandas as pd
+
+from bill_audit import BillAudit, DUE_PAYMENT, audit_bills
+
+
+def _bills(invoices, staff='amit'):
+    return pd.DataFrame({'Invoice_No': invoices, 'Staff': staff})
+
+
+def test_repeat_in_later_update_reports_first_row_once():
+    audit = BillAudit()
+    assert audit.update(_bills([1, 2, 3])).empty
+    found = audit.update(_bills([2, 4]))
+    assert sorted(found['row_id']) == [1, 3]
+    assert found.set_index('row_id').loc[1, 'invoice'] == 2
+    # A third occurrence only reports the new row
+    assert audit.update(_bills([2]))['row_id'].tolist() == [5]
+
+
+def test_reported_first_rows_are_dropped_from_the_index():
+    audit = BillAudit()
+    audit.update(_bills([1, 2, 3]))
+    audit.update(_bills([2]))
+    assert len(audit.invoices) == 3
+    assert 1 not in [row for row, *_ in audit.invoices.once.values()]
+
+
+def test_incremental_matches_single_pass():
+    invoices = [5, 1, 5, 2, 3, 1, 7, 2, 9, 5]
+    whole = audit_bills([_bills(invoices)])
+    chunked = audit_bills(_bills(invoices[i:i + 3]) for i in range(0, len(invoices), 3))
+    assert sorted(chunked['row_id']) == sorted(whole['row_id']) == [0, 1, 2, 3, 5, 7, 9]
+    assert set(chunked['violation']) == {DUE_PAYMENT}
+
+
+def test_same_invoice_in_int_and_float_chunks():
+    # The second chunk has a missing invoice, so pandas reads it as floats (101.0)
+    chunks = [_bills([101, 102]), _bills([101, None])]
+    assert chunks[1]['Invoice_No'].dtype == 'float64'
+    whole = audit_bills([pd.concat(chunks, ignore_index=True)])
+    chunked = audit_bills(chunks)
+    assert sorted(chunked['row_id']) == sorted(whole['row_id']) == [0, 2]
+
+
+def test_bills_without_invoice_are_not_due_payments():
+    bills = pd.DataFrame({'Invoice_No': [None, None, ' ', 7], 'Staff': ['amit', 'amit', 'amit', None]})
+    assert audit_bills([bills]).empty
+    assert audit_bills([bills.iloc[:2], bills.iloc[2:], bills.iloc[:2]]).empty
@@ -0,0 +1,21 @@
+import warnings
+
+import pandas as pd
+
+from encoders import CategoryEncoder
+
+
+def test_unseen_and_missing_values_get_minus_one():
+    encoder = CategoryEncoder().fit(pd.DataFrame({'Outlet': ['a', 'b', 'a']}))
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        codes = encoder.transform(pd.DataFrame({'Outlet': ['b', 'c', None, 'a']}))['Outlet']
+    assert codes.tolist() == [1, -1, -1, 0]
+
+
+def test_codes_stay_the_same_after_partial_fit():
+    encoder = CategoryEncoder().fit(pd.DataFrame({'Day': pd.to_datetime(['2024-01-02', '2024-01-01'])}))
+    before = encoder.transform(pd.DataFrame({'Day': ['2024-01-01', '2024-01-03']}))['Day'].tolist()
+    encoder.partial_fit(pd.DataFrame({'Day': pd.to_datetime(['2024-01-03', '2024-01-01'])}))
+    after = encoder.transform(pd.DataFrame({'Day': ['2024-01-01', '2024-01-03']}))['Day'].tolist()
+    assert before == [0, -1] and after == [0, 2]
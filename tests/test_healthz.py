@@ -0,0 +1,20 @@
+import app as app_module
+
+
+def test_healthz_reports_the_app_handling_the_request():
+    flask_app = app_module.create_app()
+    flask_app.config['STARTUP_SECONDS'] = 12.5
+    body = flask_app.test_client().get('/healthz').get_json()
+    assert body['startup_seconds'] == 12.5
+    assert app_module.app.test_client().get('/healthz').get_json()['startup_seconds'] != 12.5
+
+
+def test_healthz_reports_insight_cache_hits(tmp_path, monkeypatch):
+    from insight_cache import InsightCache
+    cache = InsightCache(str(tmp_path / 'cache.sqlite'))
+    monkeypatch.setattr(app_module, 'get_insight_cache', lambda: cache)
+    cache.set('k', 'v')
+    cache.get('k')
+    cache.get('missing')
+    stats = app_module.app.test_client().get('/healthz').get_json()['insight_cache']
+    assert (stats['hits'], stats['misses'], stats['disk_entries']) == (1, 1, 1)
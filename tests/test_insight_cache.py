@@ -0,0 +1,60 @@
+import time
+
+import insight_cache
+from insight_cache import InsightCache, cache_key
+
+
+def test_cache_key_separates_parts():
+    assert cache_key('ab', 'c') != cache_key('a', 'bc')
+    assert cache_key('a', 1) == cache_key('a', '1')
+
+
+def test_memory_lru_evicts_least_recently_used(tmp_path):
+    cache = InsightCache(str(tmp_path / 'cache.sqlite'), memory_size=2)
+    cache.set('a', '1')
+    cache.set('b', '2')
+    assert cache.get('a') == '1'
+    cache.set('c', '3')
+    # 'b' was used least recently, so it left memory; 'a' stayed
+    assert list(cache._memory) == ['a', 'c']
+    assert cache.stats()['memory_evictions'] == 1
+    # The evicted entry is still served from SQLite and comes back into memory
+    assert cache.get('b') == '2'
+    assert list(cache._memory) == ['c', 'b']
+    assert (cache.hits, cache.misses) == (2, 0)
+
+
+def test_entries_are_read_back_from_sqlite(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    InsightCache(path).set('k', 'text')
+    # A fresh instance (another process) has an empty memory layer
+    other = InsightCache(path)
+    assert not other._memory
+    assert other.get('k') == 'text'
+    assert other.get('missing') is None
+    assert other.stats() == {'hits': 1, 'misses': 1, 'memory_entries': 1,
+                             'memory_evictions': 0, 'disk_entries': 1}
+
+
+def test_disk_store_keeps_most_recently_used(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    cache = InsightCache(path, memory_size=0, max_entries=2)
+    cache.set('a', '1')
+    time.sleep(0.01)
+    cache.set('b', '2')
+    time.sleep(0.01)
+    assert cache.get('a') == '1'
+    time.sleep(0.01)
+    cache.set('c', '3')
+    other = InsightCache(path)
+    assert other.get('b') is None
+    assert other.get('a') == '1' and other.get('c') == '3'
+
+
+def test_expired_entries_are_missing(tmp_path, monkeypatch):
+    cache = InsightCache(str(tmp_path / 'cache.sqlite'), ttl=60)
+    cache.set('k', 'v')
+    later = time.time() + 120
+    monkeypatch.setattr(insight_cache.time, 'time', lambda: later)
+    assert cache.get('k') is None
+    assert InsightCache(cache.path, ttl=60).get('k') is None
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from inventory_reconciliation import VendorHistory, vendor_changes
+from rule_engine import new_vendor, resolve_columns
+
+COMPARED = ['item', 'date', 'vendor', 'price', 'previous_vendor', 'new_vendor', 'vendor_change']
+
+
+def _purchases(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Item': rng.choice(list('abcde'), n),
+        'Vendor': rng.choice(['v1', 'v2', 'v3'], n),
+        'Price': rng.integers(1, 20, n),
+        'Date': pd.Timestamp('2024-01-01') + pd.to_timedelta(np.arange(n), unit='h'),
+    })
+
+
+def test_check_compares_the_batch_with_itself():
+    batch = pd.DataFrame({'Item': ['x', 'x'], 'Vendor': ['v1', 'v2'], 'Price': [1, 2],
+                          'Date': ['2024-01-01', '2024-01-02']})
+    flagged = VendorHistory().check(batch)
+    assert flagged[['vendor', 'new_vendor', 'vendor_change']].values.tolist() == [['v2', True, True]]
+    assert len(vendor_changes(batch)) == 1
+
+
+def test_incremental_checks_match_full_history():
+    df = _purchases()
+    history = VendorHistory()
+    flagged = pd.concat([history.check(df.iloc[i:i + 70]) for i in range(0, len(df), 70)])
+    pd.testing.assert_frame_equal(flagged[COMPARED].sort_index(), vendor_changes(df)[COMPARED].sort_index())
+    assert len(history) == len(df)
+
+
+def test_out_of_order_history_stays_sorted():
+    df = _purchases()
+    history = VendorHistory()
+    shuffled = df.iloc[:500].sample(frac=1, random_state=0)
+    for i in range(0, 500, 60):
+        history.add(shuffled.iloc[i:i + 60])
+    assert all(dates == sorted(dates) for dates, _, _ in history.blocks.values())
+    flagged = history.check(df.iloc[500:])
+    expected = vendor_changes(df).loc[lambda frame: frame.index >= 500]
+    assert flagged[COMPARED].sort_index().equals(expected[COMPARED].sort_index())
+    item, date = df.loc[450, 'Item'], df.loc[450, 'Date']
+    earlier = df[(df['Item'] == item) & (df['Date'] < date)].iloc[-1]
+    assert history.previous(item, date) == (earlier['Vendor'], earlier['Price'])
+
+
+def test_new_vendor_rule_matches_vendor_changes():
+    df = _purchases(seed=1)
+    assert new_vendor(df, resolve_columns(df.columns)).sum() == vendor_changes(df)['new_vendor'].sum()
@@ -0,0 +1,88 @@
+import io
+import os
+import time
+
+import pytest
+
+import app as app_module
+import job_queue
+from job_queue import JobQueue, run_worker
+from results_store import ResultStore
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite'))
+    monkeypatch.setattr(app_module, 'get_job_queue', lambda: queue)
+    monkeypatch.setattr(app_module, 'get_result_store', lambda: ResultStore(str(tmp_path / 'results')))
+    monkeypatch.setattr(app_module, 'JOB_WORKERS', 0)
+    monkeypatch.setattr(app_module, 'USE_LLM', False)
+    return queue
+
+
+def _sales_csv(rows=30):
+    return ('Invoice_No,Staff,Total\n' + ''.join(f'{i % 25},amit,100\n' for i in range(rows))).encode('utf-8')
+
+
+def test_submitted_job_runs_from_another_directory(tmp_path, monkeypatch, queue):
+    monkeypatch.chdir(tmp_path)
+    response = app_module.app.test_client().post(
+        '/submit', data={'category': 'Sales', 'csv_files': (io.BytesIO(_sales_csv()), 'sales.csv')},
+        headers={'Accept': 'application/json'})
+    assert response.status_code == 202
+    job_dir = tmp_path / 'uploads' / response.json['job_id']
+    assert job_dir.is_dir()
+
+    # The worker does not share the web app's working directory
+    os.makedirs(tmp_path / 'worker')
+    monkeypatch.chdir(tmp_path / 'worker')
+    run_worker(queue.path, max_jobs=1)
+    job = queue.get(response.json['job_id'])
+    assert job['status'] == 'done', job['error']
+    assert any('Due Payments' in line for line in job['result']['insights'])
+    assert not job_dir.exists()
+
+
+def test_uploads_are_removed_when_the_job_fails(tmp_path):
+    job_dir = tmp_path / 'job'
+    job_dir.mkdir()
+    payload = {'category': 'Sales', 'files': [str(job_dir / 'missing.csv')], 'dir': str(job_dir)}
+    with pytest.raises(FileNotFoundError):
+        app_module.run_insights_job(payload, lambda progress=None, message=None: None)
+    assert not job_dir.exists()
+
+
+def test_job_reports_a_heartbeat_per_chunk(tmp_path, monkeypatch, queue):
+    monkeypatch.setattr('upload_ingestion.CHUNK_ROWS', 10)
+    path = tmp_path / 'sales.csv'
+    path.write_bytes(_sales_csv(rows=35))
+    reports = []
+    payload = {'category': 'Sales', 'files': [str(path)], 'dir': str(tmp_path / 'job')}
+    app_module.run_insights_job(payload, lambda progress=None, message=None: reports.append(progress))
+    assert reports.count(None) == 4
+
+
+def test_heartbeat_keeps_a_running_job_from_being_requeued(monkeypatch, queue):
+    monkeypatch.setattr(job_queue, 'STALE_SECS', 0.2)
+    job_id = queue.submit('insights', {})
+    queue.claim('w1')
+    queue.report(job_id, 0.5, 'Halfway')
+    time.sleep(0.25)
+    queue.report(job_id)
+    assert queue.claim('w2') is None
+    job = queue.get(job_id)
+    assert (job['status'], job['progress'], job['message']) == ('running', 0.5, 'Halfway')
+
+    time.sleep(0.25)
+    assert queue.claim('w2')['id'] == job_id
+
+
+def test_uploads_go_to_the_configured_folder(tmp_path, queue):
+    flask_app = app_module.create_app({'UPLOAD_FOLDER': str(tmp_path / 'configured')})
+    response = flask_app.test_client().post(
+        '/submit', data={'category': 'Sales', 'csv_files': (io.BytesIO(_sales_csv()), 'sales.csv')},
+        headers={'Accept': 'application/json'})
+    assert response.status_code == 202
+    job = queue.claim('w1')
+    assert job['payload']['dir'] == str(tmp_path / 'configured' / response.json['job_id'])
+    assert all(path.startswith(job['payload']['dir'] + os.sep) for path in job['payload']['files'])
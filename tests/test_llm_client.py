@@ -0,0 +1,111 @@
+import threading
+import time
+
+import pytest
+
+import llm_client
+
+
+class FakeResponse:
+    def __init__(self, text):
+        part = type('Part', (), {'text': text})()
+        content = type('Content', (), {'parts': [part]})()
+        self.candidates = [type('Candidate', (), {'content': content})()] if text is not None else []
+
+
+class FakeModel:
+    """Stands in for genai.GenerativeModel: answers 'echo: <prompt>' after an optional delay or failures."""
+
+    def __init__(self, delays=None, failures=0, error=RuntimeError):
+        self.delays = delays or {}
+        self.failures = failures
+        self.error = error
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, request_options=None):
+        with self._lock:
+            self.calls.append((prompt, request_options))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            failing = self.failures > 0
+            self.failures -= 1
+        try:
+            if self.delays.get(prompt):
+                time.sleep(self.delays[prompt])
+            if failing:
+                raise self.error('fake failure')
+            return FakeResponse(f'echo: {prompt}')
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(llm_client.time, 'sleep', recorded.append)
+    return recorded
+
+
+def test_generate_text_returns_first_candidate():
+    model = FakeModel()
+    assert llm_client.generate_text('hi', model_factory=lambda name: model) == 'echo: hi'
+
+
+def test_generate_text_passes_timeout():
+    model = FakeModel()
+    llm_client.generate_text('hi', model_factory=lambda name: model, timeout=7)
+    assert model.calls == [('hi', {'timeout': 7})]
+
+
+def test_generate_text_retries_with_backoff(sleeps):
+    model = FakeModel(failures=2)
+    text = llm_client.generate_text('hi', model_factory=lambda name: model, retries=3, backoff=1)
+    assert text == 'echo: hi'
+    assert len(model.calls) == 3
+    # Exponential backoff with up to 100% jitter
+    assert 1 <= sleeps[0] <= 2 and 2 <= sleeps[1] <= 4
+
+
+def test_generate_text_gives_up_after_timeouts(sleeps, caplog):
+    model = FakeModel(failures=10, error=TimeoutError)
+    text = llm_client.generate_text('hi', model_factory=lambda name: model, retries=2, backoff=0.5)
+    assert text is None
+    assert len(model.calls) == 3
+    assert len(sleeps) == 2
+    assert 'failed after 3 attempts' in caplog.text
+
+
+def test_generate_text_without_candidates():
+    model = FakeModel()
+    model.generate_content = lambda prompt, request_options=None: FakeResponse(None)
+    assert llm_client.generate_text('hi', model_factory=lambda name: model) is None
+
+
+def test_generate_many_keeps_order():
+    prompts = ['a', 'b', 'c', 'd']
+    model = FakeModel(delays={'a': 0.05, 'b': 0.0, 'c': 0.03, 'd': 0.01})
+    texts = llm_client.generate_many(prompts, max_workers=4, model_factory=lambda name: model)
+    assert texts == ['echo: a', 'echo: b', 'echo: c', 'echo: d']
+
+
+def test_generate_many_empty():
+    assert llm_client.generate_many([]) == []
+
+
+def test_concurrency_limit_is_shared_by_requests(monkeypatch):
+    monkeypatch.setattr(llm_client, '_call_slots', threading.BoundedSemaphore(2))
+    model = FakeModel(delays={f'p{i}': 0.02 for i in range(12)})
+    requests = [threading.Thread(target=llm_client.generate_many,
+                                 args=([f'p{i}' for i in range(j, 12, 3)],),
+                                 kwargs={'max_workers': 4, 'model_factory': lambda name: model})
+                for j in range(3)]
+    for thread in requests:
+        thread.start()
+    for thread in requests:
+        thread.join()
+    assert len(model.calls) == 12
+    assert model.max_in_flight <= 2
@@ -0,0 +1,81 @@
+import io
+
+import pandas as pd
+import pytest
+from sklearn.tree import DecisionTreeClassifier
+
+import app as app_module
+from encoders import CategoryEncoder
+from predict import predict_frame
+
+
+@pytest.fixture
+def predictor():
+    train = pd.DataFrame({'Outlet': ['a', 'b'] * 20, 'Total': range(40), 'Order_Status_z': [0, 1] * 20})
+    encoder = CategoryEncoder().fit(train, ['Outlet'])
+    features = ['Outlet', 'Total']
+    model = DecisionTreeClassifier().fit(encoder.transform(train[features]), train['Order_Status_z'])
+    return model, {'features': features, 'version': 1}, encoder
+
+
+@pytest.fixture
+def client():
+    return app_module.app.test_client()
+
+
+def test_csv_upload_is_predicted_chunk_by_chunk(monkeypatch, client, predictor):
+    monkeypatch.setattr(app_module, 'get_predictor', lambda: predictor)
+    monkeypatch.setattr('upload_ingestion.CHUNK_ROWS', 7)
+    rows = pd.DataFrame({'Outlet': ['a', 'b', 'c'] * 10, 'Total': range(30)})
+    data = rows.to_csv(index=False).encode('utf-8')
+    response = client.post('/predict', data={'csv_file': (io.BytesIO(data), 'rows.csv')})
+    assert response.status_code == 200
+    streamed = pd.read_csv(io.BytesIO(response.data), comment='#')
+    expected = predict_frame(rows, predictor).reset_index(drop=True)
+    pd.testing.assert_frame_equal(streamed, expected, check_dtype=False)
+    # The stream closes with the totals the JSON path sends as headers
+    summary = response.data.decode('utf-8').splitlines()[-1]
+    assert summary.startswith('# X-Prediction-Rows: 30, X-Prediction-Latency-Ms: ')
+    assert 'X-Prediction-Rows-Per-Sec: ' in summary
+
+
+def test_missing_features_give_400(monkeypatch, client, predictor):
+    monkeypatch.setattr(app_module, 'get_predictor', lambda: predictor)
+    response = client.post('/predict', data={'csv_file': (io.BytesIO(b'Outlet\na\n'), 'rows.csv')})
+    assert response.status_code == 400
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr('model_registry.REGISTRY_DIR', str(tmp_path / 'models'))
+    app_module._load_predictor.cache_clear()
+    yield
+    app_module._load_predictor.cache_clear()
+
+
+def _register(predictor, with_encoder=True):
+    from model_registry import register_model
+    from predict import MODEL_NAME
+    model, metadata, encoder = predictor
+    artifacts = {'encoder': encoder} if with_encoder else None
+    return register_model(model, MODEL_NAME, metadata['features'], 'hash', artifacts=artifacts)
+
+
+def test_model_registered_after_startup_is_used(client, registry, predictor):
+    records = [{'Outlet': 'a', 'Total': 1}]
+    assert client.post('/predict', json=records).status_code == 503
+    _register(predictor, with_encoder=False)
+    assert client.post('/predict', json=records).status_code == 503
+    version = _register(predictor)
+    response = client.post('/predict', json=records)
+    assert response.status_code == 200
+    assert response.headers['X-Model-Version'] == version
+
+
+def test_new_current_version_replaces_the_loaded_one(client, registry, predictor):
+    from model_registry import set_current
+    from predict import MODEL_NAME
+    first, second = _register(predictor), _register(predictor)
+    assert client.post('/predict', json=[{'Outlet': 'a', 'Total': 1}]).headers['X-Model-Version'] == second
+    set_current(MODEL_NAME, first)
+    assert client.post('/predict', json=[{'Outlet': 'a', 'Total': 1}]).headers['X-Model-Version'] == first
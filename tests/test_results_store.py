@@ -0,0 +1,78 @@
+import io
+import os
+import time
+
+import pandas as pd
+import pytest
+from flask import render_template
+
+import app as app_module
+import results_store
+from results_store import FORMATS, ResultStore
+
+
+def _age(store, result_id, seconds):
+    # Pretend the result was written `seconds` ago
+    created = time.time() - seconds
+    os.utime(store._file(result_id), (created, created))
+
+
+def test_roundtrip_through_memory_and_disk(tmp_path):
+    store = ResultStore(str(tmp_path))
+    result_id = store.put(['a', 'b,c'])
+    assert store.get(result_id) == ['a', 'b,c']
+    # Another process (a fresh store) reads it back from disk
+    other = ResultStore(str(tmp_path))
+    assert other.get(result_id) == ['a', 'b,c']
+    assert b''.join(other.stream(result_id)) == b'Insight\na\n"b,c"\n'
+    assert other.get('../etc/passwd') is None and other.get('0' * 32) is None
+
+
+def test_memory_lru_spills_to_disk(tmp_path):
+    store = ResultStore(str(tmp_path), memory_size=2)
+    ids = [store.put([str(i)]) for i in range(3)]
+    assert list(store._memory) == ids[1:]
+    assert store.memory_evictions == 1
+    # The evicted result is still served from disk and becomes the most recent entry again
+    assert store.get(ids[0]) == ['0']
+    assert list(store._memory) == [ids[2], ids[0]]
+    assert store.stats()['disk_entries'] == 3
+
+
+def test_expired_results_are_removed(tmp_path, monkeypatch):
+    store = ResultStore(str(tmp_path), ttl=60)
+    result_id = store.put(['old'])
+    assert store.get(result_id) == ['old']
+    later = time.time() + 120
+    monkeypatch.setattr(results_store.time, 'time', lambda: later)
+    assert store.get(result_id) is None
+    assert store.expired == 1 and store.misses == 1
+    assert not os.path.exists(store._file(result_id))
+
+
+def test_cleanup_evicts_oldest_above_max_entries(tmp_path):
+    store = ResultStore(str(tmp_path), max_entries=2)
+    first = store.put(['1'])
+    _age(store, first, 30)
+    second = store.put(['2'])
+    _age(store, second, 20)
+    third = store.put(['3'])
+    assert store.disk_evictions == 1
+    assert ResultStore(str(tmp_path)).get(first) is None
+    assert store.get(second) == ['2'] and store.get(third) == ['3']
+
+
+@pytest.mark.skipif('parquet' not in FORMATS, reason='no parquet engine installed')
+def test_parquet_download(tmp_path):
+    store = ResultStore(str(tmp_path))
+    result_id = store.put(['a'])
+    frame = pd.read_parquet(io.BytesIO(b''.join(store.stream(result_id, 'parquet'))))
+    assert frame['Insight'].tolist() == ['a']
+
+
+def test_download_links_need_a_result_and_an_engine():
+    with app_module.app.test_request_context():
+        page = render_template('insights.html', insights=['x'], result_id=None, formats=FORMATS)
+        assert 'download_insights' not in page
+        page = render_template('insights.html', insights=['x'], result_id='f' * 32, formats={'csv': 'text/csv'})
+        assert 'result_id=' + 'f' * 32 in page and 'format=parquet' not in page
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rule_engine import CROSS_ROW_RULES, evaluate_rules, evaluate_rules_chunked, resolve_columns, vendor_change
+
+
+def _fired(df, category='Sales'):
+    return {result['rule']: result['count'] for result in evaluate_rules(df, category)}
+
+
+def test_bills_without_invoice_are_not_due_payments():
+    bills = pd.DataFrame({'Invoice_No': [None, None, ' ', ' ', 7, 7], 'Staff': ['amit'] * 4 + [None, None]})
+    assert 'Due Payments' not in _fired(bills)
+
+
+def test_repeated_invoice_of_the_same_staff_is_a_due_payment():
+    bills = pd.DataFrame({'Invoice_No': [1, 1, 2, None, None], 'Staff': ['amit', 'amit', 'amit', 'amit', 'amit']})
+    assert _fired(bills)['Due Payments'] == 2
+
+
+def _chunks(df, size):
+    return (df.iloc[i:i + size] for i in range(0, len(df), size))
+
+
+def _purchases(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Item': rng.choice(['a', 'b', 'c', None], n, p=[0.3, 0.3, 0.3, 0.1]),
+        'Vendor': rng.choice(['v1', 'v2', None], n),
+        'Price': rng.choice([1, 2, 3, np.nan], n),
+        # Dates out of order, with ties and missing dates, so late chunks land inside the history
+        'Date': rng.choice(list(pd.date_range('2024-01-01', periods=10)) + [pd.NaT], n),
+    })
+
+
+@pytest.mark.parametrize('size', [3, 7, 64])
+def test_chunked_vendor_rules_match_whole_frame(size):
+    for df in (_purchases(), _purchases(seed=1).drop(columns='Date')):
+        assert evaluate_rules_chunked(_chunks(df, size), 'Inventory') == evaluate_rules(df, 'Inventory')
+
+
+@pytest.mark.parametrize('size', [3, 7, 64])
+def test_chunked_sales_rules_match_whole_frame(size):
+    rng = np.random.default_rng(2)
+    bills = pd.DataFrame({'Invoice_No': rng.choice(list(range(150)) + [np.nan], 300),
+                          'Staff': rng.choice(['amit', 'neha', 'ravi', None], 300),
+                          'Discount': rng.integers(0, 30, 300), 'Total': rng.integers(50, 120, 300)})
+    assert evaluate_rules_chunked(_chunks(bills, size), 'Sales') == evaluate_rules(bills, 'Sales')
+
+
+def test_vendor_state_grows_with_item_dates_not_rows():
+    df = pd.DataFrame({'Item': ['a'] * 1000, 'Vendor': ['v1', 'v2'] * 500, 'Price': range(1000),
+                       'Date': ['2024-01-02'] * 500 + ['2024-01-01'] * 500})
+    state = CROSS_ROW_RULES[vendor_change]()
+    for chunk in _chunks(df, 100):
+        state.add(chunk, resolve_columns(df.columns))
+    assert len(state.groups['a']) == 2
+    assert state.count() == _fired(df, 'Inventory')['Vendor_change'] == 998
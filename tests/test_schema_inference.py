@@ -0,0 +1,42 @@
+import pandas as pd
+
+from schema_inference import SAMPLE_ROWS, _downcast_float, apply_schema, infer_column_type
+
+
+def test_money_keeps_float64():
+    values = pd.Series([1234567.89, 99.99, None])
+    assert _downcast_float(values).dtype == 'float64'
+    assert apply_schema(pd.DataFrame({'Total': values}), {'Total': 'float'})['Total'].tolist()[:2] == [1234567.89, 99.99]
+
+
+def test_exact_values_use_float32():
+    assert _downcast_float(pd.Series([0.5, 12.25, None])).dtype == 'float32'
+
+
+def test_time_of_day_is_not_a_datetime():
+    assert infer_column_type(pd.Series(['19:45', '07:05', '12:00:30'] * 5, name='Order_Time')) != 'datetime'
+    assert infer_column_type(pd.Series(['7:45 PM', '11:05 AM'] * 5, name='KOT_Time')) != 'datetime'
+
+
+def test_dates_are_datetimes():
+    assert infer_column_type(pd.Series(['2024-01-05 19:45', '2024-01-06 07:05'] * 5, name='Created_At')) == 'datetime'
+
+
+def test_values_that_do_not_convert_keep_the_column_as_read():
+    df = pd.DataFrame({'Invoice_No': ['1', '2', 'B-12'], 'Created_At': ['2024-01-05', '2024-01-06', 'pending']})
+    typed = apply_schema(df.copy(), {'Invoice_No': 'int', 'Created_At': 'datetime'})
+    assert typed['Invoice_No'].tolist() == ['1', '2', 'B-12']
+    assert typed['Created_At'].tolist() == ['2024-01-05', '2024-01-06', 'pending']
+
+
+def test_late_values_survive_load_csv_dir(tmp_path, monkeypatch):
+    import data_loader
+    monkeypatch.setattr(data_loader, 'CACHE_DIR', str(tmp_path / 'cache'))
+    rows = [f'{i},2024-01-{i % 28 + 1:02d},{i % 7}' for i in range(SAMPLE_ROWS)]
+    rows.append('B-12,pending,3')
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'data' / 'bills.csv').write_text('Invoice_No,Created_At,Table\n' + '\n'.join(rows) + '\n')
+    df = data_loader.load_csv_dir(str(tmp_path / 'data'), use_cache=False)
+    assert df['Invoice_No'].iloc[-1] == 'B-12' and df['Created_At'].iloc[-1] == 'pending'
+    assert df['Invoice_No'].notna().all() and df['Created_At'].notna().all()
+    assert str(df['Table'].dtype) == 'int8'
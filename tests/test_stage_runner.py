@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+import stage_runner
+from stage_runner import Stage, module_files, run
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    # A small project: the stage module imports a helper, which imports another one inside a function
+    (tmp_path / 'stage_mod.py').write_text(
+        'import os\nfrom stage_helper import scale\n\n'
+        'def build(path):\n    with open(path) as f:\n        return scale(int(f.read()))\n')
+    (tmp_path / 'stage_helper.py').write_text(
+        'def scale(value):\n    from stage_factor import FACTOR\n    return value * FACTOR\n')
+    (tmp_path / 'stage_factor.py').write_text('FACTOR = 2\n')
+    (tmp_path / 'value.txt').write_text('3')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(stage_runner, 'PROJECT_DIR', str(tmp_path))
+    return tmp_path
+
+
+def _stages(project):
+    path = str(project / 'value.txt')
+    return [Stage('value', 'stage_mod:build', inputs=[path], params={'path': path})]
+
+
+def _outputs(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if name.endswith('.joblib'))
+
+
+def test_module_files_follow_project_imports_only(project):
+    files = [os.path.basename(path) for path in module_files('stage_mod')]
+    assert files == ['stage_factor.py', 'stage_helper.py', 'stage_mod.py']
+
+
+def test_editing_an_imported_module_reruns_the_stage(project):
+    cache_dir = str(project / 'cache')
+    assert [entry['status'] for entry in run(_stages(project), cache_dir=cache_dir, max_workers=1)] == ['ran']
+    assert [entry['status'] for entry in run(_stages(project), cache_dir=cache_dir, max_workers=1)] == ['cached']
+
+    (project / 'stage_factor.py').write_text('FACTOR = 5  # changed\n')
+    assert [entry['status'] for entry in run(_stages(project), cache_dir=cache_dir, max_workers=1)] == ['ran']
+
+
+def test_new_output_replaces_the_superseded_one(project):
+    cache_dir = str(project / 'cache')
+    first = run(_stages(project), cache_dir=cache_dir, max_workers=1)[0]['output']
+    (project / 'value.txt').write_text('4')
+    second = run(_stages(project), cache_dir=cache_dir, max_workers=1)[0]['output']
+    assert first != second
+    assert _outputs(cache_dir) == [os.path.basename(second)]
@@ -0,0 +1,8 @@
+import bench_startup
+
+# Generous next to the ~0.2 s measured locally, so only a real regression (e.g. pandas imported again) fails
+BUDGET_SECONDS = 2.0
+
+
+def test_cold_start_within_budget(capsys):
+    assert bench_startup.main(['--runs', '3', '--max-seconds', str(BUDGET_SECONDS)]) == 0, capsys.readouterr().out
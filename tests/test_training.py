@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from training import grow_forest, train_forest, train_forest_out_of_core
+
+
+@pytest.fixture(autouse=True)
+def in_tmp(monkeypatch, tmp_path):
+    # measure_run appends to ./models/training_runs.jsonl
+    monkeypatch.chdir(tmp_path)
+
+
+def _batch(labels, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'a': rng.normal(size=len(labels)), 'b': rng.normal(size=len(labels)), 'y': labels})
+
+
+def test_out_of_core_rejects_batches_with_other_classes():
+    batches = [_batch([0, 1] * 50, 1), _batch([0, 1, 2] * 20, 2)]
+    with pytest.raises(ValueError, match='classes'):
+        train_forest_out_of_core(iter(batches), 'y', trees_per_batch=3)
+
+
+def test_out_of_core_grows_one_forest():
+    batches = [_batch([0, 1] * 50, seed) for seed in range(3)]
+    model = train_forest_out_of_core(iter(batches), 'y', trees_per_batch=3)
+    assert len(model.estimators_) == 9
+    assert model.predict_proba(batches[0][['a', 'b']]).shape == (100, 2)
+    assert model.warm_start is False
+
+
+def test_saved_forest_is_not_warm_started():
+    data = _batch([0, 1] * 50, 1)
+    model = train_forest(data[['a', 'b']], data['y'], n_estimators=5, n_jobs=1)
+    assert model.warm_start is False
+    grow_forest(model, data[['a', 'b']], data['y'], n_new=2)
+    assert len(model.estimators_) == 7
+    assert model.warm_start is False
@@ -0,0 +1,44 @@
+import io
+
+import pandas as pd
+
+from rule_engine import evaluate_rules, evaluate_rules_chunked
+from upload_ingestion import iter_chunks, probe
+
+
+def _csv(invoices, staff='amit'):
+    rows = [f'{invoice},{staff},100' for invoice in invoices]
+    return ('Invoice_No,Staff,Total\n' + '\n'.join(rows) + '\n').encode('utf-8')
+
+
+def _chunked(data, chunksize):
+    stream = io.BytesIO(data)
+    _, schema = probe(stream)
+    return evaluate_rules_chunked(iter_chunks(stream, chunksize=chunksize, schema=schema), 'Sales')
+
+
+def _full(data):
+    return evaluate_rules(pd.read_csv(io.BytesIO(data)), 'Sales')
+
+
+def test_text_after_numeric_sample_is_not_coerced():
+    # 30 numeric invoices, then 30 'B-n' ones: none of them is a duplicate
+    data = _csv(list(range(1, 31)) + [f'B-{i}' for i in range(1, 31)])
+    assert _full(data) == []
+    assert _chunked(data, chunksize=20) == _full(data)
+
+
+def test_duplicates_across_numeric_and_text_chunks():
+    # Invoice 5 appears in a numeric chunk and again in a chunk that also holds 'B-n' invoices
+    data = _csv(list(range(1, 21)) + ['B-1', '5', 'B-2'])
+    result = _full(data)
+    assert [r['rule'] for r in result] == ['Due Payments'] and result[0]['count'] == 2
+    assert _chunked(data, chunksize=20) == result
+
+
+def test_text_columns_of_the_sample_stay_text():
+    data = b'Phone,Total\n' + b'abc,1\n' * 20 + b'0123,1\n'
+    stream = io.BytesIO(data)
+    _, schema = probe(stream)
+    chunks = list(iter_chunks(stream, chunksize=20, schema=schema))
+    assert chunks[-1]['Phone'].tolist() == ['0123']
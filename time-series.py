@@ -1,10 +1,9 @@
+import os
 import pandas as pd
 import numpy as np
-import holidays
-from hijri_converter import convert
-from convertdate import indian_civil
+from calendar_features import add_calendar_features
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
+from training import train_forest
 import matplotlib.pyplot as plt
 
 def load_data(swiggy_file_path, zomato_file_path):
@@ -28,36 +27,10 @@ def load_data(swiggy_file_path, zomato_file_path):
 
     return combined_data
 
-def add_calendar_features(data):
-    """ Add Gregorian, Islamic, Hindu calendar features and holiday information """
-    data['gregorian_year'] = data['Date_s'].dt.year
-    data['gregorian_month'] = data['Date_s'].dt.month
-    data['gregorian_day'] = data['Date_s'].dt.day
-    data['day_of_week'] = data['Date_s'].dt.dayofweek
-
-    # Islamic Calendar
-    data['islamic_date'] = data['Date_s'].apply(lambda x: convert.Gregorian(x.year, x.month, x.day).to_hijri())
-    data['islamic_year'] = data['islamic_date'].apply(lambda x: x.year)
-    data['islamic_month'] = data['islamic_date'].apply(lambda x: x.month)
-    data['islamic_day'] = data['islamic_date'].apply(lambda x: x.day)
-
-    # Hindu Calendar
-    data['hindu_date'] = data['Date_s'].apply(lambda x: indian_civil.from_gregorian(x.year, x.month, x.day))
-    data['hindu_year'] = data['hindu_date'].apply(lambda x: x[0])
-    data['hindu_month'] = data['hindu_date'].apply(lambda x: x[1])
-    data['hindu_day'] = data['hindu_date'].apply(lambda x: x[2])
-
-    # Indian holidays
-    india_holidays = holidays.India()
-    data['is_holiday'] = data['Date_s'].apply(lambda x: 1 if x in india_holidays else 0)
-
-    return data
-
 def train_model(X, y):
     """ Train a RandomForestRegressor model on the data """
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False, random_state=42)
-    model = RandomForestRegressor(n_estimators=100, random_state=42)
-    model.fit(X_train, y_train)
+    model = train_forest(X_train, y_train, kind='regressor', n_estimators=100, random_state=42, name='sales_regressor')
     return model, X_test, y_test
 
 def predict_future_sales(model, future_days=30):
@@ -94,7 +67,7 @@ def plot_predictions(dates, predictions, title="Predicted Sales"):
     plt.tight_layout()
     plt.show()
 
-def main(swiggy_file_path, zomato_file_path, future_days=30):
+def main(swiggy_file_path, zomato_file_path, future_days=30, plot=True):
     # Load and preprocess data
     data = load_data(swiggy_file_path, zomato_file_path)
     data = add_calendar_features(data)
@@ -112,11 +85,14 @@ def main(swiggy_file_path, zomato_file_path, future_days=30):
     future_dates, future_predictions = predict_future_sales(model, future_days=future_days)
 
     # Plot future sales predictions
-    plot_predictions(future_dates, future_predictions, title="Future Sales Prediction")
+    if plot:
+        plot_predictions(future_dates, future_predictions, title="Future Sales Prediction")
+    return pd.DataFrame({'Date_s': future_dates, 'predicted_sales': future_predictions})
 
 # Example usage: Call main function with file paths and desired future days to predict
-swiggy_file_path = 'PS_DATA\Prepared from Raw\SWIGGY_MASTERDATA.csv'  # Replace with actual path
-zomato_file_path = 'PS_DATA\Prepared from Raw\ZOMATO_MASTERDATA.csv'  # Replace with actual path
+swiggy_file_path = os.path.join('PS_DATA', 'Prepared from Raw', 'SWIGGY_MASTERDATA.csv')  # Replace with actual path
+zomato_file_path = os.path.join('PS_DATA', 'Prepared from Raw', 'ZOMATO_MASTERDATA.csv')  # Replace with actual path
 future_days_to_predict = 30  # Number of future days to predict
 
-main(swiggy_file_path, zomato_file_path, future_days=future_days_to_predict)
+if __name__ == '__main__':
+    main(swiggy_file_path, zomato_file_path, future_days=future_days_to_predict)
@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# One JSON line per training run with its wall time and peak memory
+TRAINING_LOG = os.getenv('TRAINING_LOG', './models/training_runs.jsonl')
+
+# Trees added per increment when a forest is grown with warm_start
+GROW_ESTIMATORS = 20
+
+FORESTS = {'classifier': RandomForestClassifier, 'regressor': RandomForestRegressor}
+
+
+@contextmanager
+def measure_run(name, log_path=TRAINING_LOG, **details):
+    """Record wall time and peak memory of a block and append them to the training log.
+
+    peak_traced_mb covers Python and NumPy allocations made inside the block,
+    max_rss_mb the peak resident size of the whole process (Unix only).
+    """
+    stats = {'run': name, 'started': datetime.now(timezone.utc).isoformat()}
+    stats.update(details)
+    tracing = not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats['wall_time_s'] = round(time.perf_counter() - start, 3)
+        stats['peak_traced_mb'] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+        if tracing:
+            tracemalloc.stop()
+        if resource is not None:
+            scale = 1 if os.uname().sysname == 'Darwin' else 1024  # ru_maxrss is bytes on macOS, KiB on Linux
+            stats['max_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2 ** 20, 1)
+        print(f"Training run {name}: {stats['wall_time_s']}s, peak {stats['peak_traced_mb']} MB traced")
+        if log_path:
+            os.makedirs(os.path.dirname(log_path) or '.', exist_ok=True)
+            with open(log_path, 'a') as f:
+                f.write(json.dumps(stats, default=str) + '\n')
+
+
+def train_forest(X, y, kind='classifier', n_estimators=100, n_jobs=-1, random_state=42, name=None, **params):
+    """Fit a random forest on all cores and log the run.
+
+    The forest can later be grown with grow_forest; it is returned with
+    warm_start off, so a plain refit of the saved model starts from scratch.
+    """
+    model = FORESTS[kind](n_estimators=n_estimators, n_jobs=n_jobs, random_state=random_state, **params)
+    with measure_run(name or f'{kind}_fit', rows=len(X), features=X.shape[1], n_estimators=n_estimators):
+        model.fit(X, y)
+    return model
+
+
+def _check_classes(model, y):
+    # Trees fitted on different class sets give predict_proba outputs that cannot be averaged
+    if hasattr(model, 'classes_') and not np.array_equal(np.unique(y), model.classes_):
+        raise ValueError(f"New data has classes {list(np.unique(y))}, "
+                         f"the forest was trained on {list(model.classes_)}.")
+
+
+def grow_forest(model, X_new, y_new, n_new=GROW_ESTIMATORS, name=None):
+    """Add `n_new` trees fitted on new data only, keeping the existing trees.
+
+    Used when a day of data lands: the forest grows instead of being retrained on
+    the full history. A classifier's new data must contain the same classes.
+    """
+    _check_classes(model, y_new)
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_new)
+    with measure_run(name or 'grow', rows=len(X_new), features=X_new.shape[1], n_estimators=n_new):
+        model.fit(X_new, y_new)
+    model.set_params(warm_start=False)
+    return model
+
+
+def _read_table(path, columns=None):
+    import pyarrow.feather as feather
+    return feather.read_table(path, columns=columns, memory_map=True)
+
+
+def sample_columnar(path, max_rows, columns=None, random_state=42):
+    """Uniform sample of at most `max_rows` rows from a columnar (Feather) cache.
+
+    The file is memory-mapped, so only the sampled rows are materialized.
+    """
+    table = _read_table(path, columns)
+    if table.num_rows > max_rows:
+        rng = np.random.default_rng(random_state)
+        table = table.take(np.sort(rng.choice(table.num_rows, max_rows, replace=False)))
+    return table.to_pandas()
+
+
+def iter_columnar(path, batch_rows, columns=None):
+    """Yield a columnar cache as DataFrames of at most `batch_rows` rows."""
+    table = _read_table(path, columns)
+    for start in range(0, table.num_rows, batch_rows):
+        yield table.slice(start, batch_rows).to_pandas()
+
+
+def train_forest_out_of_core(batches, target, kind='classifier', trees_per_batch=GROW_ESTIMATORS,
+                             prepare=None, name=None, **params):
+    """Fit a forest on data larger than RAM by growing it batch by batch.
+
+    Each batch (e.g. from iter_columnar) adds `trees_per_batch` trees fitted on that
+    batch only, so peak memory is bounded by the batch size. For a classifier every
+    batch must contain the same classes as the first one (shuffle the rows first if
+    a class is rare); a batch that does not raises ValueError.
+    """
+    model = None
+    with measure_run(name or f'{kind}_out_of_core', trees_per_batch=trees_per_batch) as stats:
+        rows = 0
+        for batch in batches:
+            if prepare is not None:
+                batch = prepare(batch)
+            X, y = batch.drop(columns=[target]), batch[target]
+            rows += len(batch)
+            if model is None:
+                model = FORESTS[kind](n_estimators=trees_per_batch, n_jobs=-1, warm_start=True, **params)
+            else:
+                _check_classes(model, y)
+                model.set_params(n_estimators=len(model.estimators_) + trees_per_batch)
+            model.fit(X, y)
+        stats['rows'] = rows
+    if model is not None:
+        model.set_params(warm_start=False)
+    return model
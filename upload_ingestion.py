@@ -0,0 +1,37 @@
+import pandas as pd
+
+# Rows per chunk when streaming an upload; peak memory scales with this, not the file size
+CHUNK_ROWS = 100_000
+
+# Rows read by the schema probe
+SAMPLE_ROWS = 20
+
+
+def probe(stream, nrows=SAMPLE_ROWS):
+    """Read a small sample of a CSV stream and the column dtypes inferred from it.
+
+    The stream is rewound afterwards so it can still be read in chunks.
+    """
+    position = stream.tell()
+    sample = pd.read_csv(stream, nrows=nrows)
+    stream.seek(position)
+    schema = {col: str(dtype) for col, dtype in sample.dtypes.items()}
+    return sample, schema
+
+
+def _text_columns(schema):
+    return {col: str for col, dtype in schema.items() if not dtype.startswith(('int', 'float', 'bool', 'datetime'))}
+
+
+def iter_chunks(stream, chunksize=None, schema=None):
+    """Lazily parse a CSV stream into DataFrame chunks of at most `chunksize` rows
+    (CHUNK_ROWS, read at call time, when not given).
+
+    When a schema from `probe` is given, the columns it found to be text are read
+    as text in every chunk, so e.g. phone numbers keep their leading zeros. Values
+    are never coerced: a column that looks numeric in the sample but has text
+    further down comes out as text in those chunks, and evaluate_rules_chunked
+    reconciles the types across chunks.
+    """
+    dtype = _text_columns(schema) if schema else None
+    yield from pd.read_csv(stream, chunksize=chunksize or CHUNK_ROWS, dtype=dtype or None)